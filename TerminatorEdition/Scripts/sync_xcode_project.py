@@ -6,10 +6,15 @@ Automatically adds missing Swift files to the Xcode project.
 
 import os
 import sys
-import subprocess
 from pathlib import Path
 from typing import Set, List, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from pbxplist import PBXParseError, XcodeProject
+
+# Folder of the app sources, relative to the Xcode project directory
+SOURCE_FOLDER = "CraigOTerminator"
+
 # ANSI color codes
 GREEN = '\033[92m'
 YELLOW = '\033[93m'
@@ -54,77 +59,31 @@ def find_swift_files(project_root: Path) -> Set[str]:
 
     return swift_files
 
-def find_files_in_pbxproj(pbxproj_path: Path) -> Set[str]:
-    """Extract all Swift files referenced in project.pbxproj."""
+def find_files_in_pbxproj(project: XcodeProject) -> Set[str]:
+    """Swift files referenced in project.pbxproj, relative to the CraigOTerminator directory."""
     files_in_project = set()
 
-    with open(pbxproj_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-        # Look for PBXFileReference entries with .swift files
-        for line in content.split('\n'):
-            if '.swift' in line and 'path = ' in line:
-                # Extract the path value
-                try:
-                    path_part = line.split('path = ')[1]
-                    path = path_part.split(';')[0].strip().strip('"')
-                    if path.endswith('.swift'):
-                        files_in_project.add(path)
-                except IndexError:
-                    continue
+    for path in project.source_paths('.swift').values():
+        parts = Path(path).parts
+        if parts and parts[0] == SOURCE_FOLDER:
+            path = str(Path(*parts[1:]))
+        files_in_project.add(path)
 
     return files_in_project
 
-def add_file_to_xcode_project(project_path: Path, file_path: str, group_path: str) -> bool:
+def add_file_to_xcode_project(project: XcodeProject, file_path: str, group_path: str) -> bool:
     """
-    Add a file to the Xcode project using xcodebuild and plutil.
-    This uses the Ruby xcodeproj gem if available.
+    Add a file to the project's group for group_path (creating missing
+    groups) and to the first target's build phases.
     """
-    project_file = project_path / "project.pbxproj"
-
-    # Try to use xcodeproj gem (requires installation)
-    script = f'''
-require 'xcodeproj'
-
-project_path = "{project_path}"
-file_path = "{file_path}"
-group_path = "{group_path}"
-
-project = Xcodeproj::Project.open(project_path)
-target = project.targets.first
-
-# Find or create the group
-group = project.main_group
-group_parts = group_path.split('/')
-group_parts.each do |part|
-  next if part.empty?
-  existing_group = group.groups.find {{ |g| g.name == part || g.path == part }}
-  if existing_group
-    group = existing_group
-  else
-    group = group.new_group(part, part)
-  end
-end
-
-# Add the file
-file_ref = group.new_file(file_path)
-target.add_file_references([file_ref])
-
-project.save
-puts "Added {{file_path}} to project"
-'''
-
-    try:
-        result = subprocess.run(
-            ['ruby', '-e', script],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+    targets = project.targets()
+    if not targets:
         return False
 
+    group = project.get_or_create_group(f"{SOURCE_FOLDER}/{group_path}")
+    project.add_file(Path(file_path).name, group, targets[:1])
+    return True
+
 def determine_group_path(file_relative_path: str) -> str:
     """Determine the appropriate Xcode group path for a file."""
     path_parts = Path(file_relative_path).parts
@@ -135,31 +94,6 @@ def determine_group_path(file_relative_path: str) -> str:
 
     return ''
 
-def check_ruby_gem_installed() -> bool:
-    """Check if xcodeproj Ruby gem is installed."""
-    try:
-        result = subprocess.run(
-            ['gem', 'list', 'xcodeproj'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        return 'xcodeproj' in result.stdout
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
-
-def install_xcodeproj_gem() -> bool:
-    """Install the xcodeproj Ruby gem."""
-    print(f"{YELLOW}Installing xcodeproj Ruby gem...{RESET}")
-    try:
-        result = subprocess.run(
-            ['sudo', 'gem', 'install', 'xcodeproj'],
-            timeout=60
-        )
-        return result.returncode == 0
-    except subprocess.TimeoutExpired:
-        return False
-
 def main():
     # Get project root
     script_dir = Path(__file__).parent
@@ -179,7 +113,12 @@ def main():
     print(f"Found {len(all_swift_files)} Swift files in project directory")
 
     # Find files already in project
-    files_in_project = find_files_in_pbxproj(pbxproj_path)
+    try:
+        project = XcodeProject.load(pbxproj_path)
+    except (OSError, PBXParseError) as e:
+        print(f"{RED}Error: Could not read {pbxproj_path}: {e}{RESET}")
+        return 1
+    files_in_project = find_files_in_pbxproj(project)
     print(f"Found {len(files_in_project)} Swift files in Xcode project")
 
     # Find missing files
@@ -204,20 +143,6 @@ def main():
         print("Aborted.")
         return 0
 
-    # Check if xcodeproj gem is installed
-    if not check_ruby_gem_installed():
-        print(f"{YELLOW}xcodeproj Ruby gem not found.{RESET}")
-        install_response = input(f"{BLUE}Install it now? (requires sudo) (y/n): {RESET}").strip().lower()
-        if install_response == 'y':
-            if not install_xcodeproj_gem():
-                print(f"{RED}Failed to install xcodeproj gem{RESET}")
-                print("\nManually install with: sudo gem install xcodeproj")
-                return 1
-        else:
-            print(f"{RED}Cannot proceed without xcodeproj gem{RESET}")
-            print("Install with: sudo gem install xcodeproj")
-            return 1
-
     # Add missing files
     print(f"\n{BLUE}📝 Adding files to Xcode project...{RESET}")
     added_count = 0
@@ -225,15 +150,17 @@ def main():
 
     for file_path in missing_files:
         group_path = determine_group_path(file_path)
-        full_path = project_root / "Xcode" / "CraigOTerminator" / file_path
 
-        if add_file_to_xcode_project(xcode_project_path, str(full_path), group_path):
+        if add_file_to_xcode_project(project, file_path, group_path):
             print(f"{GREEN}  ✓{RESET} Added {file_path}")
             added_count += 1
         else:
             print(f"{RED}  ✗{RESET} Failed to add {file_path}")
             failed_count += 1
 
+    if added_count:
+        project.save()
+
     print(f"\n{GREEN}✅ Successfully added {added_count} files{RESET}")
     if failed_count > 0:
         print(f"{RED}❌ Failed to add {failed_count} files{RESET}")
@@ -4,76 +4,270 @@ Test Result Analyzer for Craig-O-Clean
 Analyzes test results, app logs, and generates comprehensive issue reports
 """
 
+import argparse
+import hashlib
 import json
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Iterable, TextIO, Tuple
 from collections import defaultdict
 import re
 
+import log_events
+from prompt_builder import CHARS_PER_TOKEN, PromptBuilder, clip
+from latency_stats import LatencySketch, TopK
+from regression_detector import RegressionDetector
+from results_store import ResultsStore
+from xcresult import XCResultBundle
+
+
+class JSONObjectStreamer:
+    """Incremental reader for a JSON document whose top level is an object.
+
+    Members named in the handlers are expected to be arrays; each element
+    is decoded on its own and passed to the handler, so a huge array never
+    has to be held in memory. All other members are decoded whole and
+    returned. Memory use is bounded by the chunk size plus the largest
+    single element.
+    """
+
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+    DELIMITERS = ' \t\n\r,:]}'
+
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read(self, handlers: Dict[str, Callable[[Any], None]]) -> Dict[str, Any]:
+        members = {}
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return members
+
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+            if key in handlers:
+                self._stream_array(handlers[key])
+            else:
+                members[key] = self._decode_value()
+            if self._expect(',}') == '}':
+                return members
+
+    def _stream_array(self, handler: Callable[[Any], None]) -> None:
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            handler(self._decode_value())
+            if self._expect(',]') == ']':
+                return
+
+    def _fill(self) -> bool:
+        """Read another chunk, dropping already consumed input."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON input')
+
+    def _expect(self, allowed: str) -> str:
+        char = self._peek()
+        if char not in allowed:
+            raise ValueError(f'Expected one of {allowed!r} at offset {self.pos}, got {char!r}')
+        self.pos += 1
+        return char
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A value not followed by a delimiter may be truncated (e.g. a
+            # number split across chunks), so only accept it once a delimiter
+            # follows or the file has ended
+            if (end == len(self.buffer) or self.buffer[end] not in self.DELIMITERS) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
 class TestResultAnalyzer:
-    def __init__(self, reports_dir: str):
+    # Cap on entries kept per collected list and on distinct error_summary
+    # keys; totals are always counted
+    MAX_COLLECTED_ENTRIES = 1000
+    
+    # error_summary key counting the errors past the distinct key cap
+    ERROR_SUMMARY_OTHER = '(other)'
+
+    # Number of slowest performance metrics kept
+    TOP_SLOWEST_METRICS = 10
+    
+    # Metrics slower than this (seconds) are reported as slow operations
+    SLOW_OPERATION_THRESHOLD = 1.0
+    
+    # Relative accuracy of the per-operation latency quantiles
+    SKETCH_ACCURACY = 0.01
+    
+    # Previous runs merged into the latency regression baseline
+    REGRESSION_BASELINE_RUNS = 20
+    
+    # Examples kept per test log finding (the shared parse keeps no more)
+    MAX_LOG_EXAMPLES = log_events.MAX_MENTION_EXAMPLES
+    
+    # Orchestrator prompt size limit in characters (about 8k tokens), entries
+    # shown per section and characters shown per issue message
+    ORCHESTRATOR_PROMPT_BUDGET = 32000
+    PROMPT_SECTION_LIMIT = 10
+    PROMPT_PERFORMANCE_LIMIT = 5
+    PROMPT_MESSAGE_CHARS = 1000
+    
+    # Per-file analysis cache (relative to reports_dir); bump the version
+    # whenever the shape of an analysis changes
+    ANALYSIS_CACHE_DIR = '.analysis-cache'
+    ANALYSIS_CACHE_VERSION = 2
+    HASH_BLOCK_SIZE = 1 << 20
+    
+    # Run file kinds: (glob relative to reports_dir, file name prefix)
+    RUN_FILE_PATTERNS = {
+        'app_logs': ('logs/app_logs_*.json', 'app_logs_'),
+        'test_log': ('logs/test_*.log', 'test_')
+    }
+
+    def __init__(self, reports_dir: str, max_collected: int = MAX_COLLECTED_ENTRIES,
+                 top_k: int = TOP_SLOWEST_METRICS,
+                 slow_threshold: float = SLOW_OPERATION_THRESHOLD,
+                 baseline_runs: int = REGRESSION_BASELINE_RUNS):
         self.reports_dir = Path(reports_dir)
+        self.max_collected = max_collected
+        self.top_k = top_k
+        self.slow_threshold = slow_threshold
+        self.baseline_runs = baseline_runs
         self.issues: List[Dict[str, Any]] = []
         self.errors: List[Dict[str, Any]] = []
         self.warnings: List[Dict[str, Any]] = []
         self.performance_issues: List[Dict[str, Any]] = []
         self.ui_issues: List[Dict[str, Any]] = []
+        self.prompt_omitted: Dict[str, int] = {}
         
-    def analyze_test_results(self, test_results_json: str) -> Dict[str, Any]:
-        """Analyze xcresult JSON output"""
+    def analyze_test_results(self, test_results: str) -> Dict[str, Any]:
+        """Analyze an xcresult bundle
+        
+        test_results is an .xcresult bundle, a JSON export directory of one,
+        or the root JSON written by `xcresulttool get --format json` (whose
+        references resolve through the sibling bundle). Only the test plan
+        summaries are read, plus the per-test summary of each failed test
+        up to max_collected failures.
+        """
         try:
-            with open(test_results_json, 'r') as f:
-                data = json.load(f)
+            bundle = XCResultBundle.open(test_results)
             
             analysis = {
                 'total_tests': 0,
                 'passed': 0,
                 'failed': 0,
                 'skipped': 0,
-                'failures': []
+                'expected_failures': 0,
+                'duration': 0.0,
+                'failures': [],
+                'test_failures': []
+            }
+            
+            status_keys = {
+                XCResultBundle.STATUS_PASSED: 'passed',
+                XCResultBundle.STATUS_FAILED: 'failed',
+                XCResultBundle.STATUS_SKIPPED: 'skipped',
+                XCResultBundle.STATUS_EXPECTED_FAILURE: 'expected_failures'
             }
             
-            # Parse xcresult structure (simplified - actual structure may vary)
-            if 'actions' in data:
-                for action in data.get('actions', {}).get('_values', []):
-                    if 'actionResult' in action:
-                        tests_ref = action.get('actionResult', {}).get('testsRef', {})
-                        if tests_ref:
-                            # Extract test information
-                            pass
+            for test in bundle.iter_tests():
+                analysis['total_tests'] += 1
+                analysis['duration'] += test.duration
+                key = status_keys.get(test.status)
+                if key:
+                    analysis[key] += 1
+                
+                if test.failed and len(analysis['failures']) < self.max_collected:
+                    failure = {
+                        'test': test.name,
+                        'class_name': test.class_name,
+                        'target': test.target,
+                        'identifier': test.identifier,
+                        'duration': test.duration,
+                        'message': None,
+                        'file': None,
+                        'line': None
+                    }
+                    summaries = bundle.test_summary(test).get('failureSummaries', [])
+                    if summaries:
+                        failure['message'] = summaries[0].get('message')
+                        failure['file'] = summaries[0].get('fileName')
+                        failure['line'] = summaries[0].get('lineNumber')
+                    analysis['failures'].append(failure)
+                    analysis['test_failures'].append(
+                        f"{test.class_name}.{test.name}: {failure['message'] or 'failed'}"
+                    )
             
             return analysis
         except Exception as e:
             return {'error': str(e)}
     
     def analyze_app_logs(self, app_logs_json: str) -> Dict[str, Any]:
-        """Analyze application logs"""
+        """Analyze application logs
+        
+        The export is streamed element by element, so memory does not grow
+        with log volume: counts cover every entry, while the collected
+        errors/warnings/critical_errors/ui_events lists keep at most
+        max_collected entries each, and error_summary counts at most
+        max_collected distinct messages (the rest under
+        ERROR_SUMMARY_OTHER). Slow operations keep the max_collected
+        slowest, performance_metrics the top_k slowest, and operation_stats
+        gives per-operation count/mean/max/p50/p95/p99 from a quantile
+        sketch (serialized in operation_sketches so runs can be merged).
+        """
         try:
-            with open(app_logs_json, 'r') as f:
-                data = json.load(f)
+            analysis = self._new_app_analysis()
             
-            analysis = {
-                'total_logs': len(data.get('logs', [])),
-                'errors': [],
-                'warnings': [],
-                'critical_errors': [],
-                'performance_metrics': [],
-                'ui_events': [],
-                'error_summary': defaultdict(int),
-                'slow_operations': []
-            }
+            def collect(key: str, item: Any):
+                if len(analysis[key]) < self.max_collected:
+                    analysis[key].append(item)
             
-            # Analyze logs
-            for log in data.get('logs', []):
+            def on_log(log: Dict[str, Any]):
+                analysis['total_logs'] += 1
                 level = log.get('level', '').upper()
                 category = log.get('category', 'Unknown')
                 message = log.get('message', '')
                 
                 if level in ['ERROR', 'CRITICAL']:
-                    analysis['errors'].append({
+                    analysis['error_count'] += 1
+                    collect('errors', {
                         'level': level,
                         'category': category,
                         'message': message,
@@ -81,76 +275,354 @@ class TestResultAnalyzer:
                         'error': log.get('error'),
                         'stackTrace': log.get('stackTrace')
                     })
-                    analysis['error_summary'][f"{category}:{message[:50]}"] += 1
+                    self._count_error(analysis['error_summary'], f"{category}:{message[:50]}")
                     
                     if level == 'CRITICAL':
-                        analysis['critical_errors'].append(log)
+                        analysis['critical_count'] += 1
+                        collect('critical_errors', log)
                 
                 elif level == 'WARNING':
-                    analysis['warnings'].append({
+                    analysis['warning_count'] += 1
+                    collect('warnings', {
                         'category': category,
                         'message': message,
                         'timestamp': log.get('timestamp')
                     })
             
-            # Analyze performance metrics
-            metrics = data.get('performanceMetrics', [])
-            for metric in metrics:
+            slowest, slow_operations = self._new_slow_selectors()
+            sketches: Dict[str, LatencySketch] = {}
+            
+            def on_metric(metric: Dict[str, Any]):
+                analysis['performance_metric_count'] += 1
                 duration = metric.get('duration', 0)
                 operation = metric.get('operation', 'Unknown')
                 
-                if duration > 1.0:  # Operations taking more than 1 second
-                    analysis['slow_operations'].append({
+                if duration > self.slow_threshold:
+                    analysis['slow_operation_count'] += 1
+                    slow_operations.push({
                         'operation': operation,
                         'duration': duration,
                         'timestamp': metric.get('timestamp')
                     })
+                
+                sketch = sketches.get(operation)
+                if sketch is None:
+                    sketch = sketches[operation] = LatencySketch(self.SKETCH_ACCURACY)
+                sketch.add(duration)
+                slowest.push(metric)
             
-            analysis['performance_metrics'] = sorted(
-                metrics,
-                key=lambda x: x.get('duration', 0),
-                reverse=True
-            )[:10]  # Top 10 slowest
+            def on_ui_event(event: Dict[str, Any]):
+                analysis['ui_event_count'] += 1
+                collect('ui_events', event)
             
-            # Analyze UI events
-            analysis['ui_events'] = data.get('uiEvents', [])
+            with open(app_logs_json, 'r') as f:
+                JSONObjectStreamer(f).read({
+                    'logs': on_log,
+                    'performanceMetrics': on_metric,
+                    'uiEvents': on_ui_event
+                })
             
+            self._finish_app_analysis(analysis, slowest, slow_operations, sketches)
             return analysis
         except Exception as e:
             return {'error': str(e)}
     
+    def _new_app_analysis(self) -> Dict[str, Any]:
+        return {
+            'total_logs': 0,
+            'errors': [],
+            'warnings': [],
+            'critical_errors': [],
+            'performance_metrics': [],
+            'ui_events': [],
+            'error_summary': defaultdict(int),
+            'slow_operations': [],
+            'slow_operation_count': 0,
+            'operation_stats': {},
+            'operation_sketches': {},
+            'error_count': 0,
+            'warning_count': 0,
+            'critical_count': 0,
+            'performance_metric_count': 0,
+            'ui_event_count': 0
+        }
+    
+    def _count_error(self, error_summary: Dict[str, int], key: str, count: int = 1):
+        """Add count to key, or to ERROR_SUMMARY_OTHER once max_collected keys exist"""
+        if key not in error_summary and len(error_summary) >= self.max_collected:
+            key = self.ERROR_SUMMARY_OTHER
+        error_summary[key] += count
+    
+    def _new_slow_selectors(self) -> Tuple[TopK, TopK]:
+        slowest = TopK(self.top_k, key=lambda metric: metric.get('duration', 0))
+        slow_operations = TopK(self.max_collected, key=lambda op: op['duration'])
+        return slowest, slow_operations
+    
+    def _finish_app_analysis(self, analysis: Dict[str, Any], slowest: TopK,
+                             slow_operations: TopK, sketches: Dict[str, LatencySketch]):
+        analysis['performance_metrics'] = slowest.items()  # Top K slowest
+        analysis['slow_operations'] = slow_operations.items()  # Slowest first
+        analysis['operation_stats'] = {
+            operation: sketch.summary() for operation, sketch in sorted(sketches.items())
+        }
+        analysis['operation_sketches'] = {
+            operation: sketch.to_dict() for operation, sketch in sorted(sketches.items())
+        }
+    
+    def merge_app_analyses(self, analyses: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-run app log analyses into one aggregate view
+        
+        Counts are summed, collected lists are concatenated up to
+        max_collected, slow metrics are re-selected across runs and the
+        per-operation sketches are merged, so operation_stats describe the
+        latency distribution of all runs together.
+        """
+        merged = self._new_app_analysis()
+        slowest, slow_operations = self._new_slow_selectors()
+        sketches: Dict[str, LatencySketch] = {}
+        
+        for analysis in analyses:
+            if 'error' in analysis:
+                continue
+            for key in ('total_logs', 'slow_operation_count', 'error_count', 'warning_count',
+                        'critical_count', 'performance_metric_count', 'ui_event_count'):
+                merged[key] += analysis.get(key, 0)
+            for key in ('errors', 'warnings', 'critical_errors', 'ui_events'):
+                room = self.max_collected - len(merged[key])
+                merged[key].extend(analysis.get(key, [])[:max(room, 0)])
+            for key, count in analysis.get('error_summary', {}).items():
+                self._count_error(merged['error_summary'], key, count)
+            slowest.extend(analysis.get('performance_metrics', []))
+            slow_operations.extend(analysis.get('slow_operations', []))
+            for operation, data in analysis.get('operation_sketches', {}).items():
+                sketch = LatencySketch.from_dict(data)
+                if operation in sketches:
+                    sketches[operation].merge(sketch)
+                else:
+                    sketches[operation] = sketch
+        
+        self._finish_app_analysis(merged, slowest, slow_operations, sketches)
+        return merged
+    
     def analyze_test_log(self, test_log: str) -> Dict[str, Any]:
-        """Analyze test execution log"""
+        """Analyze test execution log
+        
+        The log's events come from the shared log_events core, so a log
+        generate-test-report.py already parsed is not parsed again.
+        Examples are capped at MAX_LOG_EXAMPLES but every mention is
+        counted.
+        """
         try:
-            with open(test_log, 'r') as f:
-                content = f.read()
-            
-            analysis = {
-                'test_failures': [],
-                'build_errors': [],
+            mentions = log_events.parse_log(test_log).mentions
+            limit = self.MAX_LOG_EXAMPLES
+            return {
+                'test_failures': mentions.failure_examples[:limit],
+                'build_errors': mentions.error_examples[:limit],
                 'warnings': [],
-                'test_count': 0
+                'test_count': mentions.test_count,
+                'test_failure_count': mentions.failure_count,
+                'build_error_count': mentions.error_count
             }
-            
-            # Extract test failures
-            failure_pattern = r'Test Case.*failed|Assertion failed|XCTAssert.*failed'
-            failures = re.findall(failure_pattern, content, re.IGNORECASE)
-            analysis['test_failures'] = failures[:20]  # Limit to 20
-            
-            # Extract build errors
-            error_pattern = r'error:.*'
-            errors = re.findall(error_pattern, content, re.IGNORECASE)
-            analysis['build_errors'] = errors[:20]
-            
-            # Count tests
-            test_pattern = r'Test Case.*\[.*\]'
-            tests = re.findall(test_pattern, content)
-            analysis['test_count'] = len(tests)
-            
-            return analysis
         except Exception as e:
             return {'error': str(e)}
     
+    def detect_regressions(self, app_analysis: Dict[str, Any],
+                           baseline_runs: List[Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Attach latency regressions against earlier runs to app_analysis
+        
+        baseline_runs holds the operation_sketches of previous runs, oldest
+        first; only the last self.baseline_runs of them form the baseline.
+        The result is stored under 'regressions', which categorize_issues
+        turns into performance_regression issues.
+        """
+        if 'error' in app_analysis:
+            return []
+        baseline = baseline_runs[-self.baseline_runs:] if self.baseline_runs > 0 else []
+        regressions = RegressionDetector().detect(app_analysis.get('operation_sketches', {}), baseline)
+        app_analysis['regressions'] = regressions
+        return regressions
+    
+    def merge_log_analyses(self, analyses: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-run test log analyses into one aggregate view"""
+        merged = {
+            'test_failures': [],
+            'build_errors': [],
+            'warnings': [],
+            'test_count': 0,
+            'test_failure_count': 0,
+            'build_error_count': 0
+        }
+        
+        for analysis in analyses:
+            if 'error' in analysis:
+                continue
+            for key in ('test_count', 'test_failure_count', 'build_error_count'):
+                merged[key] += analysis.get(key, 0)
+            for key in ('test_failures', 'build_errors', 'warnings'):
+                room = self.MAX_LOG_EXAMPLES - len(merged[key])
+                merged[key].extend(analysis.get(key, [])[:max(room, 0)])
+        
+        return merged
+    
+    def analyze_file_cached(self, kind: str, path: str,
+                            use_cache: bool = True) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Analyze one app log export or test log, reusing a cached analysis
+        
+        Results are cached under ANALYSIS_CACHE_DIR keyed by the SHA-256 of
+        the file content, so a file that was already analyzed with the same
+        settings is never read past the hash again. Failed analyses are not
+        cached. Returns (cache key, analysis); the key is None when the
+        cache is not used.
+        """
+        analyze = self.analyze_app_logs if kind == 'app_logs' else self.analyze_test_log
+        if not use_cache:
+            return None, analyze(path)
+        
+        try:
+            digest = self._content_hash(path)
+        except OSError as e:
+            return None, {'error': str(e)}
+        
+        cache_path = self.reports_dir / self.ANALYSIS_CACHE_DIR / f"{digest}.json"
+        settings = self._cache_settings(kind)
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('settings') == settings:
+                return digest, cached['analysis']
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        analysis = analyze(path)
+        if 'error' not in analysis:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                # Unique per process: pool workers and concurrent runs may write one key
+                tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'w') as f:
+                    json.dump({'settings': settings, 'analysis': analysis}, f)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass  # Caching is best effort
+        return digest, analysis
+    
+    def prune_analysis_cache(self, keep: Iterable[str]) -> int:
+        """Delete cached analyses whose key is not in keep; return the number removed
+        
+        Temporary files are left alone: they belong to writers that are
+        still running.
+        """
+        keep = set(keep)
+        removed = 0
+        for path in (self.reports_dir / self.ANALYSIS_CACHE_DIR).glob('*.json'):
+            if path.stem in keep:
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass  # Pruning is best effort
+        return removed
+    
+    def _content_hash(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(self.HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _cache_settings(self, kind: str) -> Dict[str, Any]:
+        return {
+            'version': self.ANALYSIS_CACHE_VERSION,
+            'kind': kind,
+            'max_collected': self.max_collected,
+            'top_k': self.top_k,
+            'slow_threshold': self.slow_threshold
+        }
+    
+    def find_run_files(self) -> List[Tuple[str, str, Path]]:
+        """(run id, kind, path) for every app log export and test log"""
+        run_files = []
+        for kind, (pattern, _) in self.RUN_FILE_PATTERNS.items():
+            for path in sorted(self.reports_dir.glob(pattern)):
+                run_files.append((self.run_id(kind, path), kind, path))
+        return run_files
+    
+    @classmethod
+    def run_id(cls, kind: str, path: Path) -> str:
+        """Run timestamp from a file name, e.g. app_logs_<run>.json -> <run>"""
+        return Path(path).stem[len(cls.RUN_FILE_PATTERNS[kind][1]):]
+    
+    def analyze_all_runs(self, jobs: int = 1, use_cache: bool = True) -> Dict[str, Any]:
+        """Analyze every run in the reports directory
+        
+        Runs are identified by the timestamp suffix shared by
+        app_logs_<run>.json and test_<run>.log. Files are analyzed in a
+        process pool when jobs > 1 (each through the content-hash cache), and
+        the results are returned per run, in run order, together with an
+        aggregate view merged across all runs. Each run's latency is checked
+        for regressions against the runs before it; the aggregate carries
+        the regressions of the latest run.
+        """
+        run_files = self.find_run_files()
+        worker = partial(_analyze_file_worker, reports_dir=str(self.reports_dir),
+                         settings=self._analyzer_settings(), use_cache=use_cache)
+        jobs_list = [(kind, str(path)) for _, kind, path in run_files]
+        
+        if jobs <= 1 or len(jobs_list) <= 1:
+            cached_results = [worker(job) for job in jobs_list]
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(jobs_list))) as executor:
+                cached_results = list(executor.map(worker, jobs_list))
+        results = [analysis for _, analysis in cached_results]
+        if use_cache:
+            # Drop the analyses of files that are gone or have changed
+            self.prune_analysis_cache(key for key, _ in cached_results if key)
+        
+        runs: Dict[str, Dict[str, Any]] = {}
+        for (run_id, kind, path), analysis in zip(run_files, results):
+            run = runs.setdefault(run_id, {'run_id': run_id})
+            if kind == 'app_logs':
+                run['app_logs'] = str(path)
+                run['app_analysis'] = analysis
+            else:
+                run['test_log'] = str(path)
+                run['log_analysis'] = analysis
+        
+        ordered_runs = [runs[run_id] for run_id in sorted(runs)]
+        
+        previous_sketches: List[Dict[str, Dict[str, Any]]] = []
+        latest_regressions: List[Dict[str, Any]] = []
+        for run in ordered_runs:
+            app_analysis = run.get('app_analysis')
+            if app_analysis is None or 'error' in app_analysis:
+                continue
+            latest_regressions = self.detect_regressions(app_analysis, previous_sketches)
+            previous_sketches.append(app_analysis.get('operation_sketches', {}))
+        
+        aggregate_app_analysis = self.merge_app_analyses(
+            run['app_analysis'] for run in ordered_runs if 'app_analysis' in run
+        )
+        aggregate_app_analysis['regressions'] = latest_regressions
+        
+        return {
+            'runs': ordered_runs,
+            'aggregate': {
+                'run_count': len(ordered_runs),
+                'app_analysis': aggregate_app_analysis,
+                'log_analysis': self.merge_log_analyses(
+                    run['log_analysis'] for run in ordered_runs if 'log_analysis' in run
+                )
+            }
+        }
+    
+    def _analyzer_settings(self) -> Dict[str, Any]:
+        return {
+            'max_collected': self.max_collected,
+            'top_k': self.top_k,
+            'slow_threshold': self.slow_threshold
+        }
+    
     def generate_issue_report(self, output_file: str):
         """Generate comprehensive issue report"""
         report = {
@@ -221,6 +693,22 @@ class TestResultAnalyzer:
             })
             self.performance_issues.append(slow_op)
         
+        # Latency regressions against the rolling baseline of earlier runs
+        for regression in app_analysis.get('regressions', []):
+            self.issues.append({
+                'type': 'performance_regression',
+                'severity': regression['severity'],
+                'category': 'performance',
+                'operation': regression['operation'],
+                'message': (f"{regression['operation']} median latency is {regression['median_ratio']:.2f}x "
+                            f"the baseline ({regression['baseline_p50']:.3f}s -> {regression['current_p50']:.3f}s)"),
+                'median_ratio': regression['median_ratio'],
+                'rank_biserial': regression['rank_biserial'],
+                'p_value': regression['p_value'],
+                'baseline_runs': regression['baseline_runs'],
+                'source': 'app_logs'
+            })
+        
         # Warnings
         for warning in app_analysis.get('warnings', []):
             self.issues.append({
@@ -232,58 +720,61 @@ class TestResultAnalyzer:
             })
             self.warnings.append(warning)
     
-    def generate_orchestrator_prompt(self, output_file: str):
-        """Generate detailed orchestrator prompt"""
+    def issues_by_severity(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Issues bucketed by severity in one pass, in their original order"""
+        return self.issues_by_severity_and_type()[0]
+    
+    def issues_by_severity_and_type(self) -> Tuple[Dict[str, List[Dict[str, Any]]],
+                                                   Dict[str, List[Dict[str, Any]]]]:
+        """Issues bucketed by severity and by type in one pass, in their original order"""
+        by_severity = defaultdict(list)
+        by_type = defaultdict(list)
+        for issue in self.issues:
+            by_severity[issue.get('severity')].append(issue)
+            by_type[issue.get('type')].append(issue)
+        return by_severity, by_type
+    
+    def generate_orchestrator_prompt(self, output_file: str,
+                                     budget: Optional[int] = ORCHESTRATOR_PROMPT_BUDGET) -> str:
+        """Generate detailed orchestrator prompt
         
-        prompt = f"""# Agent Orchestrator Task: Fix Issues from E2E Testing Analysis
-
-## Context
-
-This task is generated from automated analysis of E2E testing results for the Craig-O-Clean macOS application.
-The analysis has identified specific issues that need to be addressed by specialized agents.
-
-## Analysis Summary
-
-- **Total Issues Found:** {len(self.issues)}
-- **Critical Errors:** {len([i for i in self.issues if i.get('severity') == 'critical'])}
-- **High Severity Issues:** {len([i for i in self.issues if i.get('severity') == 'high'])}
-- **Medium Severity Issues:** {len([i for i in self.issues if i.get('severity') == 'medium'])}
-- **Low Severity Issues:** {len([i for i in self.issues if i.get('severity') == 'low'])}
-
-## Critical Issues (Priority 1)
-
-"""
+        The prompt is kept within budget characters (None = unbounded):
+        critical issues are admitted first, then high severity issues,
+        regressions and slow operations, and a section that loses entries
+        ends with a truncation marker saying how many.
+        """
+        
+        by_severity, by_type = self.issues_by_severity_and_type()
+        critical_issues = by_severity['critical']
+        high_issues = by_severity['high']
+        regressions = by_type['performance_regression']
+        message_limit = self.PROMPT_MESSAGE_CHARS
         
-        critical_issues = [i for i in self.issues if i.get('severity') == 'critical']
-        for idx, issue in enumerate(critical_issues[:10], 1):
-            prompt += f"""
-### Critical Issue #{idx}
+        def render_issue(title: str, with_stack_trace: bool, idx: int, issue: Dict[str, Any]) -> str:
+            entry = f"""
+### {title} #{idx}
 
 - **Type:** {issue.get('type')}
 - **Category:** {issue.get('category', 'N/A')}
-- **Message:** {issue.get('message', 'N/A')}
+- **Message:** {clip(issue.get('message', 'N/A'), message_limit)}
 - **Source:** {issue.get('source')}
 """
-            if issue.get('stackTrace'):
-                prompt += f"\n**Stack Trace:**\n```\n{issue.get('stackTrace')[:500]}\n```\n"
+            if with_stack_trace and issue.get('stackTrace'):
+                entry += f"\n**Stack Trace:**\n```\n{issue.get('stackTrace')[:500]}\n```\n"
+            return entry
         
-        prompt += "\n## High Severity Issues (Priority 2)\n\n"
-        
-        high_issues = [i for i in self.issues if i.get('severity') == 'high']
-        for idx, issue in enumerate(high_issues[:10], 1):
-            prompt += f"""
-### High Priority Issue #{idx}
+        def render_regression(idx: int, issue: Dict[str, Any]) -> str:
+            return f"""
+### Regression #{idx}
 
-- **Type:** {issue.get('type')}
-- **Category:** {issue.get('category', 'N/A')}
-- **Message:** {issue.get('message', 'N/A')}
-- **Source:** {issue.get('source')}
+- **Operation:** {issue.get('operation')}
+- **Change:** {issue.get('message')}
+- **Effect Size:** rank-biserial {issue.get('rank_biserial', 0):.2f} (p = {issue.get('p_value', 1):.1e}, {issue.get('baseline_runs')} baseline runs)
+- **Recommendation:** Find the change that slowed this code path
 """
         
-        if self.performance_issues:
-            prompt += "\n## Performance Issues\n\n"
-            for idx, issue in enumerate(self.performance_issues[:5], 1):
-                prompt += f"""
+        def render_performance(idx: int, issue: Dict[str, Any]) -> str:
+            return f"""
 ### Performance Issue #{idx}
 
 - **Operation:** {issue.get('operation')}
@@ -291,7 +782,43 @@ The analysis has identified specific issues that need to be addressed by special
 - **Recommendation:** Optimize this operation to reduce latency
 """
         
-        prompt += """
+        builder = PromptBuilder(budget)
+        builder.text(f"""# Agent Orchestrator Task: Fix Issues from E2E Testing Analysis
+
+## Context
+
+This task is generated from automated analysis of E2E testing results for the Craig-O-Clean macOS application.
+The analysis has identified specific issues that need to be addressed by specialized agents.
+
+## Analysis Summary
+
+- **Total Issues Found:** {len(self.issues)}
+- **Critical Errors:** {len(critical_issues)}
+- **High Severity Issues:** {len(high_issues)}
+- **Medium Severity Issues:** {len(by_severity['medium'])}
+- **Low Severity Issues:** {len(by_severity['low'])}
+
+## Critical Issues (Priority 1)
+
+""")
+        builder.section('critical issues', critical_issues, partial(render_issue, 'Critical Issue', True),
+                        priority=0, limit=self.PROMPT_SECTION_LIMIT)
+        
+        builder.text("\n## High Severity Issues (Priority 2)\n\n")
+        builder.section('high severity issues', high_issues, partial(render_issue, 'High Priority Issue', False),
+                        priority=1, limit=self.PROMPT_SECTION_LIMIT)
+        
+        if regressions:
+            builder.text("\n## Performance Regressions\n\n")
+            builder.section('regressions', regressions, render_regression,
+                            priority=2, limit=self.PROMPT_PERFORMANCE_LIMIT)
+        
+        if self.performance_issues:
+            builder.text("\n## Performance Issues\n\n")
+            builder.section('performance issues', self.performance_issues, render_performance,
+                            priority=3, limit=self.PROMPT_PERFORMANCE_LIMIT)
+        
+        builder.text(f"""
 ## Required Agent Actions
 
 Please use the agent orchestrator (@.cursor/agents/agent-orchestrator.md) to coordinate the following agents:
@@ -370,7 +897,10 @@ For detailed issue information, see the generated issue report JSON file.
 3. Review agent outputs and apply fixes
 4. Re-run automated tests to verify fixes
 5. Iterate until all critical and high priority issues are resolved
-"""
+""")
+        
+        prompt = builder.build()
+        self.prompt_omitted = builder.omitted()
         
         with open(output_file, 'w') as f:
             f.write(prompt)
@@ -378,22 +908,79 @@ For detailed issue information, see the generated issue report JSON file.
         return prompt
 
 
+def _analyze_file_worker(job: Tuple[str, str], reports_dir: str, settings: Dict[str, Any],
+                         use_cache: bool = True) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Process pool entry point: analyze one (kind, path) job"""
+    kind, path = job
+    return TestResultAnalyzer(reports_dir, **settings).analyze_file_cached(kind, path, use_cache)
+
+
+def record_analysis(store: ResultsStore, run_key: str, app_analysis: Dict[str, Any],
+                    log_analysis: Dict[str, Any], test_analysis: Optional[Dict[str, Any]] = None) -> int:
+    """Record one run's issues and per-operation latency in the results store"""
+    analyzer = TestResultAnalyzer(str(store.path.parent))
+    analyzer.categorize_issues(app_analysis, test_analysis or {}, log_analysis)
+    summary = {
+        key: app_analysis.get(key, 0)
+        for key in ('total_logs', 'error_count', 'warning_count', 'critical_count',
+                    'performance_metric_count', 'slow_operation_count')
+    }
+    for key in ('test_count', 'test_failure_count', 'build_error_count'):
+        summary[key] = log_analysis.get(key, 0)
+    return store.record_run(
+        ResultsStore.SOURCE_APP_ANALYSIS,
+        run_key,
+        summary=summary,
+        issues=analyzer.issues,
+        operation_stats=app_analysis.get('operation_stats'),
+        operation_sketches=app_analysis.get('operation_sketches')
+    )
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: analyze_test_results.py <reports_directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Analyze Craig-O-Clean test results and app logs")
+    parser.add_argument('reports_dir', help="Reports directory (containing logs/)")
+    parser.add_argument('--all-runs', action='store_true',
+                        help="Analyze every run in the directory, not just the newest files")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Processes used with --all-runs (0 = one per CPU)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore and do not write the per-file analysis cache")
+    parser.add_argument('--baseline-runs', type=int, default=TestResultAnalyzer.REGRESSION_BASELINE_RUNS,
+                        help="Previous runs used as the latency regression baseline")
+    parser.add_argument('--store', action='store_true',
+                        help="Record analyzed runs in the results store")
+    parser.add_argument('--store-path',
+                        help=f"Results store file, shared with generate-test-report.py "
+                             f"(default: {ResultsStore.DEFAULT_FILENAME} in the reports directory)")
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument('--prompt-budget', type=int, default=TestResultAnalyzer.ORCHESTRATOR_PROMPT_BUDGET,
+                        help="Maximum orchestrator prompt size in characters (0 = unlimited)")
+    budget.add_argument('--prompt-budget-tokens', type=int,
+                        help=f"Maximum orchestrator prompt size in tokens ({CHARS_PER_TOKEN} characters each, "
+                             f"0 = unlimited)")
+    args = parser.parse_args()
     
-    reports_dir = sys.argv[1]
-    analyzer = TestResultAnalyzer(reports_dir)
+    if args.prompt_budget_tokens is not None:
+        prompt_budget = args.prompt_budget_tokens * CHARS_PER_TOKEN or None
+    else:
+        prompt_budget = args.prompt_budget or None
+    
+    reports_dir = args.reports_dir
+    analyzer = TestResultAnalyzer(reports_dir, baseline_runs=args.baseline_runs)
     
     reports_path = Path(reports_dir)
+    store_path = Path(args.store_path) if args.store_path else ResultsStore.default_path(reports_path)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     # Find latest test files
-    test_results = list(reports_path.glob("test_results_*.json"))
+    test_results = list(reports_path.glob("test_results_*.json")) + list(reports_path.glob("*.xcresult"))
     app_logs = list(reports_path.glob("logs/app_logs_*.json"))
     test_logs = list(reports_path.glob("logs/test_*.log"))
+    if test_logs:
+        log_events.prune_cache(reports_path / 'logs')
     
-    if not test_results and not app_logs:
+    if not test_results and not app_logs and not (args.all_runs and test_logs):
         print(f"No test results or app logs found in {reports_dir}")
         sys.exit(1)
     
@@ -402,7 +989,26 @@ def main():
     test_analysis = {}
     log_analysis = {}
     
-    if app_logs:
+    if args.all_runs:
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        multi_run = analyzer.analyze_all_runs(jobs=jobs, use_cache=not args.no_cache)
+        print(f"Analyzed {multi_run['aggregate']['run_count']} runs")
+        app_analysis = multi_run['aggregate']['app_analysis']
+        log_analysis = multi_run['aggregate']['log_analysis']
+        
+        multi_run_file = reports_path / f"multi_run_analysis_{timestamp}.json"
+        with open(multi_run_file, 'w') as f:
+            json.dump(multi_run, f, indent=2)
+        print(f"Multi-run analysis: {multi_run_file}")
+        
+        if args.store:
+            with ResultsStore(store_path) as store:
+                for run in multi_run['runs']:
+                    record_analysis(store, run['run_id'], run.get('app_analysis', {}),
+                                    run.get('log_analysis', {}))
+            print(f"Recorded {len(multi_run['runs'])} runs in {store.path}")
+    
+    elif app_logs:
         latest_app_logs = max(app_logs, key=os.path.getctime)
         print(f"Analyzing app logs: {latest_app_logs}")
         app_analysis = analyzer.analyze_app_logs(str(latest_app_logs))
@@ -412,30 +1018,51 @@ def main():
         print(f"Analyzing test results: {latest_test_results}")
         test_analysis = analyzer.analyze_test_results(str(latest_test_results))
     
-    if test_logs:
+    if test_logs and not args.all_runs:
         latest_test_log = max(test_logs, key=os.path.getctime)
         print(f"Analyzing test log: {latest_test_log}")
         log_analysis = analyzer.analyze_test_log(str(latest_test_log))
     
+    if not args.all_runs and (app_logs or test_logs):
+        if app_logs:
+            run_key = TestResultAnalyzer.run_id('app_logs', latest_app_logs)
+        else:
+            run_key = TestResultAnalyzer.run_id('test_log', latest_test_log)
+        
+        # Earlier runs recorded with --store form the regression baseline
+        if app_analysis and store_path.exists():
+            with ResultsStore(store_path) as store:
+                baseline = store.recent_operation_sketches(args.baseline_runs, exclude_run_key=run_key)
+            regressions = analyzer.detect_regressions(app_analysis, baseline)
+            print(f"Compared against {len(baseline)} baseline runs: {len(regressions)} regressions")
+    
+    if args.store and not args.all_runs and (app_logs or test_logs):
+        with ResultsStore(store_path) as store:
+            record_analysis(store, run_key, app_analysis, log_analysis, test_analysis)
+        print(f"Recorded run {run_key} in {store.path}")
+    
     # Categorize issues
     analyzer.categorize_issues(app_analysis, test_analysis, log_analysis)
     
     # Generate reports
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     issue_report_file = reports_path / f"issue_report_{timestamp}.json"
     orchestrator_prompt_file = reports_path / f"orchestrator_prompt_{timestamp}.md"
     
     analyzer.generate_issue_report(str(issue_report_file))
-    analyzer.generate_orchestrator_prompt(str(orchestrator_prompt_file))
+    analyzer.generate_orchestrator_prompt(str(orchestrator_prompt_file), budget=prompt_budget)
     
     print(f"\nAnalysis complete!")
     print(f"Issue report: {issue_report_file}")
     print(f"Orchestrator prompt: {orchestrator_prompt_file}")
+    if analyzer.prompt_omitted:
+        omitted = ', '.join(f"{count} {noun}" for noun, count in analyzer.prompt_omitted.items())
+        print(f"  Left out of the prompt (see the issue report): {omitted}")
+    by_severity = analyzer.issues_by_severity()
     print(f"\nTotal issues found: {len(analyzer.issues)}")
-    print(f"  - Critical: {len([i for i in analyzer.issues if i.get('severity') == 'critical'])}")
-    print(f"  - High: {len([i for i in analyzer.issues if i.get('severity') == 'high'])}")
-    print(f"  - Medium: {len([i for i in analyzer.issues if i.get('severity') == 'medium'])}")
-    print(f"  - Low: {len([i for i in analyzer.issues if i.get('severity') == 'low'])}")
+    print(f"  - Critical: {len(by_severity['critical'])}")
+    print(f"  - High: {len(by_severity['high'])}")
+    print(f"  - Medium: {len(by_severity['medium'])}")
+    print(f"  - Low: {len(by_severity['low'])}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Failure attachment extraction for Craig-O-Clean test reports
+
+Pulls the attachments (screenshots and other files) of failed tests out of
+an xcresult bundle into a content-addressed directory. Passing tests are
+never looked at, so time and disk use scale with the number of failures.
+
+Files are stored as <sha256[:2]>/<sha256><ext>, so an attachment seen in
+an earlier run is not stored twice. New files are placed without copying
+data where the filesystem allows it: a hard link, then a reflink (copy on
+write clone), and only then a kernel-side copy (shutil.copyfile uses
+sendfile/fcopyfile).
+
+Usage:
+    python3 scripts/attachments.py <bundle>.xcresult <attachments-dir>
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from xcresult import XCResultBundle, XCResultError, XCTestRecord, reference_id
+
+
+# Linux FICLONE ioctl request (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# Extensions for attachments whose file name has none
+TYPE_EXTENSIONS = {
+    "public.png": ".png",
+    "public.jpeg": ".jpg",
+    "public.heic": ".heic",
+    "public.plain-text": ".txt",
+    "public.json": ".json",
+    "public.mpeg-4": ".mp4",
+}
+
+# Extensions of attachments that can be embedded as images in reports
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".heic"}
+
+
+def is_image(path: Union[str, Path]) -> bool:
+    """Whether an extracted attachment is an image (by its extension)."""
+    return Path(path).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def reflink(source: Path, destination: Path) -> bool:
+    """Clone source to destination sharing its data blocks, if supported."""
+    if sys.platform == "darwin":
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            return False
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "clonefile"):
+            return False
+        return libc.clonefile(os.fsencode(source), os.fsencode(destination), 0) == 0
+
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(destination)
+        except OSError:
+            pass
+        return False
+
+
+@dataclass
+class StoreStats:
+    """What AttachmentStore did with the files it was given."""
+    deduplicated: int = 0
+    moved: int = 0
+    linked: int = 0
+    reflinked: int = 0
+    copied: int = 0
+    bytes_stored: int = 0
+
+
+class AttachmentStore:
+    """Content-addressed directory of extracted attachments."""
+
+    HASH_BLOCK_SIZE = 1 << 20
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stats = StoreStats()
+
+    def add(self, source: Path, extension: str = "", move: bool = False) -> Path:
+        """Store a file and return its content-addressed path.
+
+        With move=True the source is a scratch file that may be renamed
+        into the store.
+        """
+        digest = self._hash(source)
+        destination = self.root / digest[:2] / f"{digest}{extension}"
+        if destination.exists():
+            self.stats.deduplicated += 1
+            if move:
+                os.unlink(source)
+            return destination
+
+        destination.parent.mkdir(exist_ok=True)
+        # Build the file under a temporary name so a partial copy is never
+        # mistaken for a stored attachment
+        tmp_path = destination.with_name(f".{destination.name}.tmp")
+        if move:
+            os.replace(source, tmp_path)
+            self.stats.moved += 1
+        else:
+            self._place(source, tmp_path)
+        os.replace(tmp_path, destination)
+        self.stats.bytes_stored += destination.stat().st_size
+        return destination
+
+    def _place(self, source: Path, destination: Path) -> None:
+        try:
+            os.unlink(destination)
+        except FileNotFoundError:
+            pass
+
+        try:
+            os.link(source, destination)
+            self.stats.linked += 1
+            return
+        except OSError:
+            pass
+
+        if reflink(source, destination):
+            self.stats.reflinked += 1
+            return
+
+        shutil.copyfile(source, destination)
+        self.stats.copied += 1
+
+    def _hash(self, path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(self.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+class AttachmentExtractor:
+    """Extracts the attachments of failed tests from one bundle."""
+
+    def __init__(self, bundle: XCResultBundle, store: AttachmentStore):
+        self.bundle = bundle
+        self.store = store
+
+    def extract_test(self, test: XCTestRecord) -> List[Path]:
+        """Store every attachment of one test and return the stored paths."""
+        paths = []
+        with tempfile.TemporaryDirectory(dir=self.store.root, prefix=".extract-") as scratch:
+            for attachment in self.bundle.attachments(test):
+                payload_id = reference_id(attachment.get("payloadRef"))
+                if not payload_id:
+                    continue
+                source, is_temporary = self.bundle.payload_path(payload_id, scratch)
+                paths.append(self.store.add(source, self._extension(attachment), move=is_temporary))
+        return paths
+
+    def extract_failures(self) -> Dict[Tuple[str, str], List[Path]]:
+        """Attachments of every failed test, keyed by (class name, test name).
+
+        A test whose attachments cannot be read is skipped rather than
+        failing the whole extraction.
+        """
+        extracted = {}
+        for test in self.bundle.iter_tests():
+            if not test.failed:
+                continue
+            try:
+                paths = self.extract_test(test)
+            except (OSError, XCResultError) as e:
+                print(f"Warning: could not extract attachments of {test.identifier}: {e}", file=sys.stderr)
+                continue
+            if paths:
+                extracted.setdefault((test.class_name, test.name), []).extend(paths)
+        return extracted
+
+    @staticmethod
+    def _extension(attachment: Dict[str, str]) -> str:
+        suffix = Path(attachment.get("filename") or "").suffix
+        return suffix or TYPE_EXTENSIONS.get(attachment.get("uniformTypeIdentifier", ""), "")
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: attachments.py <bundle.xcresult> <attachments-dir>")
+        return 1
+
+    store = AttachmentStore(sys.argv[2])
+    extracted = AttachmentExtractor(XCResultBundle.open(sys.argv[1]), store).extract_failures()
+    for (class_name, name), paths in sorted(extracted.items()):
+        print(f"{class_name}.{name}:")
+        for path in paths:
+            print(f"  {path}")
+
+    stats = store.stats
+    print(
+        f"\n{sum(len(paths) for paths in extracted.values())} attachments: "
+        f"{stats.linked} linked, {stats.reflinked} reflinked, {stats.moved} moved, "
+        f"{stats.copied} copied, {stats.deduplicated} already stored "
+        f"({stats.bytes_stored / 1e6:.1f} MB new)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,10 @@
 #   --report-only   Generate report from existing test results
 #   --clean         Clean build artifacts before testing
 #   --verbose       Enable verbose logging
+#   --shard I/N     Run only shard I of N of the UI tests (see shard_planner.py)
+#   --shard-plan DIR
+#                   Shard plan written once for all shards by shard_planner.py plan
+#                   (default: test-output/reports/shards)
 #   --help          Show this help message
 # =============================================================================
 
@@ -53,6 +57,9 @@ NC='\033[0m' # No Color
 RUN_MODE="full"
 CLEAN_BUILD=false
 VERBOSE=false
+SHARD_INDEX=""
+SHARD_COUNT=""
+SHARD_PLAN_DIR=""
 
 # =============================================================================
 # Helper Functions
@@ -123,12 +130,18 @@ Options:
   --report-only   Generate report from existing test results
   --clean         Clean build artifacts before testing
   --verbose       Enable verbose logging
+  --shard I/N     Run only shard I of N of the UI tests, balanced by
+                  historical test durations (see scripts/shard_planner.py)
+  --shard-plan DIR
+                  Directory of the shard plan, written once for all shards
+                  with shard_planner.py plan (default: <reports>/shards)
   --help          Show this help message
 
 Examples:
   $0                    # Run full test suite
   $0 --quick            # Run quick tests only
   $0 --clean --verbose  # Clean build and run with verbose output
+  $0 --shard 2/4 --shard-plan plan/  # Run the second of four UI test shards
 
 EOF
 }
@@ -159,6 +172,27 @@ while [[ $# -gt 0 ]]; do
             VERBOSE=true
             shift
             ;;
+        --shard)
+            if [[ ! "$2" =~ ^[0-9]+/[0-9]+$ ]]; then
+                print_error "--shard expects I/N, e.g. --shard 2/4"
+                exit 1
+            fi
+            SHARD_INDEX="${2%/*}"
+            SHARD_COUNT="${2#*/}"
+            if [[ $SHARD_INDEX -lt 1 || $SHARD_INDEX -gt $SHARD_COUNT ]]; then
+                print_error "Shard index must be between 1 and ${SHARD_COUNT}"
+                exit 1
+            fi
+            shift 2
+            ;;
+        --shard-plan)
+            if [[ -z "$2" ]]; then
+                print_error "--shard-plan expects a directory"
+                exit 1
+            fi
+            SHARD_PLAN_DIR="$2"
+            shift 2
+            ;;
         --help)
             show_help
             exit 0
@@ -288,6 +322,30 @@ run_unit_tests() {
     return $UNIT_TEST_RESULT
 }
 
+load_ui_test_shard() {
+    SHARD_DIR="${SHARD_PLAN_DIR:-${REPORTS_DIR}/shards}"
+    SHARD_ARGS_FILE="${SHARD_DIR}/shard-${SHARD_INDEX}-of-${SHARD_COUNT}.args"
+
+    # Every shard must use the same plan: the last shard runs whatever the
+    # others' lists leave out, so plans built from different histories
+    # would run tests twice or drop them. The plan is written once, before
+    # the shards start, with shard_planner.py plan.
+    if [[ ! -f "${SHARD_ARGS_FILE}" ]]; then
+        print_error "No shard plan at ${SHARD_ARGS_FILE}"
+        print_error "Write it once for all shards first: python3 scripts/shard_planner.py plan --shards ${SHARD_COUNT} --store <results.db> --output ${SHARD_DIR}"
+        log "ERROR" "UI test shard plan missing: ${SHARD_ARGS_FILE}"
+        exit 1
+    fi
+
+    UI_TEST_SELECTION=()
+    while IFS= read -r line; do
+        if [[ -n "$line" ]]; then
+            UI_TEST_SELECTION+=("$line")
+        fi
+    done < "${SHARD_ARGS_FILE}"
+    log "INFO" "UI test shard ${SHARD_INDEX}/${SHARD_COUNT}: ${#UI_TEST_SELECTION[@]} selection arguments"
+}
+
 run_ui_tests() {
     print_header "Running UI/E2E Tests"
 
@@ -298,6 +356,17 @@ run_ui_tests() {
 
     mkdir -p "${UI_TEST_RESULT_PATH}"
 
+    UI_TEST_SELECTION=(-only-testing:"CraigOCleanUITests")
+    if [[ -n "${SHARD_COUNT}" ]]; then
+        load_ui_test_shard
+        if [[ ${#UI_TEST_SELECTION[@]} -eq 0 ]]; then
+            # More shards than tests with history: nothing assigned here
+            print_info "UI test shard ${SHARD_INDEX}/${SHARD_COUNT} has no tests assigned, skipping"
+            return 0
+        fi
+    fi
+    local ui_test_start=$SECONDS
+
     # Run UI tests with screenshot capture
     xcodebuild test \
         -project "${XCODEPROJ_PATH}" \
@@ -305,7 +374,7 @@ run_ui_tests() {
         -configuration Debug \
         -derivedDataPath "${OUTPUT_DIR}/DerivedData" \
         -resultBundlePath "${UI_TEST_RESULT_PATH}/ui-tests.xcresult" \
-        -only-testing:"CraigOCleanUITests" \
+        "${UI_TEST_SELECTION[@]}" \
         CODE_SIGN_IDENTITY="-" \
         CODE_SIGNING_REQUIRED=NO \
         CAPTURE_SCREENSHOTS=true \
@@ -314,6 +383,14 @@ run_ui_tests() {
 
     UI_TEST_RESULT=${PIPESTATUS[0]}
 
+    if [[ -n "${SHARD_COUNT}" ]]; then
+        python3 "${PROJECT_DIR}/scripts/shard_planner.py" record \
+            --plan-dir "${SHARD_DIR}" \
+            --shard "${SHARD_INDEX}/${SHARD_COUNT}" \
+            --log "${UI_TEST_LOG}" \
+            --wall-clock $((SECONDS - ui_test_start)) || true
+    fi
+
     if [[ $UI_TEST_RESULT -eq 0 ]]; then
         print_success "UI tests passed"
         log "INFO" "UI tests passed"
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the log parsing hot loop shared by the test tools
+
+Generates a synthetic xcodebuild log, then parses it into events
+(log_events.py) with the legacy "try every regex on every line" loop and
+with the current prefix-dispatch loop, reporting lines/second for each and
+checking both produce identical events. The parse cache is bypassed.
+
+With --memory it also measures the memory needed to hold one million
+parsed test cases as a list of TestCase objects and as a TestCaseStore.
+
+Usage:
+    python3 scripts/benchmark_log_parser.py [--lines 1000000] [--repeat 3] [--memory]
+"""
+
+import argparse
+import importlib.util
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import log_events
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+
+def load_report_module():
+    """Import generate-test-report.py (its file name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location(
+        "generate_test_report", SCRIPT_DIR / "generate-test-report.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+report = load_report_module()
+
+
+class LegacyLogEventParser(log_events.LogEventParser):
+    """Reference parser that runs every pattern against every line."""
+
+    def _parse_line(self, line: str, state) -> None:
+        events = self.events
+        mentions = state.mentions
+        mentions.add_failures(self.FAILURE_MENTION.findall(line))
+        mentions.add_errors(self.ERROR_MENTION.findall(line))
+        mentions.test_count += len(self.TEST_CASE_MENTION.findall(line))
+
+        start_match = self.TEST_CASE_START.match(line)
+        if start_match:
+            state.current_test_class = start_match.group(1)
+            state.current_test_name = start_match.group(2)
+            return
+
+        passed_match = self.TEST_CASE_PASSED.match(line)
+        if passed_match:
+            events.append((log_events.TEST_PASSED, passed_match.group(1), passed_match.group(2),
+                           float(passed_match.group(3))))
+            return
+
+        failed_match = self.TEST_CASE_FAILED.match(line)
+        if failed_match:
+            events.append((log_events.TEST_FAILED, failed_match.group(1), failed_match.group(2),
+                           float(failed_match.group(3)), self._find_error_context(state.recent_lines)))
+            return
+
+        error_match = self.ERROR_LINE.match(line)
+        if error_match:
+            events.append((log_events.ERROR, error_match.group(1), int(error_match.group(2)), error_match.group(3)))
+            return
+
+        warning_match = self.WARNING_LINE.match(line)
+        if warning_match:
+            events.append((log_events.WARNING, warning_match.group(1), int(warning_match.group(2)),
+                           warning_match.group(3)))
+
+
+NOISE_LINES = [
+    "CompileSwift normal arm64 /Users/ci/Craig-O-Clean/Craig-O-Clean/Core/ProcessManager.swift",
+    "    cd /Users/ci/Craig-O-Clean",
+    "    t =     1.23s Tap \"Dashboard\" Button",
+    "    t =     1.45s     Wait for com.craigoclean.app to idle",
+    "    t =     2.01s Checking existence of `\"Memory Usage\" StaticText`",
+    "Ld /Users/ci/DerivedData/Build/Products/Debug/Craig-O-Clean.app/Contents/MacOS/Craig-O-Clean normal",
+    "2025-01-01 12:00:00.000 xctest[1234:5678] Running tests...",
+]
+
+CLASS_NAMES = ["AutomatedE2ETests", "MemoryOptimizerServiceTests", "ProcessManagerTests"]
+
+
+def write_synthetic_log(path: Path, line_count: int, seed: int = 42) -> None:
+    """Write a synthetic xcodebuild log of roughly line_count lines."""
+    rng = random.Random(seed)
+    written = 0
+
+    with open(path, "w") as f:
+        while written < line_count:
+            class_name = rng.choice(CLASS_NAMES)
+            test_name = f"test_{rng.randint(0, 500)}"
+            f.write(f"Test Case '-[{class_name} {test_name}]' started.\n")
+            written += 1
+
+            for _ in range(rng.randint(10, 40)):
+                roll = rng.random()
+                if roll < 0.01:
+                    f.write(f"/Users/ci/Craig-O-Clean/Core/Service.swift:{rng.randint(1, 900)}: error: cannot find 'Foo' in scope\n")
+                elif roll < 0.02:
+                    f.write(f"/Users/ci/Craig-O-Clean/Core/Service.swift:{rng.randint(1, 900)}: warning: variable 'x' was never used\n")
+                else:
+                    f.write(rng.choice(NOISE_LINES) + "\n")
+                written += 1
+
+            status = "failed" if rng.random() < 0.1 else "passed"
+            f.write(f"Test Case '-[{class_name} {test_name}]' {status} ({rng.random() * 5:.3f} seconds).\n")
+            written += 1
+
+
+def time_parser(parser_class, log_path: Path, repeat: int):
+    """Return (best elapsed seconds, (events, mentions)) over repeat uncached parses."""
+    best = None
+    parsed = None
+    for _ in range(repeat):
+        cache = log_events.LogEventCache(parser_class)
+        start = time.perf_counter()
+        parsed = cache.parse(log_path, use_cache=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, (parsed.events, parsed.mentions)
+
+
+def measure_test_case_memory(count: int = 1_000_000, seed: int = 42) -> None:
+    """Print memory per million test cases for a list and for TestCaseStore."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        failed = rng.random() < 0.1
+        rows.append((
+            f"test_{rng.randint(0, 2000)}",
+            rng.choice(CLASS_NAMES),
+            report.TestStatus.FAILED if failed else report.TestStatus.PASSED,
+            rng.random() * 5,
+            "XCTAssertTrue failed" if failed else None,
+        ))
+
+    def build_list():
+        # Parsed names are distinct string objects, as they are when sliced
+        # out of log lines
+        return [
+            report.TestCase(name="".join(name), class_name="".join(class_name), status=status,
+                            duration=duration, error_message=error)
+            for name, class_name, status, duration, error in rows
+        ]
+
+    def build_store():
+        store = report.TestCaseStore()
+        for name, class_name, status, duration, error in rows:
+            store.add("".join(name), "".join(class_name), status, duration, error)
+        return store
+
+    print(f"Memory for {count:,} test cases:")
+    for label, build in (("list of TestCase", build_list), ("TestCaseStore", build_store)):
+        tracemalloc.start()
+        container = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        per_million = current * 1_000_000 / count
+        print(f"  {label:<18} {per_million / 1e6:>8.1f} MB per million ({current / count:.1f} B/test)")
+        del container
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the log parsing hot loop")
+    arg_parser.add_argument("--lines", type=int, default=1_000_000, help="Synthetic log size in lines")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per parser (best is reported)")
+    arg_parser.add_argument("--memory", action="store_true", help="Also measure test case storage memory")
+    args = arg_parser.parse_args()
+
+    if args.memory:
+        measure_test_case_memory()
+        print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = Path(tmp) / "synthetic.log"
+        write_synthetic_log(log_path, args.lines)
+        with open(log_path) as f:
+            line_count = sum(1 for _ in f)
+
+        print(f"Synthetic log: {line_count:,} lines, {log_path.stat().st_size / 1e6:.1f} MB")
+
+        legacy_time, legacy = time_parser(LegacyLogEventParser, log_path, args.repeat)
+        current_time, current = time_parser(log_events.LogEventParser, log_path, args.repeat)
+
+    print(f"  legacy (all regexes):  {line_count / legacy_time:>12,.0f} lines/s  ({legacy_time:.2f}s)")
+    print(f"  prefix dispatch:       {line_count / current_time:>12,.0f} lines/s  ({current_time:.2f}s)")
+    print(f"  speedup:               {legacy_time / current_time:.2f}x")
+
+    if legacy != current:
+        print("❌ Parsers produced different results")
+        return 1
+
+    print("✅ Results identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark for pbxplist.py, the project.pbxproj reader/writer
+
+Runs against Craig-O-Clean.xcodeproj and a synthetic project with about
+50,000 objects. For each it reports parse time, checks that a full
+re-render round-trips byte-for-byte, and compares the library with the
+approaches it replaced:
+
+- listing Swift files: splitting lines on "path = " (the old
+  TerminatorEdition sync script) vs the PBXFileReference index
+- adding files: regex sections plus whole-file str.replace (the old
+  add_files_to_xcode.py) vs XcodeProject.add_file and save
+
+Usage:
+    python3 scripts/benchmark_pbxplist.py [--objects 50000] [--add 100] [--repeat 3]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+from pbxplist import XcodeProject
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_PROJECT = SCRIPT_DIR.parent / "Craig-O-Clean.xcodeproj" / "project.pbxproj"
+
+
+def legacy_swift_paths(content: str) -> set:
+    """Swift paths found by scanning lines for "path = "."""
+    paths = set()
+    for line in content.split("\n"):
+        if ".swift" in line and "path = " in line:
+            path = line.split("path = ")[1].split(";")[0].strip().strip('"')
+            if path.endswith(".swift"):
+                paths.add(path)
+    return paths
+
+
+def legacy_add_files(content: str, file_names, ids) -> str:
+    """Insert files with section regexes and whole-file replaces."""
+    build_section = re.search(
+        r"(/\* Begin PBXBuildFile section \*/\n)(.*?)(/\* End PBXBuildFile section \*/)", content, re.DOTALL
+    )
+    ref_section = re.search(
+        r"(/\* Begin PBXFileReference section \*/\n)(.*?)(/\* End PBXFileReference section \*/)", content, re.DOTALL
+    )
+    sources = re.search(r"(/\* Sources \*/ = \{[^}]*?files = \()(.*?)(\);)", content, re.DOTALL)
+    build_entries = "".join(
+        f"\t\t{ids[name][1]} /* {name} in Sources */ = {{isa = PBXBuildFile; fileRef = {ids[name][0]} /* {name} */; }};\n"
+        for name in file_names
+    )
+    ref_entries = "".join(
+        f"\t\t{ids[name][0]} /* {name} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; "
+        f"path = {name}; sourceTree = \"<group>\"; }};\n"
+        for name in file_names
+    )
+    source_refs = "".join(f"\t\t\t\t{ids[name][1]} /* {name} in Sources */,\n" for name in file_names)
+    content = content.replace(
+        build_section.group(0), build_section.group(1) + build_entries + build_section.group(2) + build_section.group(3)
+    )
+    content = content.replace(
+        ref_section.group(0), ref_section.group(1) + ref_entries + ref_section.group(2) + ref_section.group(3)
+    )
+    return content.replace(sources.group(0), sources.group(1) + source_refs + sources.group(2) + sources.group(3))
+
+
+def synthetic_project(object_count: int) -> str:
+    """Xcode-formatted project text with about object_count objects."""
+    files = max((object_count - 10) * 100 // 201, 1)  # A file reference and a build file per file, a group per 100
+    groups = (files + 99) // 100
+    ident = iter(range(1, 1 << 40))
+
+    def new_id() -> str:
+        return f"{next(ident):024X}"
+
+    file_ids = [(new_id(), new_id()) for _ in range(files)]
+    group_ids = [new_id() for _ in range(groups)]
+    main_group, products_group, app_ref, target_id, phase_id, project_id = (new_id() for _ in range(6))
+    project_list, target_list, debug_config, target_config = (new_id() for _ in range(4))
+
+    out = ["// !$*UTF8*$!\n{\n\tarchiveVersion = 1;\n\tclasses = {\n\t};\n\tobjectVersion = 56;\n\tobjects = {\n"]
+    out.append("\n/* Begin PBXBuildFile section */\n")
+    for index, (ref_id, build_id) in enumerate(file_ids):
+        out.append(f"\t\t{build_id} /* File{index}.swift in Sources */ = {{isa = PBXBuildFile; "
+                   f"fileRef = {ref_id} /* File{index}.swift */; }};\n")
+    out.append("/* End PBXBuildFile section */\n\n/* Begin PBXFileReference section */\n")
+    out.append(f"\t\t{app_ref} /* Synthetic.app */ = {{isa = PBXFileReference; explicitFileType = wrapper.application; "
+               f"includeInIndex = 0; path = Synthetic.app; sourceTree = BUILT_PRODUCTS_DIR; }};\n")
+    for index, (ref_id, _) in enumerate(file_ids):
+        out.append(f"\t\t{ref_id} /* File{index}.swift */ = {{isa = PBXFileReference; "
+                   f"lastKnownFileType = sourcecode.swift; path = File{index}.swift; sourceTree = \"<group>\"; }};\n")
+    out.append("/* End PBXFileReference section */\n\n/* Begin PBXGroup section */\n")
+    out.append(f"\t\t{main_group} = {{\n\t\t\tisa = PBXGroup;\n\t\t\tchildren = (\n")
+    out.extend(f"\t\t\t\t{group_id} /* Module{index} */,\n" for index, group_id in enumerate(group_ids))
+    out.append(f"\t\t\t\t{products_group} /* Products */,\n\t\t\t);\n\t\t\tsourceTree = \"<group>\";\n\t\t}};\n")
+    for index, group_id in enumerate(group_ids):
+        out.append(f"\t\t{group_id} /* Module{index} */ = {{\n\t\t\tisa = PBXGroup;\n\t\t\tchildren = (\n")
+        for file_index in range(index * 100, min((index + 1) * 100, files)):
+            out.append(f"\t\t\t\t{file_ids[file_index][0]} /* File{file_index}.swift */,\n")
+        out.append(f"\t\t\t);\n\t\t\tpath = Module{index};\n\t\t\tsourceTree = \"<group>\";\n\t\t}};\n")
+    out.append(f"\t\t{products_group} /* Products */ = {{\n\t\t\tisa = PBXGroup;\n\t\t\tchildren = (\n"
+               f"\t\t\t\t{app_ref} /* Synthetic.app */,\n\t\t\t);\n\t\t\tname = Products;\n"
+               f"\t\t\tsourceTree = \"<group>\";\n\t\t}};\n")
+    out.append("/* End PBXGroup section */\n\n/* Begin PBXNativeTarget section */\n")
+    out.append(f"\t\t{target_id} /* Synthetic */ = {{\n\t\t\tisa = PBXNativeTarget;\n"
+               f"\t\t\tbuildConfigurationList = {target_list} /* Build configuration list for PBXNativeTarget \"Synthetic\" */;\n"
+               f"\t\t\tbuildPhases = (\n\t\t\t\t{phase_id} /* Sources */,\n\t\t\t);\n\t\t\tbuildRules = (\n\t\t\t);\n"
+               f"\t\t\tdependencies = (\n\t\t\t);\n\t\t\tname = Synthetic;\n\t\t\tproductName = Synthetic;\n"
+               f"\t\t\tproductReference = {app_ref} /* Synthetic.app */;\n"
+               f"\t\t\tproductType = \"com.apple.product-type.application\";\n\t\t}};\n")
+    out.append("/* End PBXNativeTarget section */\n\n/* Begin PBXProject section */\n")
+    out.append(f"\t\t{project_id} /* Project object */ = {{\n\t\t\tisa = PBXProject;\n"
+               f"\t\t\tbuildConfigurationList = {project_list} /* Build configuration list for PBXProject \"Synthetic\" */;\n"
+               f"\t\t\tcompatibilityVersion = \"Xcode 14.0\";\n\t\t\tmainGroup = {main_group};\n"
+               f"\t\t\tproductRefGroup = {products_group} /* Products */;\n\t\t\tprojectDirPath = \"\";\n"
+               f"\t\t\tprojectRoot = \"\";\n\t\t\ttargets = (\n\t\t\t\t{target_id} /* Synthetic */,\n\t\t\t);\n\t\t}};\n")
+    out.append("/* End PBXProject section */\n\n/* Begin PBXSourcesBuildPhase section */\n")
+    out.append(f"\t\t{phase_id} /* Sources */ = {{\n\t\t\tisa = PBXSourcesBuildPhase;\n"
+               f"\t\t\tbuildActionMask = 2147483647;\n\t\t\tfiles = (\n")
+    out.extend(f"\t\t\t\t{build_id} /* File{index}.swift in Sources */,\n" for index, (_, build_id) in enumerate(file_ids))
+    out.append("\t\t\t);\n\t\t\trunOnlyForDeploymentPostprocessing = 0;\n\t\t};\n")
+    out.append("/* End PBXSourcesBuildPhase section */\n\n/* Begin XCBuildConfiguration section */\n")
+    for config_id in (debug_config, target_config):
+        out.append(f"\t\t{config_id} /* Debug */ = {{\n\t\t\tisa = XCBuildConfiguration;\n\t\t\tbuildSettings = {{\n"
+                   f"\t\t\t\tPRODUCT_NAME = \"$(TARGET_NAME)\";\n\t\t\t\tSWIFT_VERSION = 5.0;\n\t\t\t}};\n"
+                   f"\t\t\tname = Debug;\n\t\t}};\n")
+    out.append("/* End XCBuildConfiguration section */\n\n/* Begin XCConfigurationList section */\n")
+    for list_id, config_id, owner in ((project_list, debug_config, "PBXProject"),
+                                      (target_list, target_config, "PBXNativeTarget")):
+        out.append(f"\t\t{list_id} /* Build configuration list for {owner} \"Synthetic\" */ = {{\n"
+                   f"\t\t\tisa = XCConfigurationList;\n\t\t\tbuildConfigurations = (\n"
+                   f"\t\t\t\t{config_id} /* Debug */,\n\t\t\t);\n\t\t\tdefaultConfigurationIsVisible = 0;\n"
+                   f"\t\t\tdefaultConfigurationName = Debug;\n\t\t}};\n")
+    out.append("/* End XCConfigurationList section */\n")
+    out.append(f"\t}};\n\trootObject = {project_id} /* Project object */;\n}}\n")
+    return "".join(out)
+
+
+def best_of(repeat: int, func):
+    """(best elapsed seconds, result of the last call)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark(label: str, text: str, add_count: int, repeat: int) -> bool:
+    parse_time, project = best_of(repeat, lambda: XcodeProject(text))
+    print(f"{label}: {len(text) / 1e3:,.0f} KB, {len(project.objects):,} objects")
+    print(f"  parse + index:          {parse_time * 1000:>9.1f} ms  ({len(text) / parse_time / 1e6:.1f} MB/s)")
+
+    render_time, rendered = best_of(repeat, lambda: project.to_text(full=True))
+    identical = rendered == text
+    print(f"  full re-render:         {render_time * 1000:>9.1f} ms  "
+          f"({'byte-for-byte identical' if identical else 'DIFFERENT'})")
+
+    legacy_time, legacy_paths = best_of(repeat, lambda: legacy_swift_paths(text))
+    index_time, paths = best_of(repeat, lambda: {obj["path"] for _, obj in project.file_references(".swift")})
+    print(f"  list Swift files:       {legacy_time * 1000:>9.1f} ms line scan, {index_time * 1000:.1f} ms index "
+          f"({len(paths):,} files)")
+
+    names = [f"Added{index}.swift" for index in range(add_count)]
+    ids = {name: (project.generate_id(), project.generate_id()) for name in names}
+    legacy_time, _ = best_of(repeat, lambda: legacy_add_files(text, names, ids))
+
+    def add_with_library():
+        edited = XcodeProject(text)
+        target = edited.targets()[0]
+        group = edited.find_group("Core") or edited.main_group
+        for name in names:
+            edited.add_file(name, group, [target])
+        return edited.to_text()
+
+    library_time, edited_text = best_of(repeat, add_with_library)
+    print(f"  add {add_count} files and save:  {legacy_time * 1000:>9.1f} ms regex/replace, "
+          f"{library_time * 1000:.1f} ms pbxplist (parse included)")
+    reparsed = XcodeProject(edited_text)
+    return identical and len(reparsed.objects) == len(project.objects) + 2 * add_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the project.pbxproj reader/writer")
+    parser.add_argument("--project", type=Path, default=DEFAULT_PROJECT, help="Real project to benchmark")
+    parser.add_argument("--objects", type=int, default=50_000, help="Objects in the synthetic project")
+    parser.add_argument("--add", type=int, default=100, help="Files added in the edit benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    ok = True
+    if args.project.exists():
+        ok &= benchmark(args.project.parent.name, args.project.read_text(encoding="utf-8"), args.add, args.repeat)
+        print()
+    ok &= benchmark("synthetic project", synthetic_project(args.objects), args.add, args.repeat)
+
+    if not ok:
+        print("❌ Round trip or edit check failed")
+        return 1
+    print("✅ Round trips identical, edits re-parse")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,6 +47,13 @@ run_test_cycle() {
     # Analyze results
     log_info "Analyzing test results..."
     python3 "$SCRIPT_DIR/analyze_test_results.py" "$REPORTS_DIR"
+
+    # Regenerate reports, only parsing log output appended since the last cycle
+    log_info "Generating test reports..."
+    python3 "$SCRIPT_DIR/generate-test-report.py" \
+        --input "$REPORTS_DIR" \
+        --output "$REPORTS_DIR/reports" \
+        --incremental || true
     
     if [ $TEST_EXIT_CODE -eq 0 ]; then
         log_success "All tests passed in cycle #$iteration"
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test duration analytics for Craig-O-Clean test reports
+
+Summarizes where test wall-clock time goes: exact percentiles per test
+class and per test, the slowest tests by total time, and (given a
+results store) how each slow test's duration has trended over past runs.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from results_store import ResultsStore
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """q-quantile (0..1) of ascending values, linearly interpolated."""
+    if not sorted_values:
+        return 0.0
+    position = q * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def iter_timings(test_cases: Iterable[Any]) -> Iterable[Tuple[str, str, float]]:
+    """(class_name, name, duration) of each test case.
+
+    Uses TestCaseStore.iter_timings() when available so no TestCase
+    objects are built.
+    """
+    fast_path = getattr(test_cases, "iter_timings", None)
+    if fast_path is not None:
+        return fast_path()
+    return ((test_case.class_name, test_case.name, test_case.duration) for test_case in test_cases)
+
+
+@dataclass
+class DurationStats:
+    """Distribution of a group of test durations, in seconds."""
+    count: int
+    total: float
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+    @classmethod
+    def from_values(cls, values: List[float]) -> "DurationStats":
+        values = sorted(values)
+        total = sum(values)
+        return cls(
+            count=len(values),
+            total=total,
+            mean=total / len(values) if values else 0.0,
+            p50=percentile(values, 0.50),
+            p90=percentile(values, 0.90),
+            p99=percentile(values, 0.99),
+            max=values[-1] if values else 0.0,
+        )
+
+
+@dataclass
+class DurationTrend:
+    """Duration of one test over its recent runs (oldest first)."""
+    runs: int
+    first_mean: float
+    last_mean: float
+    slope: float  # Seconds per run, least squares
+    change: float  # Newer half mean / older half mean
+
+    @classmethod
+    def from_series(cls, series: List[float]) -> Optional["DurationTrend"]:
+        if len(series) < 2:
+            return None
+        n = len(series)
+        half = n // 2
+        older = sum(series[:half]) / half
+        newer = sum(series[half:]) / (n - half)
+        x_mean = (n - 1) / 2
+        y_mean = sum(series) / n
+        covariance = sum((x - x_mean) * (y - y_mean) for x, y in enumerate(series))
+        variance = sum((x - x_mean) ** 2 for x in range(n))
+        return cls(
+            runs=n,
+            first_mean=series[0],
+            last_mean=series[-1],
+            slope=covariance / variance,
+            change=newer / older if older > 0 else 0.0,
+        )
+
+
+class DurationProfile:
+    """Per-class and per-test duration statistics for one report."""
+
+    DEFAULT_TOP_N = 10
+
+    def __init__(self, top_n: int = DEFAULT_TOP_N):
+        self.top_n = top_n
+        self.total_duration = 0.0
+        self.test_count = 0
+        self.class_stats: Dict[str, DurationStats] = {}
+        self.test_stats: Dict[Tuple[str, str], DurationStats] = {}
+        self.trends: Dict[Tuple[str, str], DurationTrend] = {}
+
+    @classmethod
+    def build(cls, test_cases: Iterable[Any], top_n: int = DEFAULT_TOP_N) -> "DurationProfile":
+        """Profile a sequence of TestCase objects (or a TestCaseStore)."""
+        profile = cls(top_n)
+        by_class: Dict[str, List[float]] = {}
+        by_test: Dict[Tuple[str, str], List[float]] = {}
+        for class_name, name, duration in iter_timings(test_cases):
+            by_class.setdefault(class_name, []).append(duration)
+            by_test.setdefault((class_name, name), []).append(duration)
+
+        profile.class_stats = {
+            class_name: DurationStats.from_values(values) for class_name, values in sorted(by_class.items())
+        }
+        profile.test_stats = {key: DurationStats.from_values(values) for key, values in by_test.items()}
+        profile.total_duration = sum(stats.total for stats in profile.class_stats.values())
+        profile.test_count = sum(stats.count for stats in profile.class_stats.values())
+        return profile
+
+    def slowest_tests(self) -> List[Tuple[Tuple[str, str], DurationStats]]:
+        """The top_n tests by total time spent, slowest first."""
+        ranked = sorted(self.test_stats.items(), key=lambda item: (-item[1].total, item[0]))
+        return ranked[:self.top_n]
+
+    def add_trends(self, store: ResultsStore, new_runs: Iterable[Iterable[Any]] = (), last_n: int = 20) -> None:
+        """Attach duration trends of the slowest tests from stored runs.
+
+        Each trend covers the test's mean duration per stored run followed
+        by its mean in each of new_runs, the test cases of the logs that are
+        not stored yet. Logs already stored are only counted once, as the
+        stored runs they are.
+        """
+        slowest = self.slowest_tests()
+        keys = {key for key, _ in slowest}
+        new_means: Dict[Tuple[str, str], List[float]] = {}
+        for test_cases in new_runs:
+            per_test: Dict[Tuple[str, str], List[float]] = {}
+            for class_name, name, duration in iter_timings(test_cases):
+                if (class_name, name) in keys:
+                    per_test.setdefault((class_name, name), []).append(duration)
+            for key, values in per_test.items():
+                new_means.setdefault(key, []).append(sum(values) / len(values))
+
+        for key, _ in slowest:
+            per_run: Dict[int, List[float]] = {}
+            for row in store.test_history(key[0], key[1], last_n):
+                per_run.setdefault(row["run_id"], []).append(row["duration"])
+            series = [sum(values) / len(values) for _, values in sorted(per_run.items())]
+            trend = DurationTrend.from_series(series + new_means.get(key, []))
+            if trend:
+                self.trends[key] = trend
+
+    def to_dict(self) -> Dict[str, Any]:
+        slowest = []
+        for (class_name, name), stats in self.slowest_tests():
+            entry = {"class_name": class_name, "name": name, **asdict(stats)}
+            trend = self.trends.get((class_name, name))
+            entry["trend"] = asdict(trend) if trend else None
+            slowest.append(entry)
+        return {
+            "total_duration": self.total_duration,
+            "test_count": self.test_count,
+            "slowest_tests": slowest,
+            "classes": {class_name: asdict(stats) for class_name, stats in self.class_stats.items()},
+        }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Flaky test detection for Craig-O-Clean test reports
+
+Tracks the pass/fail sequence of every test over recent stored runs and
+scores how often it flips between passing and failing. A test that keeps
+failing is broken, not flaky; a test that alternates is flaky, and its
+failures should not be re-investigated as new issues on every run.
+
+Each test's history is an integer bitset (bit i set = execution i
+failed), so a flip count over the whole history is one XOR, shift and
+popcount, and recent flips are weighted more than old ones.
+
+Usage:
+    python3 scripts/flaky_detector.py test-reports/results.db
+    python3 scripts/flaky_detector.py test-reports/results.db --last 100 --threshold 0.2
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from results_store import ResultsStore
+
+TestKey = Tuple[str, str]
+
+# Statuses counted as a failed execution; anything else that is not
+# skipped counts as a pass
+FAILING_STATUSES = frozenset({"failed", "error"})
+SKIPPED_STATUS = "skipped"
+
+
+def popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+class StatusHistory:
+    """Pass/fail sequence of one test, oldest execution in bit 0."""
+
+    __slots__ = ("failures", "length")
+
+    def __init__(self):
+        self.failures = 0
+        self.length = 0
+
+    def append(self, failed: bool) -> None:
+        if failed:
+            self.failures |= 1 << self.length
+        self.length += 1
+
+    def copy(self) -> "StatusHistory":
+        history = StatusHistory()
+        history.failures = self.failures
+        history.length = self.length
+        return history
+
+    @property
+    def failure_count(self) -> int:
+        return popcount(self.failures)
+
+    def flip_mask(self) -> int:
+        """Bit j set when execution j+1 has a different outcome than execution j."""
+        if self.length < 2:
+            return 0
+        return (self.failures ^ (self.failures >> 1)) & ((1 << (self.length - 1)) - 1)
+
+
+@dataclass
+class Flakiness:
+    """Flakiness of one test over its recorded executions."""
+    class_name: str
+    name: str
+    runs: int
+    failures: int
+    flips: int
+    flip_rate: float  # Flips per consecutive pair of executions
+    score: float  # Flip rate with recent flips weighted more
+    flaky: bool
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.runs if self.runs else 0.0
+
+
+class FlakyTestDetector:
+    """Scores tests by how often their outcome flips between executions.
+
+    The score is the flip rate with each flip weighted by decay ** age
+    (age in executions), so a test that stopped flipping decays out of
+    the flaky list. A test is flaky when it has at least min_runs
+    executions, at least min_flips flips and a score of threshold or more.
+    """
+
+    DEFAULT_LAST_N = 50
+
+    def __init__(self, threshold: float = 0.1, min_runs: int = 5, min_flips: int = 2, decay: float = 0.9):
+        self.threshold = threshold
+        self.min_runs = min_runs
+        self.min_flips = min_flips
+        self.decay = decay
+        self.histories: Dict[TestKey, StatusHistory] = {}
+        self._scores: Dict[TestKey, Flakiness] = {}
+
+    def add(self, class_name: str, name: str, status: str) -> None:
+        """Record one execution; skipped executions are ignored."""
+        if status == SKIPPED_STATUS:
+            return
+        history = self.histories.get((class_name, name))
+        if history is None:
+            history = self.histories[(class_name, name)] = StatusHistory()
+        history.append(status in FAILING_STATUSES)
+        self._scores.pop((class_name, name), None)
+
+    def add_run(self, executions: Iterable[Tuple[str, str, str]]) -> None:
+        """Record (class_name, name, status) executions of one run, in order."""
+        for class_name, name, status in executions:
+            self.add(class_name, name, status)
+
+    def copy(self) -> "FlakyTestDetector":
+        """An independent detector with the same settings and histories."""
+        detector = FlakyTestDetector(self.threshold, self.min_runs, self.min_flips, self.decay)
+        detector.histories = {key: history.copy() for key, history in self.histories.items()}
+        return detector
+
+    def load(self, store: ResultsStore, last_n: int = DEFAULT_LAST_N) -> None:
+        """Record the executions of the last_n stored test log runs."""
+        for row in store.recent_test_statuses(last_n):
+            self.add(row["class_name"], row["name"], row["status"])
+
+    def flakiness(self, class_name: str, name: str) -> Optional[Flakiness]:
+        key = (class_name, name)
+        result = self._scores.get(key)
+        if result is None:
+            history = self.histories.get(key)
+            if history is None:
+                return None
+            result = self._scores[key] = self._score(key, history)
+        return result
+
+    def is_flaky(self, class_name: str, name: str) -> bool:
+        result = self.flakiness(class_name, name)
+        return result is not None and result.flaky
+
+    def flaky_tests(self) -> List[Flakiness]:
+        """Every flaky test, highest score first."""
+        results = (self.flakiness(*key) for key in self.histories)
+        return sorted((result for result in results if result.flaky), key=lambda result: (-result.score, result.name))
+
+    def _score(self, key: TestKey, history: StatusHistory) -> Flakiness:
+        flips = history.flip_mask()
+        pairs = history.length - 1
+        flip_count = popcount(flips)
+
+        score = 0.0
+        if flip_count:
+            # Bit j is the flip into execution j+1, which is pairs-1-j executions old
+            weighted = 0.0
+            total_weight = 0.0
+            weight = 1.0
+            for j in range(pairs - 1, -1, -1):
+                if flips >> j & 1:
+                    weighted += weight
+                total_weight += weight
+                weight *= self.decay
+            score = weighted / total_weight
+
+        return Flakiness(
+            class_name=key[0],
+            name=key[1],
+            runs=history.length,
+            failures=history.failure_count,
+            flips=flip_count,
+            flip_rate=flip_count / pairs if pairs > 0 else 0.0,
+            score=score,
+            flaky=(
+                history.length >= self.min_runs
+                and flip_count >= self.min_flips
+                and score >= self.threshold
+            ),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List flaky tests in the results store")
+    parser.add_argument("database", type=Path, help="Path to results.db")
+    parser.add_argument("--last", type=int, default=FlakyTestDetector.DEFAULT_LAST_N, help="Number of runs to use")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Minimum flakiness score")
+    args = parser.parse_args()
+
+    if not args.database.exists():
+        print(f"No results store at {args.database}")
+        return 1
+
+    detector = FlakyTestDetector(threshold=args.threshold)
+    with ResultsStore(args.database) as store:
+        detector.load(store, args.last)
+
+    flaky = detector.flaky_tests()
+    for result in flaky:
+        print(
+            f"{result.score:>5.2f}  {result.class_name}.{result.name}  "
+            f"{result.flips} flips, {result.failures}/{result.runs} failed"
+        )
+    if not flaky:
+        print(f"No flaky tests in {len(detector.histories)} tests")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
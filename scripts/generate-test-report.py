@@ -7,19 +7,53 @@ and generates comprehensive reports for analysis and agent orchestration.
 
 Usage:
     python3 generate-test-report.py --input <test-output-dir> --output <report-dir>
+
+    # Parse per-destination logs on 4 cores
+    python3 generate-test-report.py --input <test-output-dir> --output <report-dir> --jobs 4
+
+    # Only parse log output appended since the previous run
+    python3 generate-test-report.py --input <test-output-dir> --output <report-dir> --incremental
+
+    # Write the JSON report as one record per line for downstream tools
+    python3 generate-test-report.py --input <test-output-dir> --output <report-dir> --json-format ndjson
+
+    # Also record the run in <test-output-dir>/results.db for history queries
+    python3 generate-test-report.py --input <test-output-dir> --output <report-dir> --store
+
+    # Take failure screenshots from a specific bundle (default: *.xcresult under --input)
+    python3 generate-test-report.py --input <test-output-dir> --output <report-dir> --xcresult <bundle>.xcresult
+
+    # Keep running and regenerate the reports as the logs grow (Ctrl-C to stop)
+    python3 generate-test-report.py --input <test-output-dir> --output <report-dir> --watch
 """
 
 import argparse
+import hashlib
 import json
 import os
 import re
+import signal
 import sys
-from dataclasses import dataclass, field, asdict
+import time
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Tuple, Union
 from enum import Enum
 
+import log_events
+from attachments import AttachmentExtractor, AttachmentStore, is_image
+from duration_analytics import DurationProfile
+from flaky_detector import FlakyTestDetector
+from log_watcher import open_watcher
+from results_store import ResultsStore
+from xcresult import XCResultBundle, XCResultError
+
 
 class TestStatus(Enum):
     PASSED = "passed"
@@ -49,6 +83,151 @@ class TestCase:
     screenshots: List[str] = field(default_factory=list)
 
 
+class TestCaseStore(Sequence):
+    """Compact, append-only columnar storage for test case results.
+
+    Class and test names are interned in a shared string table, statuses are
+    one-byte codes and durations a packed double array. The rarely set
+    fields (error message, location, stack trace, screenshots) live in a
+    sparse side table keyed by index. Indexing or iterating returns TestCase
+    objects built from the columns, so consumers keep the TestCase API;
+    update stored fields through the store (e.g. set_screenshots()).
+    """
+
+    _STATUSES = list(TestStatus)
+    _STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+
+    def __init__(self, test_cases: Iterable[TestCase] = ()):
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._names = array("I")
+        self._class_names = array("I")
+        self._statuses = array("B")
+        self._durations = array("d")
+        self._details: Dict[int, Tuple[Optional[str], Optional[str], Optional[str], List[str]]] = {}
+        self.extend(test_cases)
+
+    def _intern(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def add(
+        self,
+        name: str,
+        class_name: str,
+        status: TestStatus,
+        duration: float,
+        error_message: Optional[str] = None,
+        failure_location: Optional[str] = None,
+        stack_trace: Optional[str] = None,
+        screenshots: Optional[List[str]] = None,
+    ) -> None:
+        """Append one test case result without building a TestCase."""
+        index = len(self._statuses)
+        self._names.append(self._intern(name))
+        self._class_names.append(self._intern(class_name))
+        self._statuses.append(self._STATUS_CODES[status])
+        self._durations.append(duration)
+        if error_message is not None or failure_location is not None or stack_trace is not None or screenshots:
+            self._details[index] = (error_message, failure_location, stack_trace, list(screenshots or []))
+
+    def append(self, test_case: TestCase) -> None:
+        self.add(
+            test_case.name,
+            test_case.class_name,
+            test_case.status,
+            test_case.duration,
+            test_case.error_message,
+            test_case.failure_location,
+            test_case.stack_trace,
+            test_case.screenshots,
+        )
+
+    def extend(self, test_cases: Iterable[TestCase]) -> None:
+        if not isinstance(test_cases, TestCaseStore):
+            for test_case in test_cases:
+                self.append(test_case)
+            return
+
+        # Copy columns directly, remapping the other store's string ids
+        offset = len(self)
+        remap = [self._intern(value) for value in test_cases._strings]
+        self._names.extend(remap[i] for i in test_cases._names)
+        self._class_names.extend(remap[i] for i in test_cases._class_names)
+        self._statuses.extend(test_cases._statuses)
+        self._durations.extend(test_cases._durations)
+        for index, (error_message, location, stack_trace, screenshots) in test_cases._details.items():
+            self._details[offset + index] = (error_message, location, stack_trace, list(screenshots))
+
+    def set_screenshots(self, index: int, screenshots: List[str]) -> None:
+        """Replace the stored screenshot paths of the test case at index."""
+        index = range(len(self))[index]
+        error_message, location, stack_trace, _ = self._details.get(index, (None, None, None, []))
+        self._details[index] = (error_message, location, stack_trace, list(screenshots))
+
+    @property
+    def total_duration(self) -> float:
+        return sum(self._durations)
+
+    def count_statuses(self, start: int = 0) -> Counter:
+        """Number of test cases per TestStatus from index start onwards."""
+        return Counter({
+            self._STATUSES[code]: count for code, count in Counter(self._statuses[start:]).items()
+        })
+
+    def indices_with_status(self, status: TestStatus) -> List[int]:
+        """Indices of the test cases with the given status, in order."""
+        code = self._STATUS_CODES[status]
+        return [index for index, value in enumerate(self._statuses) if value == code]
+
+    def iter_timings(self) -> Iterator[Tuple[str, str, float]]:
+        """(class_name, name, duration) of every test case, without building TestCase objects."""
+        strings = self._strings
+        for class_id, name_id, duration in zip(self._class_names, self._names, self._durations):
+            yield strings[class_id], strings[name_id], duration
+
+    def iter_statuses(self) -> Iterator[Tuple[str, str, TestStatus]]:
+        """(class_name, name, status) of every test case, without building TestCase objects."""
+        strings = self._strings
+        statuses = self._STATUSES
+        for class_id, name_id, code in zip(self._class_names, self._names, self._statuses):
+            yield strings[class_id], strings[name_id], statuses[code]
+
+    def with_status(self, status: TestStatus) -> List[TestCase]:
+        """All test cases with the given status, in order."""
+        return [self._build(index) for index in self.indices_with_status(status)]
+
+    def _build(self, index: int) -> TestCase:
+        strings = self._strings
+        error_message, location, stack_trace, screenshots = self._details.get(index, (None, None, None, []))
+        return TestCase(
+            name=strings[self._names[index]],
+            class_name=strings[self._class_names[index]],
+            status=self._STATUSES[self._statuses[index]],
+            duration=self._durations[index],
+            error_message=error_message,
+            failure_location=location,
+            stack_trace=stack_trace,
+            screenshots=list(screenshots),
+        )
+
+    def __len__(self) -> int:
+        return len(self._statuses)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[TestCase, List[TestCase]]:
+        if isinstance(index, slice):
+            return [self._build(i) for i in range(*index.indices(len(self)))]
+        return self._build(range(len(self))[index])
+
+    def __iter__(self) -> Iterator[TestCase]:
+        for index in range(len(self)):
+            yield self._build(index)
+
+
 @dataclass
 class Issue:
     """Represents an identified issue."""
@@ -62,15 +241,56 @@ class Issue:
     suggested_fix: Optional[str] = None
     related_tests: List[str] = field(default_factory=list)
     agent_recommendation: Optional[str] = None
+    occurrences: int = 1
+    locations: List[str] = field(default_factory=list)
+    fingerprint: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Convert issue to a JSON-serializable dictionary."""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["severity"] = self.severity.value
+        data["related_tests"] = list(self.related_tests)
+        data["locations"] = list(self.locations)
+        data["tags"] = list(self.tags)
+        return data
 
 
 @dataclass
 class TestSuite:
-    """Represents a test suite with multiple test cases."""
+    """Represents a test suite with multiple test cases.
+
+    Status counts are cached and caught up incrementally as test cases are
+    appended; call invalidate_counts() after changing a test case in place.
+    """
     name: str
-    test_cases: List[TestCase]
+    test_cases: Sequence[TestCase]
     duration: float
     timestamp: datetime
+    _status_counts: Counter = field(default_factory=Counter, init=False, repr=False, compare=False)
+    _counted: int = field(default=0, init=False, repr=False, compare=False)
+    # The sequence the counts were taken from; holding it (rather than its
+    # id()) means a replacement can never be mistaken for it
+    _counted_source: Optional[Sequence[TestCase]] = field(default=None, init=False, repr=False, compare=False)
+
+    def invalidate_counts(self) -> None:
+        """Drop cached status counts so they are recomputed on next access."""
+        self._status_counts = Counter()
+        self._counted = 0
+        self._counted_source = self.test_cases
+
+    def status_counts(self) -> Counter:
+        """Number of test cases per TestStatus."""
+        total = len(self.test_cases)
+        if self.test_cases is not self._counted_source or total < self._counted:
+            self.invalidate_counts()
+        if isinstance(self.test_cases, TestCaseStore):
+            self._status_counts.update(self.test_cases.count_statuses(self._counted))
+        else:
+            for index in range(self._counted, total):
+                self._status_counts[self.test_cases[index].status] += 1
+        self._counted = total
+        return self._status_counts
 
     @property
     def total_tests(self) -> int:
@@ -78,11 +298,11 @@ class TestSuite:
 
     @property
     def passed_tests(self) -> int:
-        return sum(1 for tc in self.test_cases if tc.status == TestStatus.PASSED)
+        return self.status_counts()[TestStatus.PASSED]
 
     @property
     def failed_tests(self) -> int:
-        return sum(1 for tc in self.test_cases if tc.status == TestStatus.FAILED)
+        return self.status_counts()[TestStatus.FAILED]
 
     @property
     def pass_rate(self) -> float:
@@ -93,13 +313,80 @@ class TestSuite:
 
 @dataclass
 class TestReport:
-    """Complete test report."""
+    """Complete test report.
+
+    Like TestSuite, issue severity counts are cached and caught up as issues
+    are appended; call invalidate_counts() after editing issues in place.
+    """
     report_id: str
     generated_at: datetime
     test_suites: List[TestSuite]
     issues: List[Issue]
     environment: Dict[str, str]
     metrics: Dict[str, Any]
+    duration_profile: Optional[Dict[str, Any]] = None
+    _severity_counts: Counter = field(default_factory=Counter, init=False, repr=False, compare=False)
+    _counted: int = field(default=0, init=False, repr=False, compare=False)
+    _counted_source: Optional[List[Issue]] = field(default=None, init=False, repr=False, compare=False)
+
+    def invalidate_counts(self) -> None:
+        """Drop cached counts so they are recomputed on next access."""
+        self._severity_counts = Counter()
+        self._counted = 0
+        self._counted_source = self.issues
+        for suite in self.test_suites:
+            suite.invalidate_counts()
+
+    def severity_counts(self) -> Counter:
+        """Number of issues per Severity."""
+        total = len(self.issues)
+        if self.issues is not self._counted_source or total < self._counted:
+            self._severity_counts = Counter()
+            self._counted = 0
+            self._counted_source = self.issues
+        for index in range(self._counted, total):
+            self._severity_counts[self.issues[index].severity] += 1
+        self._counted = total
+        return self._severity_counts
+
+    @property
+    def summary(self) -> dict:
+        """Report-wide totals, computed from the cached suite and issue counts."""
+        severity_counts = self.severity_counts()
+        return {
+            "total_suites": len(self.test_suites),
+            "total_tests": sum(ts.total_tests for ts in self.test_suites),
+            "total_passed": sum(ts.passed_tests for ts in self.test_suites),
+            "total_failed": sum(ts.failed_tests for ts in self.test_suites),
+            "total_issues": len(self.issues),
+            "critical_issues": severity_counts[Severity.CRITICAL],
+            "high_issues": severity_counts[Severity.HIGH],
+        }
+
+    @staticmethod
+    def suite_entry(suite: TestSuite) -> dict:
+        """Suite fields of the JSON report, without its test cases."""
+        return {
+            "name": suite.name,
+            "duration": suite.duration,
+            "timestamp": suite.timestamp.isoformat(),
+            "total_tests": suite.total_tests,
+            "passed_tests": suite.passed_tests,
+            "failed_tests": suite.failed_tests,
+            "pass_rate": suite.pass_rate,
+        }
+
+    @staticmethod
+    def test_case_entry(test_case: TestCase) -> dict:
+        """Test case fields of the JSON report."""
+        return {
+            "name": test_case.name,
+            "class_name": test_case.class_name,
+            "status": test_case.status.value,
+            "duration": test_case.duration,
+            "error_message": test_case.error_message,
+            "failure_location": test_case.failure_location,
+        }
 
     def to_dict(self) -> dict:
         """Convert report to dictionary for JSON serialization."""
@@ -108,156 +395,183 @@ class TestReport:
             "generated_at": self.generated_at.isoformat(),
             "test_suites": [
                 {
-                    "name": ts.name,
-                    "duration": ts.duration,
-                    "timestamp": ts.timestamp.isoformat(),
-                    "total_tests": ts.total_tests,
-                    "passed_tests": ts.passed_tests,
-                    "failed_tests": ts.failed_tests,
-                    "pass_rate": ts.pass_rate,
-                    "test_cases": [
-                        {
-                            "name": tc.name,
-                            "class_name": tc.class_name,
-                            "status": tc.status.value,
-                            "duration": tc.duration,
-                            "error_message": tc.error_message,
-                            "failure_location": tc.failure_location,
-                        }
-                        for tc in ts.test_cases
-                    ],
+                    **self.suite_entry(ts),
+                    "test_cases": [self.test_case_entry(tc) for tc in ts.test_cases],
                 }
                 for ts in self.test_suites
             ],
-            "issues": [
-                {
-                    "id": issue.id,
-                    "severity": issue.severity.value,
-                    "category": issue.category,
-                    "title": issue.title,
-                    "description": issue.description,
-                    "file_path": issue.file_path,
-                    "line_number": issue.line_number,
-                    "suggested_fix": issue.suggested_fix,
-                    "related_tests": issue.related_tests,
-                    "agent_recommendation": issue.agent_recommendation,
-                }
-                for issue in self.issues
-            ],
+            "issues": [issue.to_dict() for issue in self.issues],
             "environment": self.environment,
             "metrics": self.metrics,
-            "summary": {
-                "total_suites": len(self.test_suites),
-                "total_tests": sum(ts.total_tests for ts in self.test_suites),
-                "total_passed": sum(ts.passed_tests for ts in self.test_suites),
-                "total_failed": sum(ts.failed_tests for ts in self.test_suites),
-                "total_issues": len(self.issues),
-                "critical_issues": sum(1 for i in self.issues if i.severity == Severity.CRITICAL),
-                "high_issues": sum(1 for i in self.issues if i.severity == Severity.HIGH),
-            },
+            "summary": self.summary,
+            "duration_profile": self.duration_profile,
         }
 
 
+class JSONStreamWriter:
+    """Writes a JSON document incrementally.
+
+    Values wrapped in StreamObject/StreamArray are written item by item as
+    their iterators are consumed; any other value is formatted in one piece
+    and written. With indent=2 the output is byte-identical to
+    json.dump(..., indent=2) of the equivalent fully built document.
+    """
+
+    def __init__(self, f, indent: Optional[int] = 2):
+        self.f = f
+        self.indent = indent
+        self.separators = (",", ": ") if indent is not None else (",", ":")
+        self._compact_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def write(self, value: Any, level: int = 0) -> None:
+        if isinstance(value, StreamObject):
+            self._write_container(
+                "{", "}", ((self._format(key, 0) + self.separators[1], item) for key, item in value.items), level
+            )
+        elif isinstance(value, StreamArray):
+            self._write_container("[", "]", (("", item) for item in value.items), level)
+        else:
+            self.f.write(self._format(value, level))
+
+    def _newline(self, level: int) -> str:
+        return "\n" + " " * (self.indent * level)
+
+    def _write_container(self, open_char: str, close_char: str, entries, level: int) -> None:
+        if self.indent is not None:
+            item_prefix = self._newline(level + 1)
+            closing = self._newline(level) + close_char
+        else:
+            item_prefix = ""
+            closing = close_char
+
+        empty = True
+        for prefix, item in entries:
+            self.f.write((open_char if empty else self.separators[0]) + item_prefix + prefix)
+            self.write(item, level + 1)
+            empty = False
+
+        self.f.write(open_char + close_char if empty else closing)
+
+    def _format(self, value: Any, level: int) -> str:
+        """Serialize a plain JSON value nested at the given indent level."""
+        if self.indent is None:
+            return self._compact_encode(value)
+        if isinstance(value, str):
+            return json.encoder.encode_basestring_ascii(value)
+        if isinstance(value, dict):
+            if not value:
+                return "{}"
+            if not all(isinstance(key, str) for key in value):
+                return json.dumps(value, indent=self.indent).replace("\n", self._newline(level))
+            item_prefix = self._newline(level + 1)
+            return "{" + ",".join(
+                item_prefix + json.encoder.encode_basestring_ascii(key) + ": " + self._format(item, level + 1)
+                for key, item in value.items()
+            ) + self._newline(level) + "}"
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return "[]"
+            item_prefix = self._newline(level + 1)
+            return "[" + ",".join(
+                item_prefix + self._format(item, level + 1) for item in value
+            ) + self._newline(level) + "]"
+        return self._compact_encode(value)
+
+
+@dataclass
+class StreamObject:
+    """JSON object whose (key, value) pairs are produced lazily."""
+    items: Iterable[Tuple[str, Any]]
+
+
+@dataclass
+class StreamArray:
+    """JSON array whose elements are produced lazily."""
+    items: Iterable[Any]
+
+
 class TestLogParser:
-    """Parses Xcode test logs to extract test results."""
+    """Parses Xcode test logs to extract test results.
 
-    # Regex patterns for parsing test output
-    TEST_CASE_START = re.compile(r"Test Case '-\[(\w+) (\w+)\]' started\.")
-    TEST_CASE_PASSED = re.compile(r"Test Case '-\[(\w+) (\w+)\]' passed \(([\d.]+) seconds\)\.")
-    TEST_CASE_FAILED = re.compile(r"Test Case '-\[(\w+) (\w+)\]' failed \(([\d.]+) seconds\)\.")
-    ERROR_LINE = re.compile(r"(.+):(\d+): error: (.+)")
-    WARNING_LINE = re.compile(r"(.+):(\d+): warning: (.+)")
-    BUILD_ERROR = re.compile(r"error: (.+)")
+    Logs are parsed into events by the shared log_events core (and its
+    per-file parse cache); this class turns those events into test cases,
+    errors and warnings.
+    """
 
-    def __init__(self, log_dir: Path):
+    def __init__(self, log_dir: Path, use_checkpoints: bool = False, use_cache: bool = True):
         self.log_dir = log_dir
-        self.test_cases: List[TestCase] = []
+        self.use_checkpoints = use_checkpoints
+        self.use_cache = use_cache
+        self.test_cases = TestCaseStore()
         self.errors: List[Dict] = []
         self.warnings: List[Dict] = []
 
-    def parse_all_logs(self) -> None:
-        """Parse all log files in the directory."""
-        for log_file in self.log_dir.glob("*.log"):
-            self.parse_log_file(log_file)
-
-    def parse_log_file(self, log_path: Path) -> None:
-        """Parse a single log file."""
-        if not log_path.exists():
-            return
+    def parse_all_logs(self, jobs: int = 1) -> None:
+        """Parse all log files in the directory.
 
-        content = log_path.read_text(errors="ignore")
-        lines = content.split("\n")
+        Files are processed in sorted order. With jobs > 1 they are parsed in
+        a process pool and the results are merged back in that same order, so
+        test case and issue numbering is identical to a sequential run.
+        """
+        log_files = sorted(self.log_dir.glob("*.log"))
+        if self.use_cache:
+            log_events.prune_cache(self.log_dir)
 
-        current_test_class = None
-        current_test_name = None
+        if jobs <= 1 or len(log_files) <= 1:
+            for log_file in log_files:
+                self.parse_log_file(log_file)
+            return
 
-        for i, line in enumerate(lines):
-            # Check for test case start
-            start_match = self.TEST_CASE_START.match(line)
-            if start_match:
-                current_test_class = start_match.group(1)
-                current_test_name = start_match.group(2)
-                continue
+        worker = partial(_parse_log_worker, use_checkpoints=self.use_checkpoints, use_cache=self.use_cache)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(log_files))) as executor:
+            for test_cases, errors, warnings in executor.map(worker, log_files):
+                self.test_cases.extend(test_cases)
+                self.errors.extend(errors)
+                self.warnings.extend(warnings)
 
-            # Check for test case passed
-            passed_match = self.TEST_CASE_PASSED.match(line)
-            if passed_match:
-                self.test_cases.append(
-                    TestCase(
-                        name=passed_match.group(2),
-                        class_name=passed_match.group(1),
-                        status=TestStatus.PASSED,
-                        duration=float(passed_match.group(3)),
-                    )
-                )
-                continue
+    def parse_log_file(self, log_path: Path) -> None:
+        """Parse a single log file.
 
-            # Check for test case failed
-            failed_match = self.TEST_CASE_FAILED.match(line)
-            if failed_match:
-                # Look for error details in surrounding lines
-                error_msg = self._find_error_context(lines, i)
-                self.test_cases.append(
-                    TestCase(
-                        name=failed_match.group(2),
-                        class_name=failed_match.group(1),
-                        status=TestStatus.FAILED,
-                        duration=float(failed_match.group(3)),
-                        error_message=error_msg,
-                    )
-                )
-                continue
+        An unchanged log is not re-parsed: its events come from the parse
+        cache, which analyze_test_results.py shares. With checkpoints
+        enabled, a log that has only grown since it was cached is resumed
+        from the cached byte offset, so only appended bytes are parsed.
+        """
+        if not log_path.exists():
+            return
 
-            # Check for errors
-            error_match = self.ERROR_LINE.match(line)
-            if error_match:
-                self.errors.append(
-                    {
-                        "file": error_match.group(1),
-                        "line": int(error_match.group(2)),
-                        "message": error_match.group(3),
-                    }
+        parsed = log_events.parse_log(log_path, use_cache=self.use_cache, incremental=self.use_checkpoints)
+        self.consume(parsed.events)
+
+    def consume(self, events: Iterable[tuple]) -> None:
+        """Add the test cases, errors and warnings among parsed log events."""
+        for event in events:
+            kind = event[0]
+            if kind == log_events.TEST_PASSED:
+                _, class_name, name, duration = event
+                self.test_cases.add(name=name, class_name=class_name, status=TestStatus.PASSED, duration=duration)
+            elif kind == log_events.TEST_FAILED:
+                _, class_name, name, duration, error_message = event
+                self.test_cases.add(
+                    name=name,
+                    class_name=class_name,
+                    status=TestStatus.FAILED,
+                    duration=duration,
+                    error_message=error_message,
                 )
-                continue
+            elif kind == log_events.ERROR:
+                self.errors.append({"file": event[1], "line": event[2], "message": event[3]})
+            elif kind == log_events.WARNING:
+                self.warnings.append({"file": event[1], "line": event[2], "message": event[3]})
 
-            # Check for warnings
-            warning_match = self.WARNING_LINE.match(line)
-            if warning_match:
-                self.warnings.append(
-                    {
-                        "file": warning_match.group(1),
-                        "line": int(warning_match.group(2)),
-                        "message": warning_match.group(3),
-                    }
-                )
 
-    def _find_error_context(self, lines: List[str], current_index: int) -> Optional[str]:
-        """Find error context around the failed test."""
-        # Look backwards for assertion failure
-        for i in range(max(0, current_index - 10), current_index):
-            if "XCTAssert" in lines[i] or "failed" in lines[i].lower():
-                return lines[i].strip()
-        return None
+def _parse_log_worker(
+    log_path: Path, use_checkpoints: bool = False, use_cache: bool = True
+) -> Tuple[TestCaseStore, List[Dict], List[Dict]]:
+    """Parse one log file in a worker process and return its results."""
+    parser = TestLogParser(log_path.parent, use_checkpoints=use_checkpoints, use_cache=use_cache)
+    parser.parse_log_file(log_path)
+    return parser.test_cases, parser.errors, parser.warnings
 
 
 class IssueAnalyzer:
@@ -281,11 +595,52 @@ class IssueAnalyzer:
         "general": "code-reviewer",
     }
 
-    def __init__(self):
-        self.issue_counter = 0
+    # Error message fragments that vary between duplicates of one problem
+    PATH_TOKEN = re.compile(r"\S*/\S+")
+    NUMBER_TOKEN = re.compile(r"\b\d+\b")
+
+    # Locations kept per clustered issue; occurrences are always counted
+    MAX_ISSUE_LOCATIONS = 50
+
+    FLAKY_TAG = "flaky"
 
-    def analyze_test_failures(self, test_cases: List[TestCase]) -> List[Issue]:
-        """Analyze failed tests to create issues."""
+    def __init__(self, flaky_detector: Optional[FlakyTestDetector] = None):
+        self.issue_counter = 0
+        self.flaky_detector = flaky_detector
+        self._categories = [category for category, patterns in self.CATEGORY_PATTERNS.items() if patterns]
+        self._category_matcher = self._build_category_matcher()
+        self._test_category_cache: Dict[Tuple[str, str], str] = {}
+        self._error_category_cache: Dict[Tuple[str, str], str] = {}
+
+    def _build_category_matcher(self) -> "re.Pattern":
+        """Compile all category patterns into one case-folded regex.
+
+        Each category is one capture group, in priority order, inside a
+        zero-width lookahead. finditer therefore reports a match at every
+        position where any pattern starts (overlapping matches included), and
+        lastindex identifies the highest priority category starting there.
+        """
+        groups = [
+            "(" + "|".join(re.escape(pattern.lower()) for pattern in self.CATEGORY_PATTERNS[category]) + ")"
+            for category in self._categories
+        ]
+        return re.compile("(?=" + "|".join(groups) + ")")
+
+    def _match_category(self, text: str) -> str:
+        """Return the highest priority category with a pattern in text."""
+        best = len(self._categories)
+        for match in self._category_matcher.finditer(text):
+            best = min(best, match.lastindex - 1)
+            if best == 0:
+                break
+        return self._categories[best] if best < len(self._categories) else "general"
+
+    def analyze_test_failures(self, test_cases: Sequence[TestCase]) -> List[Issue]:
+        """Analyze failed tests to create issues.
+
+        With a flaky detector, failures of known-flaky tests are tagged
+        FLAKY_TAG so they are not routed as new problems.
+        """
         issues = []
 
         for tc in test_cases:
@@ -307,19 +662,50 @@ class IssueAnalyzer:
                 agent_recommendation=self.AGENT_MAPPING.get(category, "code-reviewer"),
             )
 
+            if self.flaky_detector is not None:
+                flakiness = self.flaky_detector.flakiness(tc.class_name, tc.name)
+                if flakiness is not None and flakiness.flaky:
+                    issue.tags.append(self.FLAKY_TAG)
+                    issue.suggested_fix = (
+                        f"Known flaky test: {flakiness.flips} pass/fail flips and "
+                        f"{flakiness.failures} failures in its last {flakiness.runs} runs "
+                        f"(flakiness {flakiness.score:.2f}). Stabilize the test before "
+                        f"treating this failure as a regression."
+                    )
+
             issues.append(issue)
 
         return issues
 
     def analyze_errors(self, errors: List[Dict]) -> List[Issue]:
-        """Analyze build/runtime errors to create issues."""
-        issues = []
+        """Analyze build/runtime errors to create issues.
+
+        Errors are clustered by fingerprint (see _error_fingerprint), so one
+        broken header repeated across thousands of lines becomes a single
+        issue with an occurrence count and its first MAX_ISSUE_LOCATIONS
+        distinct locations.
+        """
+        clusters: Dict[str, Issue] = {}
 
         for error in errors:
+            fingerprint = self._error_fingerprint(error)
+            location = self._error_location(error)
+
+            issue = clusters.get(fingerprint)
+            if issue is not None:
+                issue.occurrences += 1
+                if (
+                    location
+                    and len(issue.locations) < self.MAX_ISSUE_LOCATIONS
+                    and location not in issue.locations
+                ):
+                    issue.locations.append(location)
+                continue
+
             self.issue_counter += 1
             category = self._categorize_error(error)
 
-            issue = Issue(
+            clusters[fingerprint] = Issue(
                 id=f"ISSUE-{self.issue_counter:04d}",
                 severity=Severity.HIGH,
                 category=category,
@@ -328,36 +714,46 @@ class IssueAnalyzer:
                 file_path=error.get("file"),
                 line_number=error.get("line"),
                 agent_recommendation=self.AGENT_MAPPING.get(category, "code-reviewer"),
+                locations=[location] if location else [],
+                fingerprint=fingerprint,
             )
 
-            issues.append(issue)
+        return list(clusters.values())
 
-        return issues
+    def _error_fingerprint(self, error: Dict) -> str:
+        """Hash the error message with paths and numbers normalized away."""
+        normalized = self.PATH_TOKEN.sub("<path>", error.get("message", ""))
+        normalized = self.NUMBER_TOKEN.sub("<n>", normalized)
+        normalized = " ".join(normalized.split())
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def _error_location(error: Dict) -> Optional[str]:
+        if not error.get("file"):
+            return None
+        if error.get("line"):
+            return f"{error['file']}:{error['line']}"
+        return error["file"]
 
     def _categorize_issue(self, test_case: TestCase) -> str:
         """Categorize an issue based on test case details."""
-        test_name_lower = test_case.name.lower()
-        class_name_lower = test_case.class_name.lower()
-        combined = f"{test_name_lower} {class_name_lower}"
-
-        for category, patterns in self.CATEGORY_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.lower() in combined:
-                    return category
-
-        return "general"
+        key = (test_case.name, test_case.class_name)
+        category = self._test_category_cache.get(key)
+        if category is None:
+            combined = f"{test_case.name.lower()} {test_case.class_name.lower()}"
+            category = self._test_category_cache[key] = self._match_category(combined)
+        return category
 
     def _categorize_error(self, error: Dict) -> str:
-        """Categorize an error based on its details."""
-        message = error.get("message", "").lower()
-        file_path = error.get("file", "").lower()
-
-        for category, patterns in self.CATEGORY_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.lower() in message or pattern.lower() in file_path:
-                    return category
-
-        return "general"
+        """Categorize an error based on its message and file path."""
+        key = (error.get("message", ""), error.get("file", ""))
+        category = self._error_category_cache.get(key)
+        if category is None:
+            # Patterns never contain a newline, so joining on one cannot
+            # create a match spanning message and path
+            combined = f"{key[0].lower()}\n{key[1].lower()}"
+            category = self._error_category_cache[key] = self._match_category(combined)
+        return category
 
     def _determine_severity(self, test_case: TestCase) -> Severity:
         """Determine severity based on test case."""
@@ -373,38 +769,166 @@ class IssueAnalyzer:
             return Severity.MEDIUM
 
 
+@dataclass
+class ReportContext:
+    """Aggregates shared by all report writers, computed once per report."""
+    summary: dict
+    failed_by_suite: List[Tuple[TestSuite, List[TestCase]]]
+    issues_by_severity: List[Issue]
+    issues_by_severity_and_category: List[Issue]
+    issues_by_agent: List[Tuple[str, List[Issue]]]
+    flaky_issues: List[Issue]
+
+    @classmethod
+    def build(cls, report: TestReport) -> "ReportContext":
+        """Build every shared view in a single pass over suites and issues.
+
+        Issues are bucketed instead of sorted: the orderings are the same as
+        a stable sort by severity value (then category), in linear time.
+        Flaky issues are kept out of agent routing.
+        """
+        failed_by_suite = []
+        for suite in report.test_suites:
+            if not suite.failed_tests:
+                failed_cases = []
+            elif isinstance(suite.test_cases, TestCaseStore):
+                failed_cases = suite.test_cases.with_status(TestStatus.FAILED)
+            else:
+                failed_cases = [tc for tc in suite.test_cases if tc.status == TestStatus.FAILED]
+            failed_by_suite.append((suite, failed_cases))
+
+        by_severity: Dict[str, List[Issue]] = {}
+        by_severity_and_category: Dict[Tuple[str, str], List[Issue]] = {}
+        by_agent: Dict[str, List[Issue]] = {}
+        flaky_issues = []
+        for issue in report.issues:
+            by_severity.setdefault(issue.severity.value, []).append(issue)
+            by_severity_and_category.setdefault((issue.severity.value, issue.category), []).append(issue)
+            if IssueAnalyzer.FLAKY_TAG in issue.tags:
+                flaky_issues.append(issue)
+            else:
+                by_agent.setdefault(issue.agent_recommendation or "code-reviewer", []).append(issue)
+
+        issues_by_severity = [issue for key in sorted(by_severity) for issue in by_severity[key]]
+        issues_by_severity_and_category = [
+            issue for key in sorted(by_severity_and_category) for issue in by_severity_and_category[key]
+        ]
+
+        return cls(
+            summary=report.summary,
+            failed_by_suite=failed_by_suite,
+            issues_by_severity=issues_by_severity,
+            issues_by_severity_and_category=issues_by_severity_and_category,
+            issues_by_agent=sorted(by_agent.items()),
+            flaky_issues=flaky_issues,
+        )
+
+
 class ReportGenerator:
     """Generates various report formats from test results."""
 
-    def __init__(self, output_dir: Path):
+    JSON_FORMATS = ("pretty", "compact", "ndjson")
+    WRITE_BUFFER_SIZE = 1 << 16
+
+    SEVERITY_EMOJI = {
+        Severity.CRITICAL: "🔥",
+        Severity.HIGH: "🔴",
+        Severity.MEDIUM: "🟡",
+        Severity.LOW: "🟢",
+        Severity.INFO: "ℹ️",
+    }
+
+    def __init__(self, output_dir: Path, json_format: str = "pretty"):
+        if json_format not in self.JSON_FORMATS:
+            raise ValueError(f"Unknown JSON format: {json_format}")
         self.output_dir = output_dir
+        self.json_format = json_format
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
     def generate_all_reports(self, report: TestReport) -> Dict[str, Path]:
-        """Generate all report formats."""
+        """Generate all report formats.
+
+        Summaries and sorted/grouped issue views are computed once and
+        shared by every writer.
+        """
+        context = ReportContext.build(report)
         return {
             "json": self.generate_json_report(report),
-            "markdown": self.generate_markdown_report(report),
-            "agent_prompt": self.generate_agent_prompt(report),
-            "summary": self.generate_summary_report(report),
+            "markdown": self.generate_markdown_report(report, context),
+            "agent_prompt": self.generate_agent_prompt(report, context),
+            "summary": self.generate_summary_report(report, context),
         }
 
     def generate_json_report(self, report: TestReport) -> Path:
-        """Generate JSON report."""
+        """Generate JSON report.
+
+        Suites, test cases and issues are streamed to the file as they are
+        serialized, so extra memory stays constant. "pretty" is indented,
+        "compact" has no whitespace, and "ndjson" writes one record per
+        line (report header, then each suite, test case and issue).
+        """
+        if self.json_format == "ndjson":
+            return self._generate_ndjson_report(report)
+
         output_path = self.output_dir / f"test-report-{report.report_id}.json"
+        indent = 2 if self.json_format == "pretty" else None
+
+        document = StreamObject([
+            ("report_id", report.report_id),
+            ("generated_at", report.generated_at.isoformat()),
+            ("test_suites", StreamArray(
+                StreamObject([
+                    *report.suite_entry(suite).items(),
+                    ("test_cases", StreamArray(map(report.test_case_entry, suite.test_cases))),
+                ])
+                for suite in report.test_suites
+            )),
+            ("issues", StreamArray(issue.to_dict() for issue in report.issues)),
+            ("environment", report.environment),
+            ("metrics", report.metrics),
+            ("summary", report.summary),
+            ("duration_profile", report.duration_profile),
+        ])
+
+        with open(output_path, "w", buffering=self.WRITE_BUFFER_SIZE) as f:
+            JSONStreamWriter(f, indent=indent).write(document)
 
-        with open(output_path, "w") as f:
-            json.dump(report.to_dict(), f, indent=2)
+        return output_path
+
+    def _generate_ndjson_report(self, report: TestReport) -> Path:
+        """Write the JSON report as newline-delimited records."""
+        output_path = self.output_dir / f"test-report-{report.report_id}.ndjson"
+
+        def write_record(record_type: str, data: dict) -> None:
+            f.write(json.dumps({"type": record_type, **data}, separators=(",", ":")))
+            f.write("\n")
+
+        with open(output_path, "w", buffering=self.WRITE_BUFFER_SIZE) as f:
+            write_record("report", {
+                "report_id": report.report_id,
+                "generated_at": report.generated_at.isoformat(),
+                "environment": report.environment,
+                "metrics": report.metrics,
+                "summary": report.summary,
+                "duration_profile": report.duration_profile,
+            })
+            for suite in report.test_suites:
+                write_record("suite", report.suite_entry(suite))
+                for test_case in suite.test_cases:
+                    write_record("test_case", {"suite": suite.name, **report.test_case_entry(test_case)})
+            for issue in report.issues:
+                write_record("issue", issue.to_dict())
 
         return output_path
 
-    def generate_markdown_report(self, report: TestReport) -> Path:
+    def generate_markdown_report(self, report: TestReport, context: Optional[ReportContext] = None) -> Path:
         """Generate Markdown report."""
         output_path = self.output_dir / f"test-report-{report.report_id}.md"
+        context = context or ReportContext.build(report)
+        summary = context.summary
 
-        summary = report.to_dict()["summary"]
-
-        content = f"""# Craig-O-Clean Test Report
+        with open(output_path, "w", buffering=self.WRITE_BUFFER_SIZE) as f:
+            f.write(f"""# Craig-O-Clean Test Report
 
 ## Report Information
 
@@ -427,79 +951,113 @@ class ReportGenerator:
 
 | Property | Value |
 |----------|-------|
-"""
+""")
 
-        for key, value in report.environment.items():
-            content += f"| {key} | {value} |\n"
+            for key, value in report.environment.items():
+                f.write(f"| {key} | {value} |\n")
 
-        content += "\n## Test Suites\n\n"
+            f.write("\n## Test Suites\n\n")
 
-        for suite in report.test_suites:
-            content += f"### {suite.name}\n\n"
-            content += f"- **Total Tests:** {suite.total_tests}\n"
-            content += f"- **Passed:** {suite.passed_tests}\n"
-            content += f"- **Failed:** {suite.failed_tests}\n"
-            content += f"- **Pass Rate:** {suite.pass_rate:.1f}%\n"
-            content += f"- **Duration:** {suite.duration:.2f}s\n\n"
-
-            if suite.failed_tests > 0:
-                content += "#### Failed Tests\n\n"
-                for tc in suite.test_cases:
-                    if tc.status == TestStatus.FAILED:
-                        content += f"- **{tc.name}** ({tc.duration:.2f}s)\n"
-                        if tc.error_message:
-                            content += f"  - Error: {tc.error_message}\n"
-                content += "\n"
-
-        content += "## Issues\n\n"
-
-        for issue in sorted(report.issues, key=lambda x: x.severity.value):
-            severity_emoji = {
-                Severity.CRITICAL: "🔥",
-                Severity.HIGH: "🔴",
-                Severity.MEDIUM: "🟡",
-                Severity.LOW: "🟢",
-                Severity.INFO: "ℹ️",
-            }
-
-            content += f"### {severity_emoji.get(issue.severity, '❓')} {issue.id}: {issue.title}\n\n"
-            content += f"- **Severity:** {issue.severity.value.upper()}\n"
-            content += f"- **Category:** {issue.category}\n"
-            content += f"- **Recommended Agent:** @.cursor/agents/{issue.agent_recommendation}.md\n"
-
-            if issue.file_path:
-                content += f"- **Location:** {issue.file_path}"
-                if issue.line_number:
-                    content += f":{issue.line_number}"
-                content += "\n"
-
-            content += f"\n{issue.description}\n\n"
+            for suite, failed_cases in context.failed_by_suite:
+                f.write(f"### {suite.name}\n\n")
+                f.write(f"- **Total Tests:** {suite.total_tests}\n")
+                f.write(f"- **Passed:** {suite.passed_tests}\n")
+                f.write(f"- **Failed:** {suite.failed_tests}\n")
+                f.write(f"- **Pass Rate:** {suite.pass_rate:.1f}%\n")
+                f.write(f"- **Duration:** {suite.duration:.2f}s\n\n")
 
-            if issue.suggested_fix:
-                content += f"**Suggested Fix:** {issue.suggested_fix}\n\n"
-
-        content += """---
+                if failed_cases:
+                    f.write("#### Failed Tests\n\n")
+                    for tc in failed_cases:
+                        f.write(f"- **{tc.name}** ({tc.duration:.2f}s)\n")
+                        if tc.error_message:
+                            f.write(f"  - Error: {tc.error_message}\n")
+                        for attachment in tc.screenshots:
+                            link = Path(os.path.relpath(attachment, self.output_dir)).as_posix()
+                            if is_image(attachment):
+                                f.write(f"  - ![Screenshot]({link})\n")
+                            else:
+                                f.write(f"  - [{Path(attachment).name}]({link})\n")
+                    f.write("\n")
+
+            if report.duration_profile and report.duration_profile["slowest_tests"]:
+                self._write_slowest_tests(f, report.duration_profile)
+
+            f.write("## Issues\n\n")
+
+            for issue in context.issues_by_severity:
+                f.write(f"### {self.SEVERITY_EMOJI.get(issue.severity, '❓')} {issue.id}: {issue.title}\n\n")
+                f.write(f"- **Severity:** {issue.severity.value.upper()}\n")
+                f.write(f"- **Category:** {issue.category}\n")
+                f.write(f"- **Recommended Agent:** @.cursor/agents/{issue.agent_recommendation}.md\n")
+
+                if issue.file_path:
+                    f.write(f"- **Location:** {issue.file_path}")
+                    if issue.line_number:
+                        f.write(f":{issue.line_number}")
+                    f.write("\n")
+
+                if issue.occurrences > 1:
+                    f.write(f"- **Occurrences:** {issue.occurrences}\n")
+
+                if issue.tags:
+                    f.write(f"- **Tags:** {', '.join(issue.tags)}\n")
+
+                f.write(f"\n{issue.description}\n\n")
+
+                if len(issue.locations) > 1:
+                    f.write("**Locations:**\n\n")
+                    for location in issue.locations:
+                        f.write(f"- `{location}`\n")
+                    if issue.occurrences > len(issue.locations):
+                        f.write(f"- ...and {issue.occurrences - len(issue.locations)} more occurrences\n")
+                    f.write("\n")
+
+                if issue.suggested_fix:
+                    f.write(f"**Suggested Fix:** {issue.suggested_fix}\n\n")
+
+            f.write("""---
 *Report generated by Craig-O-Clean Automated Testing System*
-"""
-
-        with open(output_path, "w") as f:
-            f.write(content)
+""")
 
         return output_path
 
-    def generate_agent_prompt(self, report: TestReport) -> Path:
+    @staticmethod
+    def _write_slowest_tests(f, profile: Dict[str, Any]) -> None:
+        """Write the Slowest Tests section of the Markdown report."""
+        total = max(profile["total_duration"], 1e-9)
+        f.write("## Slowest Tests\n\n")
+        f.write(f"{profile['test_count']} test runs took {profile['total_duration']:.2f}s in total.\n\n")
+        f.write("| # | Test | Runs | Total | Share | Mean | p90 | Max | Trend |\n")
+        f.write("|---|------|------|-------|-------|------|-----|-----|-------|\n")
+        for rank, test in enumerate(profile["slowest_tests"], 1):
+            trend = test["trend"]
+            trend_text = f"{trend['change']:.2f}x over {trend['runs']} runs" if trend else "-"
+            f.write(
+                f"| {rank} | {test['class_name']}.{test['name']} | {test['count']} | {test['total']:.2f}s "
+                f"| {test['total'] / total * 100:.1f}% | {test['mean']:.2f}s | {test['p90']:.2f}s "
+                f"| {test['max']:.2f}s | {trend_text} |\n"
+            )
+
+        f.write("\n### Duration by Class\n\n")
+        f.write("| Class | Tests | Total | Share | p50 | p90 | p99 | Max |\n")
+        f.write("|-------|-------|-------|-------|-----|-----|-----|-----|\n")
+        classes = sorted(profile["classes"].items(), key=lambda item: -item[1]["total"])
+        for class_name, stats in classes:
+            f.write(
+                f"| {class_name} | {stats['count']} | {stats['total']:.2f}s | {stats['total'] / total * 100:.1f}% "
+                f"| {stats['p50']:.2f}s | {stats['p90']:.2f}s | {stats['p99']:.2f}s | {stats['max']:.2f}s |\n"
+            )
+        f.write("\n")
+
+    def generate_agent_prompt(self, report: TestReport, context: Optional[ReportContext] = None) -> Path:
         """Generate agent orchestration prompt."""
         output_path = self.output_dir / f"agent-prompt-{report.report_id}.md"
+        context = context or ReportContext.build(report)
+        summary = context.summary
 
-        # Group issues by agent
-        agent_issues: Dict[str, List[Issue]] = {}
-        for issue in report.issues:
-            agent = issue.agent_recommendation or "code-reviewer"
-            if agent not in agent_issues:
-                agent_issues[agent] = []
-            agent_issues[agent].append(issue)
-
-        content = f"""# Agent Orchestration Request
+        with open(output_path, "w", buffering=self.WRITE_BUFFER_SIZE) as f:
+            f.write(f"""# Agent Orchestration Request
 
 ## Context
 
@@ -507,26 +1065,34 @@ Automated test run `{report.report_id}` has completed with issues requiring atte
 
 ## Quick Summary
 
-- **Failed Tests:** {sum(ts.failed_tests for ts in report.test_suites)}
-- **Critical Issues:** {sum(1 for i in report.issues if i.severity == Severity.CRITICAL)}
-- **Total Issues:** {len(report.issues)}
+- **Failed Tests:** {summary['total_failed']}
+- **Critical Issues:** {summary['critical_issues']}
+- **Total Issues:** {summary['total_issues']}
 
 ## Agent Routing
 
 Using `@.cursor/agents/agent-orchestrator.md`, route tasks to these agents:
 
-"""
+""")
 
-        for agent, issues in sorted(agent_issues.items()):
-            content += f"### @.cursor/agents/{agent}.md\n\n"
-            content += f"**Issues to Address:** {len(issues)}\n\n"
+            for agent, issues in context.issues_by_agent:
+                f.write(f"### @.cursor/agents/{agent}.md\n\n")
+                f.write(f"**Issues to Address:** {len(issues)}\n\n")
 
-            for issue in issues:
-                content += f"- [{issue.severity.value.upper()}] {issue.id}: {issue.title}\n"
+                for issue in issues:
+                    f.write(f"- [{issue.severity.value.upper()}] {issue.id}: {issue.title}\n")
 
-            content += "\n"
+                f.write("\n")
 
-        content += """## Execution Instructions
+            if context.flaky_issues:
+                f.write("## Known Flaky Tests\n\n")
+                f.write("These failures come from tests with a history of flipping between passing and failing. ")
+                f.write("Do not investigate them as regressions; only stabilize the tests if asked to.\n\n")
+                for issue in context.flaky_issues:
+                    f.write(f"- {issue.id}: {issue.title}\n")
+                f.write("\n")
+
+            f.write("""## Execution Instructions
 
 1. **Use Agent Orchestrator** to coordinate the fixes
 2. **Prioritize** critical and high severity issues
@@ -546,41 +1112,45 @@ ORCHESTRATE the following:
 6. Have @doc-generator update documentation
 ```
 
-"""
+""")
+
+            # Add detailed issue list
+            f.write("## Detailed Issue List\n\n")
 
-        # Add detailed issue list
-        content += "## Detailed Issue List\n\n"
+            for issue in context.issues_by_severity_and_category:
+                f.write(f"### {issue.id}\n\n")
+                f.write(f"- **Severity:** {issue.severity.value}\n")
+                f.write(f"- **Category:** {issue.category}\n")
+                f.write(f"- **Agent:** {issue.agent_recommendation}\n")
+                f.write(f"- **Description:** {issue.description}\n")
 
-        for issue in sorted(report.issues, key=lambda x: (x.severity.value, x.category)):
-            content += f"### {issue.id}\n\n"
-            content += f"- **Severity:** {issue.severity.value}\n"
-            content += f"- **Category:** {issue.category}\n"
-            content += f"- **Agent:** {issue.agent_recommendation}\n"
-            content += f"- **Description:** {issue.description}\n"
+                if issue.file_path:
+                    f.write(f"- **File:** `{issue.file_path}`\n")
 
-            if issue.file_path:
-                content += f"- **File:** `{issue.file_path}`\n"
+                if issue.occurrences > 1:
+                    f.write(f"- **Occurrences:** {issue.occurrences} ({len(issue.locations)} locations listed in report)\n")
 
-            if issue.related_tests:
-                content += f"- **Related Tests:** {', '.join(issue.related_tests)}\n"
+                if issue.related_tests:
+                    f.write(f"- **Related Tests:** {', '.join(issue.related_tests)}\n")
 
-            content += "\n"
+                if issue.tags:
+                    f.write(f"- **Tags:** {', '.join(issue.tags)}\n")
 
-        with open(output_path, "w") as f:
-            f.write(content)
+                f.write("\n")
 
         return output_path
 
-    def generate_summary_report(self, report: TestReport) -> Path:
+    def generate_summary_report(self, report: TestReport, context: Optional[ReportContext] = None) -> Path:
         """Generate a brief summary report."""
         output_path = self.output_dir / f"summary-{report.report_id}.txt"
-
-        summary = report.to_dict()["summary"]
+        context = context or ReportContext.build(report)
+        summary = context.summary
         pass_rate = (summary["total_passed"] / max(summary["total_tests"], 1)) * 100
 
         status = "✅ PASSED" if summary["total_failed"] == 0 else "❌ FAILED"
 
-        content = f"""CRAIG-O-CLEAN TEST SUMMARY
+        with open(output_path, "w", buffering=self.WRITE_BUFFER_SIZE) as f:
+            f.write(f"""CRAIG-O-CLEAN TEST SUMMARY
 {'='*50}
 Status: {status}
 Report ID: {report.report_id}
@@ -599,27 +1169,383 @@ Total Issues: {summary['total_issues']}
 Critical: {summary['critical_issues']}
 High: {summary['high_issues']}
 
-"""
+""")
 
-        if summary["total_failed"] > 0:
-            content += "FAILED TESTS\n------------\n"
-            for suite in report.test_suites:
-                for tc in suite.test_cases:
-                    if tc.status == TestStatus.FAILED:
-                        content += f"- {tc.class_name}.{tc.name}\n"
+            if summary["total_failed"] > 0:
+                f.write("FAILED TESTS\n------------\n")
+                for _, failed_cases in context.failed_by_suite:
+                    for tc in failed_cases:
+                        f.write(f"- {tc.class_name}.{tc.name}\n")
 
-        content += f"""
+            f.write(f"""
 {'='*50}
 Full report: test-report-{report.report_id}.md
 Agent prompt: agent-prompt-{report.report_id}.md
-"""
-
-        with open(output_path, "w") as f:
-            f.write(content)
+""")
 
         return output_path
 
 
+def find_result_bundles(input_dir: Path) -> List[Path]:
+    """xcresult bundles directly inside input_dir or one level below it."""
+    return sorted(set(input_dir.glob("*.xcresult")) | set(input_dir.glob("*/*.xcresult")))
+
+
+def attach_failure_screenshots(
+    test_cases: TestCaseStore, bundle_paths: Iterable[Path], attachments_dir: Path
+) -> int:
+    """Fill in screenshots of failed test cases from xcresult attachments.
+
+    Only failed tests are extracted, into a content-addressed directory
+    shared across runs. Log class names may be module qualified
+    (Module.Class), so tests are matched on the bare class and test name.
+    Returns the number of test cases that received attachments.
+    """
+    failed_indices = test_cases.indices_with_status(TestStatus.FAILED)
+    if not failed_indices:
+        return 0
+
+    store = AttachmentStore(attachments_dir)
+    attachments: Dict[Tuple[str, str], List[Path]] = {}
+    for bundle_path in bundle_paths:
+        try:
+            extracted = AttachmentExtractor(XCResultBundle.open(bundle_path), store).extract_failures()
+        except (OSError, XCResultError) as e:
+            print(f"  Warning: could not read {bundle_path}: {e}")
+            continue
+        for (class_name, name), paths in extracted.items():
+            attachments.setdefault((class_name.rsplit(".", 1)[-1], name), []).extend(paths)
+
+    attached = 0
+    for index in failed_indices:
+        test_case = test_cases[index]
+        paths = attachments.get((test_case.class_name.rsplit(".", 1)[-1], test_case.name))
+        if paths:
+            test_cases.set_screenshots(index, [str(path) for path in paths])
+            attached += 1
+    return attached
+
+
+# One parsed test log: (file name, file identity, its results)
+LogRun = Tuple[str, log_events.FileIdentity, "TestLogParser"]
+
+
+def recorded_logs(store_path: Path) -> Dict[str, Optional[List[int]]]:
+    """Identity each log was recorded at, by log file name, if there is a store."""
+    if not store_path.exists():
+        return {}
+    with ResultsStore(store_path) as store:
+        return store.recorded_logs()
+
+
+def is_recorded(recorded: Dict[str, Optional[List[int]]], name: str, identity: log_events.FileIdentity) -> bool:
+    """Whether a log is in the store exactly as it is now (not grown or replaced since)."""
+    return recorded.get(name) == list(identity)
+
+
+def parse_new_logs(
+    logs_dir: Path, recorded: Dict[str, Optional[List[int]]], use_checkpoints: bool = False
+) -> List[LogRun]:
+    """Parse, one log at a time, the logs that are not yet in the results store.
+
+    The logs were just parsed for the report, so this reads the parse
+    cache rather than the logs.
+    """
+    log_runs = []
+    for log_path in sorted(logs_dir.glob("*.log")):
+        identity = log_events.file_identity(log_path)
+        if is_recorded(recorded, log_path.name, identity):
+            continue
+        results = TestLogParser(logs_dir, use_checkpoints=use_checkpoints)
+        results.parse_log_file(log_path)
+        log_runs.append((log_path.name, identity, results))
+    return log_runs
+
+
+def record_log_runs(store: ResultsStore, log_runs: Iterable[LogRun]) -> int:
+    """Record each log's test cases as one test_log run; return the number recorded.
+
+    A log is keyed by its file name, so recording it again after it grew
+    replaces its earlier run instead of adding its executions twice.
+    """
+    count = 0
+    for name, identity, results in log_runs:
+        test_cases = results.test_cases
+        store.record_run(
+            ResultsStore.SOURCE_TEST_LOG,
+            name,
+            summary={
+                "log_identity": list(identity),
+                "total_tests": len(test_cases),
+                "total_failed": test_cases.count_statuses()[TestStatus.FAILED],
+            },
+            test_cases=(
+                (tc.class_name, tc.name, tc.status.value, tc.duration, tc.error_message) for tc in test_cases
+            ),
+        )
+        count += 1
+    return count
+
+
+def record_report(store: ResultsStore, report: TestReport) -> int:
+    """Record a report's summary and issues as one test_report run.
+
+    Its test cases are stored per log by record_log_runs, since a report
+    covers every log in the input directory, most of them already recorded.
+    """
+    return store.record_run(
+        ResultsStore.SOURCE_TEST_REPORT,
+        report.report_id,
+        summary=report.summary,
+        issues=(issue.to_dict() for issue in report.issues),
+    )
+
+
+def collect_environment() -> Dict[str, str]:
+    """macOS, Xcode and Python versions for the report header."""
+    import subprocess
+    try:
+        xcode_version = subprocess.check_output(
+            ["xcodebuild", "-version"], stderr=subprocess.DEVNULL
+        ).decode().split("\n")[0]
+    except Exception:
+        xcode_version = "Unknown"
+
+    try:
+        macos_version = subprocess.check_output(
+            ["sw_vers", "-productVersion"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        macos_version = "Unknown"
+
+    return {
+        "macOS": macos_version,
+        "Xcode": xcode_version,
+        "Python": sys.version.split()[0],
+    }
+
+
+def load_flaky_history(store_path: Path, last_n: int) -> FlakyTestDetector:
+    """A flaky test detector primed with the stored runs, if there is a store."""
+    flaky_detector = FlakyTestDetector()
+    if store_path.exists():
+        with ResultsStore(store_path) as store:
+            flaky_detector.load(store, last_n)
+    return flaky_detector
+
+
+def add_log_runs(flaky_detector: FlakyTestDetector, log_runs: Iterable[LogRun]) -> FlakyTestDetector:
+    """Add each log's executions to flaky_detector as one run.
+
+    Only pass logs that are not in the store the detector was loaded
+    from; a recorded log's executions are already in its history.
+    """
+    for _, _, results in log_runs:
+        flaky_detector.add_run(
+            (class_name, name, status.value) for class_name, name, status in results.test_cases.iter_statuses()
+        )
+    return flaky_detector
+
+
+def build_report(
+    report_id: str,
+    results: "TestLogParser",
+    analyzer: IssueAnalyzer,
+    environment: Dict[str, str],
+    store_path: Path,
+    slowest: int = DurationProfile.DEFAULT_TOP_N,
+    new_logs: Iterable[LogRun] = (),
+) -> TestReport:
+    """Analyze issues in parsed results and assemble the report.
+
+    The analyzer's issue numbering restarts at 1, so one analyzer can be
+    reused for every report of a watch session. new_logs are the logs of
+    results not in the store yet; duration trends add them to the stored
+    runs.
+    """
+    analyzer.issue_counter = 0
+    issues = []
+    issues.extend(analyzer.analyze_test_failures(results.test_cases))
+    issues.extend(analyzer.analyze_errors(results.errors))
+
+    test_suite = TestSuite(
+        name="Craig-O-Clean Automated Tests",
+        test_cases=results.test_cases,
+        duration=results.test_cases.total_duration,
+        timestamp=datetime.now(),
+    )
+
+    report = TestReport(
+        report_id=report_id,
+        generated_at=datetime.now(),
+        test_suites=[test_suite] if results.test_cases else [],
+        issues=issues,
+        environment=dict(environment),
+        metrics={
+            "total_duration": test_suite.duration,
+            "error_count": len(results.errors),
+            "warning_count": len(results.warnings),
+        },
+    )
+
+    # Profile test durations, with trends over the stored runs plus the new logs
+    profile = DurationProfile.build(results.test_cases, top_n=slowest)
+    if store_path.exists():
+        with ResultsStore(store_path) as store:
+            profile.add_trends(store, [log_results.test_cases for _, _, log_results in new_logs])
+    report.duration_profile = profile.to_dict()
+    return report
+
+
+class ReportDaemon:
+    """Regenerates reports as test logs grow (--watch).
+
+    Every log is followed with a LogFollower, so only appended bytes are
+    parsed, and its results are kept in a per-file TestLogParser. Reports
+    are regenerated once the logs have been quiet for the debounce
+    interval (or after max_delay of continuous writes), combining the
+    per-file results in file name order exactly like a one-shot run.
+    Screenshots and the results store are only handled for the final
+    report, written when the daemon stops.
+    """
+
+    # Upper bound on report staleness while logs keep changing, in debounce intervals
+    MAX_DELAY_FACTOR = 10
+
+    def __init__(self, args, watcher):
+        self.args = args
+        self.logs_dir = args.input / "logs"
+        self.watcher = watcher
+        self.debounce = args.debounce
+        self.max_delay = args.debounce * self.MAX_DELAY_FACTOR
+        self.store_path = args.store_path
+        self.report_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.environment = collect_environment()
+        self.flaky_history = load_flaky_history(self.store_path, args.flaky_runs)
+        self.recorded = recorded_logs(self.store_path)
+        self.analyzer = IssueAnalyzer()
+        self.generator = ReportGenerator(args.output, json_format=args.json_format)
+        self.followers: Dict[str, log_events.LogFollower] = {}
+        self.results: Dict[str, TestLogParser] = {}
+        self.report_paths: Dict[str, Path] = {}
+
+    def apply(self, names: Iterable[str]) -> bool:
+        """Parse what was appended to the named logs; return True if anything changed."""
+        changed = False
+        for name in names:
+            follower = self.followers.get(name)
+            if follower is None:
+                follower = self.followers[name] = log_events.LogFollower(self.logs_dir / name)
+            events, reset = follower.poll()
+            if reset or name not in self.results:
+                self.results[name] = TestLogParser(self.logs_dir)
+                changed = True
+            if events:
+                self.results[name].consume(events)
+                changed = True
+            if follower.state is None:
+                # Removed
+                del self.followers[name]
+                self.results.pop(name, None)
+        return changed
+
+    def flush(self) -> None:
+        """Catch up on every log, including partial last lines, before the final report."""
+        self.apply(sorted(set(self.followers) | {path.name for path in self.logs_dir.glob("*.log")}))
+        for name, follower in self.followers.items():
+            events = follower.flush()
+            if events:
+                self.results[name].consume(events)
+
+    def new_log_runs(self) -> List[LogRun]:
+        """The followed logs that are not in the results store as they are now."""
+        return [
+            (name, self.followers[name].identity, self.results[name])
+            for name in sorted(self.results)
+            if name in self.followers and not is_recorded(self.recorded, name, self.followers[name].identity)
+        ]
+
+    def combined_results(self) -> TestLogParser:
+        combined = TestLogParser(self.logs_dir)
+        for name in sorted(self.results):
+            results = self.results[name]
+            combined.test_cases.extend(results.test_cases)
+            combined.errors.extend(results.errors)
+            combined.warnings.extend(results.warnings)
+        return combined
+
+    def regenerate(self, final: bool = False) -> TestReport:
+        """Write fresh reports from the in-memory results."""
+        results = self.combined_results()
+        if final:
+            bundle_paths = (
+                self.args.xcresult if self.args.xcresult is not None else find_result_bundles(self.args.input)
+            )
+            if bundle_paths:
+                attach_failure_screenshots(results.test_cases, bundle_paths, self.args.output / "attachments")
+
+        new_logs = self.new_log_runs()
+        self.analyzer.flaky_detector = add_log_runs(self.flaky_history.copy(), new_logs)
+        report = build_report(
+            self.report_id, results, self.analyzer, self.environment, self.store_path, self.args.slowest, new_logs
+        )
+        self.report_paths = self.generator.generate_all_reports(report)
+        return report
+
+    def run(self) -> int:
+        print(f"Watching {self.logs_dir} with {type(self.watcher).__name__} (Ctrl-C to stop)")
+        log_events.prune_cache(self.logs_dir)
+        self.apply(path.name for path in sorted(self.logs_dir.glob("*.log")))
+        self._regenerate_and_log()
+
+        first_change = last_change = None
+        try:
+            while True:
+                if first_change is None:
+                    timeout = 1.0
+                else:
+                    now = time.monotonic()
+                    timeout = min(last_change + self.debounce, first_change + self.max_delay) - now
+                names = self.watcher.wait(max(timeout, 0))
+                now = time.monotonic()
+                if names and self.apply(names):
+                    first_change = first_change if first_change is not None else now
+                    last_change = now
+                if first_change is not None and (
+                    now - last_change >= self.debounce or now - first_change >= self.max_delay
+                ):
+                    self._regenerate_and_log()
+                    first_change = last_change = None
+        except KeyboardInterrupt:
+            print("\nStopping watch, writing final report...")
+        finally:
+            self.watcher.close()
+
+        self.flush()
+        report = self.regenerate(final=True)
+        if self.args.store:
+            with ResultsStore(self.store_path) as store:
+                log_count = record_log_runs(store, self.new_log_runs())
+                run_id = record_report(store, report)
+            print(f"  Recorded {log_count} new test logs and report run {run_id} in {self.store_path}")
+
+        print()
+        print("Generated Reports:")
+        for report_type, path in self.report_paths.items():
+            print(f"  {report_type}: {path}")
+        return 1 if report.summary["total_failed"] > 0 else 0
+
+    def _regenerate_and_log(self) -> TestReport:
+        start = time.perf_counter()
+        report = self.regenerate()
+        summary = report.summary
+        print(
+            f"{datetime.now().strftime('%H:%M:%S')} Reports updated in {(time.perf_counter() - start) * 1000:.0f} ms: "
+            f"{summary['total_tests']} tests, {summary['total_failed']} failed, {summary['total_issues']} issues"
+        )
+        return report
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate comprehensive test reports for Craig-O-Clean"
@@ -638,6 +1564,76 @@ def main():
         default=Path("test-output/reports"),
         help="Output directory for reports",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of processes used to parse logs (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Resume cached log parses, parsing only output appended since they were cached",
+    )
+    parser.add_argument(
+        "--json-format",
+        choices=ReportGenerator.JSON_FORMATS,
+        default="pretty",
+        help="JSON report layout: indented, compact, or one record per line",
+    )
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=DurationProfile.DEFAULT_TOP_N,
+        help="Number of slowest tests listed in the reports",
+    )
+    parser.add_argument(
+        "--xcresult",
+        type=Path,
+        action="append",
+        help="xcresult bundle (or export directory) to take failure screenshots from; "
+        "repeatable (default: bundles found under --input)",
+    )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Record the run in the results store",
+    )
+    parser.add_argument(
+        "--store-path",
+        type=Path,
+        help=f"Results store file, shared with analyze_test_results.py "
+        f"(default: {ResultsStore.DEFAULT_FILENAME} in the input directory)",
+    )
+    parser.add_argument(
+        "--flaky-runs",
+        type=int,
+        default=FlakyTestDetector.DEFAULT_LAST_N,
+        help="Number of stored runs used to detect flaky tests",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and regenerate the reports as the logs change (Ctrl-C writes the final report)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.1,
+        help="With --watch, seconds the logs must be quiet before reports are regenerated",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.25,
+        help="With --watch, seconds between checks when polling for log changes",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="With --watch, poll for log changes instead of using inotify/kqueue",
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -646,6 +1642,8 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.store_path is None:
+        args.store_path = ResultsStore.default_path(args.input)
 
     print(f"Craig-O-Clean Test Report Generator")
     print(f"{'='*50}")
@@ -664,68 +1662,60 @@ def main():
     logs_dir = args.input / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
 
-    parser_instance = TestLogParser(logs_dir)
-    parser_instance.parse_all_logs()
+    if args.watch:
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        watcher = open_watcher(logs_dir, "*.log", args.poll_interval, native=not args.poll)
+        return ReportDaemon(args, watcher).run()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    parser_instance = TestLogParser(logs_dir, use_checkpoints=args.incremental)
+    parser_instance.parse_all_logs(jobs=jobs)
 
     print(f"  Found {len(parser_instance.test_cases)} test cases")
     print(f"  Found {len(parser_instance.errors)} errors")
     print(f"  Found {len(parser_instance.warnings)} warnings")
 
-    # Analyze issues
-    print("Analyzing issues...")
-    analyzer = IssueAnalyzer()
-    issues = []
-    issues.extend(analyzer.analyze_test_failures(parser_instance.test_cases))
-    issues.extend(analyzer.analyze_errors(parser_instance.errors))
-    print(f"  Identified {len(issues)} issues")
-
-    # Create test suite
-    test_suite = TestSuite(
-        name="Craig-O-Clean Automated Tests",
-        test_cases=parser_instance.test_cases,
-        duration=sum(tc.duration for tc in parser_instance.test_cases),
-        timestamp=datetime.now(),
-    )
+    # Logs whose executions are not in the results store yet
+    new_logs = parse_new_logs(logs_dir, recorded_logs(args.store_path), use_checkpoints=args.incremental)
 
-    # Get environment info
-    import subprocess
-    try:
-        xcode_version = subprocess.check_output(
-            ["xcodebuild", "-version"], stderr=subprocess.DEVNULL
-        ).decode().split("\n")[0]
-    except Exception:
-        xcode_version = "Unknown"
+    # Attach screenshots of failed tests
+    bundle_paths = args.xcresult if args.xcresult is not None else find_result_bundles(args.input)
+    if bundle_paths:
+        attached = attach_failure_screenshots(
+            parser_instance.test_cases, bundle_paths, args.output / "attachments"
+        )
+        print(f"  Attached screenshots to {attached} failed tests")
 
-    try:
-        macos_version = subprocess.check_output(
-            ["sw_vers", "-productVersion"], stderr=subprocess.DEVNULL
-        ).decode().strip()
-    except Exception:
-        macos_version = "Unknown"
+    # Score flakiness over the stored runs plus the logs not stored yet
+    flaky_detector = add_log_runs(load_flaky_history(args.store_path, args.flaky_runs), new_logs)
 
-    # Create report
-    report = TestReport(
-        report_id=datetime.now().strftime("%Y%m%d-%H%M%S"),
-        generated_at=datetime.now(),
-        test_suites=[test_suite] if parser_instance.test_cases else [],
-        issues=issues,
-        environment={
-            "macOS": macos_version,
-            "Xcode": xcode_version,
-            "Python": sys.version.split()[0],
-        },
-        metrics={
-            "total_duration": test_suite.duration,
-            "error_count": len(parser_instance.errors),
-            "warning_count": len(parser_instance.warnings),
-        },
+    # Analyze issues and profile test durations
+    print("Analyzing issues...")
+    report = build_report(
+        datetime.now().strftime("%Y%m%d-%H%M%S"),
+        parser_instance,
+        IssueAnalyzer(flaky_detector=flaky_detector),
+        collect_environment(),
+        args.store_path,
+        args.slowest,
+        new_logs,
     )
+    print(f"  Identified {len(report.issues)} issues")
+    flaky_count = sum(1 for issue in report.issues if IssueAnalyzer.FLAKY_TAG in issue.tags)
+    if flaky_count:
+        print(f"  Tagged {flaky_count} failures of known-flaky tests")
 
     # Generate reports
     print("Generating reports...")
-    generator = ReportGenerator(args.output)
+    generator = ReportGenerator(args.output, json_format=args.json_format)
     reports = generator.generate_all_reports(report)
 
+    if args.store:
+        with ResultsStore(args.store_path) as store:
+            log_count = record_log_runs(store, new_logs)
+            run_id = record_report(store, report)
+        print(f"  Recorded {log_count} new test logs and report run {run_id} in {args.store_path}")
+
     print()
     print("Generated Reports:")
     for report_type, path in reports.items():
@@ -735,7 +1725,7 @@ def main():
     print("✅ Report generation complete!")
 
     # Return exit code based on test results
-    if report.to_dict()["summary"]["total_failed"] > 0:
+    if report.summary["total_failed"] > 0:
         return 1
     return 0
 
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Streaming latency statistics for Craig-O-Clean performance metrics
+
+Constant-memory building blocks used by the test analyzers:
+
+- TopK: the K largest items seen so far (bounded heap)
+- LatencySketch: mergeable quantile sketch with bounded relative error,
+  plus exact count/sum/min/max
+"""
+
+import heapq
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class TopK:
+    """Keeps the k items with the largest key, using O(k) memory.
+
+    Ties are kept in arrival order, so items() matches
+    sorted(all_items, key=key, reverse=True)[:k].
+    """
+
+    def __init__(self, k: int, key: Optional[Callable[[Any], float]] = None):
+        self.k = k
+        self.key = key or (lambda item: item)
+        self.seen = 0
+        self._heap: List[tuple] = []
+
+    def push(self, item: Any) -> None:
+        entry = (self.key(item), -self.seen, item)
+        self.seen += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.push(item)
+
+    def items(self) -> List[Any]:
+        """Kept items, largest first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class LatencySketch:
+    """Mergeable quantile sketch for positive durations (in seconds).
+
+    Values are counted in logarithmic buckets so any quantile estimate is
+    within relative_accuracy of a true sample value (the DDSketch scheme).
+    Memory grows with the log of the value range, not with the number of
+    samples, and two sketches with the same accuracy merge exactly.
+    """
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= self.MIN_VALUE:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def bucket_value(self, index: int) -> float:
+        """Representative value of a bucket (within relative accuracy)."""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile (0 <= q <= 1)."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return max(self.min, 0.0)
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return min(max(self.bucket_value(index), self.min), self.max)
+        return self.max
+
+    def histogram(self) -> List[tuple]:
+        """(representative value, count) pairs in ascending value order."""
+        pairs = [(0.0, self.zero_count)] if self.zero_count else []
+        pairs.extend((self.bucket_value(index), self.buckets[index]) for index in sorted(self.buckets))
+        return pairs
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'max': self.max if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        sketch = cls(data['relative_accuracy'])
+        sketch.buckets = {int(index): count for index, count in data['buckets'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.total = data['total']
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
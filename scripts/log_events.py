@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Shared xcodebuild log parsing core for Craig-O-Clean test tools
+
+generate-test-report.py (TestLogParser) and analyze_test_results.py
+(analyze_test_log) both read the xcodebuild test logs. This module parses
+each log once into a flat list of events that both consume:
+
+    (TEST_PASSED, class_name, name, duration)
+    (TEST_FAILED, class_name, name, duration, error_context)
+    (ERROR, file, line, message)          file:line: error: diagnostics
+    (WARNING, file, line, message)        file:line: warning: diagnostics
+
+Loose mentions (every failure mention such as "XCTAssertTrue failed",
+every "error:" to the end of its line, and "Test Case ... [...]"
+mentions) are only counted, with the first MAX_MENTION_EXAMPLES texts of
+each kind kept as examples (MentionSummary), so memory does not grow with
+the number of matches.
+
+Parsed logs are cached in the logs directory (.events-cache/<log>.events)
+keyed on the file's identity (device, inode, size, mtime_ns). Both tools
+running back to back therefore only pay for one parse. The cache is written with marshal, which loads several times
+faster than JSON for this many small tuples; it is only read back by the
+same Python version. With incremental=True a log that has only grown since it
+was cached is resumed from the cached byte offset instead of re-parsed.
+prune_cache() removes the entries of logs that no longer exist.
+
+Usage:
+    python3 scripts/log_events.py <log-file>
+"""
+
+import hashlib
+import marshal
+import os
+import re
+import sys
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+# Event kinds
+TEST_PASSED = "test_passed"
+TEST_FAILED = "test_failed"
+ERROR = "error"
+WARNING = "warning"
+
+# Examples kept per kind of loose mention; every mention is counted
+MAX_MENTION_EXAMPLES = 20
+
+Event = Tuple
+FileIdentity = Tuple[int, int, int, int]
+
+
+def file_identity(path: Union[str, Path]) -> FileIdentity:
+    """(device, inode, size, mtime_ns) of a file; changes whenever it is rewritten."""
+    stat = os.stat(path)
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+@dataclass
+class MentionSummary:
+    """Counts of a log's loose mentions, plus the first examples of each."""
+    failure_count: int = 0
+    error_count: int = 0
+    test_count: int = 0
+    failure_examples: List[str] = field(default_factory=list)
+    error_examples: List[str] = field(default_factory=list)
+
+    def add_failures(self, texts: List[str]) -> None:
+        self.failure_count += len(texts)
+        self.failure_examples.extend(texts[:MAX_MENTION_EXAMPLES - len(self.failure_examples)])
+
+    def add_errors(self, texts: List[str]) -> None:
+        self.error_count += len(texts)
+        self.error_examples.extend(texts[:MAX_MENTION_EXAMPLES - len(self.error_examples)])
+
+    def copy(self) -> "MentionSummary":
+        return MentionSummary(
+            self.failure_count,
+            self.error_count,
+            self.test_count,
+            list(self.failure_examples),
+            list(self.error_examples),
+        )
+
+
+@dataclass
+class ParserState:
+    """Per-file parser state that can be cached and resumed."""
+    offset: int = 0
+    current_test_class: Optional[str] = None
+    current_test_name: Optional[str] = None
+    recent_lines: deque = field(default_factory=deque)
+    mentions: MentionSummary = field(default_factory=MentionSummary)
+
+    def copy(self) -> "ParserState":
+        return ParserState(
+            self.offset,
+            self.current_test_class,
+            self.current_test_name,
+            deque(self.recent_lines, maxlen=self.recent_lines.maxlen),
+            self.mentions.copy(),
+        )
+
+
+class LogEventParser:
+    """Turns xcodebuild log lines into events."""
+
+    # Test case lifecycle and diagnostics (TestLogParser's view)
+    TEST_CASE_START = re.compile(r"Test Case '-\[(\w+) (\w+)\]' started\.")
+    TEST_CASE_PASSED = re.compile(r"Test Case '-\[(\w+) (\w+)\]' passed \(([\d.]+) seconds\)\.")
+    TEST_CASE_FAILED = re.compile(r"Test Case '-\[(\w+) (\w+)\]' failed \(([\d.]+) seconds\)\.")
+    ERROR_LINE = re.compile(r"(.+):(\d+): error: (.+)")
+    WARNING_LINE = re.compile(r"(.+):(\d+): warning: (.+)")
+
+    # Loose mentions (analyze_test_log's view); none can match across a line break
+    FAILURE_MENTION = re.compile(r"Test Case.*failed|Assertion failed|XCTAssert.*failed", re.IGNORECASE)
+    ERROR_MENTION = re.compile(r"error:.*", re.IGNORECASE)
+    TEST_CASE_MENTION = re.compile(r"Test Case.*\[.*\]")
+
+    # Literal fragments every match of the patterns above must contain
+    TEST_CASE_PREFIX = "Test Case '-["
+    ERROR_MARKER = ": error: "
+    WARNING_MARKER = ": warning: "
+
+    # Number of preceding lines searched for failure context
+    CONTEXT_LINES = 10
+
+    def __init__(self):
+        self.events: List[Event] = []
+
+    def new_state(self) -> ParserState:
+        return ParserState(recent_lines=deque(maxlen=self.CONTEXT_LINES))
+
+    def parse_block(self, block: bytes, state: ParserState) -> None:
+        """Decode a run of newline-terminated lines and parse each of them.
+
+        Line endings are handled like universal-newline text mode: CRLF and
+        lone CR both end a line.
+        """
+        text = block.decode("utf-8", errors="ignore")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        recent_lines = state.recent_lines
+        for line in text.split("\n")[:-1]:
+            self._parse_line(line, state)
+            recent_lines.append(line)
+
+    def _parse_line(self, line: str, state: ParserState) -> None:
+        """Parse one log line, using state.recent_lines for failure context.
+
+        Most lines match none of the patterns, so each regex is only tried
+        when a cheap prefix/substring check shows it could match. Non-ASCII
+        lines always try the case-insensitive mentions, since those can pair
+        characters that str.lower() does not.
+        """
+        events = self.events
+        mentions = state.mentions
+
+        if line.isascii():
+            lower = line.lower()
+            # Every failure alternative ends in "failed"
+            may_fail = "failed" in lower
+            may_error = "error:" in lower
+        else:
+            may_fail = may_error = True
+
+        if may_fail:
+            found = self.FAILURE_MENTION.findall(line)
+            if found:
+                mentions.add_failures(found)
+        if may_error:
+            found = self.ERROR_MENTION.findall(line)
+            if found:
+                mentions.add_errors(found)
+        if "Test Case" in line:
+            mentions.test_count += len(self.TEST_CASE_MENTION.findall(line))
+
+        if line.startswith(self.TEST_CASE_PREFIX):
+            start_match = self.TEST_CASE_START.match(line)
+            if start_match:
+                state.current_test_class = start_match.group(1)
+                state.current_test_name = start_match.group(2)
+                return
+
+            passed_match = self.TEST_CASE_PASSED.match(line)
+            if passed_match:
+                events.append((TEST_PASSED, passed_match.group(1), passed_match.group(2),
+                               float(passed_match.group(3))))
+                return
+
+            failed_match = self.TEST_CASE_FAILED.match(line)
+            if failed_match:
+                # Look for error details in preceding lines
+                events.append((TEST_FAILED, failed_match.group(1), failed_match.group(2),
+                               float(failed_match.group(3)), self._find_error_context(state.recent_lines)))
+                return
+
+        if self.ERROR_MARKER in line:
+            error_match = self.ERROR_LINE.match(line)
+            if error_match:
+                events.append((ERROR, error_match.group(1), int(error_match.group(2)), error_match.group(3)))
+                return
+
+        if self.WARNING_MARKER in line:
+            warning_match = self.WARNING_LINE.match(line)
+            if warning_match:
+                events.append((WARNING, warning_match.group(1), int(warning_match.group(2)), warning_match.group(3)))
+
+    @staticmethod
+    def _find_error_context(recent_lines) -> Optional[str]:
+        """Find error context in the lines preceding a failed test."""
+        for line in recent_lines:
+            if "XCTAssert" in line or "failed" in line.lower():
+                return line.strip()
+        return None
+
+
+@dataclass
+class ParsedLog:
+    """Events of one log, shared by every consumer.
+
+    The first complete_events events come from newline-terminated lines;
+    resume_state continues parsing after them. mentions covers the whole
+    file, including a partial last line.
+    """
+    path: Path
+    identity: FileIdentity
+    events: List[Event]
+    complete_events: int
+    resume_state: ParserState
+    mentions: MentionSummary
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self.events)
+
+    def of_kind(self, *kinds: str) -> Iterator[Event]:
+        """Events of the given kinds, in log order."""
+        return (event for event in self.events if event[0] in kinds)
+
+
+class LogEventCache:
+    """Parses logs into events at most once per file identity.
+
+    Results are persisted in CACHE_DIR next to the logs; nothing is kept in
+    memory between parses, so a process reading many logs holds one at a
+    time. A partial last line (a log still being written) is parsed but
+    never cached, so the next parse re-reads it whole.
+    """
+
+    CACHE_VERSION = 2
+    CACHE_DIR = ".events-cache"
+    CACHE_SUFFIX = ".events"
+    # Sidecars written next to the logs by earlier versions
+    LEGACY_SIDECAR_PATTERNS = ("*.log.events", "*.log.checkpoint.json")
+    READ_BLOCK_SIZE = 1 << 20
+    TAIL_DIGEST_BYTES = 1024
+
+    def __init__(self, parser_class=LogEventParser):
+        self.parser_class = parser_class
+
+    def parse(self, log_path: Union[str, Path], use_cache: bool = True, incremental: bool = False) -> ParsedLog:
+        """Events of log_path, reusing an earlier parse of the same file.
+
+        A cached parse is reused when the file's identity is unchanged.
+        With incremental=True it is also resumed when the file has only been
+        appended to (same inode, not shorter, same bytes before the cached
+        offset).
+        """
+        log_path = Path(log_path)
+        identity = file_identity(log_path)
+
+        parser = self.parser_class()
+        state, cached_identity = None, None
+        if use_cache:
+            state, cached_identity = self._load(log_path, identity, incremental, parser)
+        cached_offset = state.offset if state is not None else None
+        if state is None:
+            state = parser.new_state()
+
+        pending = b""
+        with open(log_path, "rb") as log_file:
+            log_file.seek(state.offset)
+            while True:
+                block = log_file.read(self.READ_BLOCK_SIZE)
+                if not block:
+                    break
+                pending += block
+                end = pending.rfind(b"\n") + 1
+                if end:
+                    parser.parse_block(pending[:end], state)
+                    state.offset += end
+                    pending = pending[end:]
+
+        if use_cache and (state.offset != cached_offset or cached_identity != identity):
+            self._save(log_path, identity, state, parser.events)
+
+        complete_events = len(parser.events)
+        resume_state = state.copy()
+        if pending:
+            parser.parse_block(pending + b"\n", state)
+
+        return ParsedLog(log_path, identity, parser.events, complete_events, resume_state, state.mentions)
+
+    def _cache_version(self) -> str:
+        # marshal's format is only stable within one Python version
+        return f"{self.CACHE_VERSION}-py{sys.version_info[0]}.{sys.version_info[1]}"
+
+    def _cache_path(self, log_path: Path) -> Path:
+        return log_path.parent / self.CACHE_DIR / (log_path.name + self.CACHE_SUFFIX)
+
+    def prune(self, log_dir: Union[str, Path]) -> int:
+        """Delete the cache entries of logs no longer in log_dir, and legacy sidecars.
+
+        Returns the number of files removed.
+        """
+        log_dir = Path(log_dir)
+        stale = [
+            path for path in (log_dir / self.CACHE_DIR).glob("*" + self.CACHE_SUFFIX)
+            if not (log_dir / path.name[:-len(self.CACHE_SUFFIX)]).exists()
+        ]
+        for pattern in self.LEGACY_SIDECAR_PATTERNS:
+            stale.extend(log_dir.glob(pattern))
+
+        removed = 0
+        for path in stale:
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Could not remove parse cache {path}: {e}")
+        return removed
+
+    def _tail_digest(self, log_path: Path, offset: int) -> str:
+        """Fingerprint the bytes just before offset to detect rewritten logs."""
+        start = max(0, offset - self.TAIL_DIGEST_BYTES)
+        with open(log_path, "rb") as f:
+            f.seek(start)
+            return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+    def _load(
+        self, log_path: Path, identity: FileIdentity, incremental: bool, parser: LogEventParser
+    ) -> Tuple[Optional[ParserState], Optional[FileIdentity]]:
+        """Restore cached events into parser.
+
+        Returns the state to resume from and the identity the cache was
+        written for, or (None, None) to parse from byte zero when there is
+        no usable cache.
+        """
+        cache_path = self._cache_path(log_path)
+        if not cache_path.exists():
+            return None, None
+
+        try:
+            with open(cache_path, "rb") as f:
+                # marshal.load() on a file object reads in tiny chunks
+                cached = marshal.loads(f.read())
+
+            if cached.get("version") != self._cache_version():
+                return None, None
+            offset = cached["offset"]
+            cached_identity = tuple(cached["identity"])
+            if cached_identity != identity:
+                appended = (
+                    incremental
+                    and cached_identity[:2] == identity[:2]
+                    and identity[2] >= offset
+                    and cached["tail_digest"] == self._tail_digest(log_path, offset)
+                )
+                if not appended:
+                    return None, None
+
+            saved_state = cached["state"]
+            state = ParserState(
+                offset=offset,
+                current_test_class=saved_state["current_test_class"],
+                current_test_name=saved_state["current_test_name"],
+                recent_lines=deque(saved_state["recent_lines"], maxlen=parser.CONTEXT_LINES),
+                mentions=MentionSummary(**saved_state["mentions"]),
+            )
+            events = cached["events"]
+        except (OSError, EOFError, ValueError, KeyError, TypeError, AttributeError):
+            return None, None
+
+        parser.events.extend(events)
+        return state, cached_identity
+
+    def _save(self, log_path: Path, identity: FileIdentity, state: ParserState, events: List[Event]) -> None:
+        """Write the cache file for log_path atomically."""
+        cache = {
+            "version": self._cache_version(),
+            "identity": list(identity),
+            "offset": state.offset,
+            "tail_digest": self._tail_digest(log_path, state.offset),
+            "state": {
+                "current_test_class": state.current_test_class,
+                "current_test_name": state.current_test_name,
+                "recent_lines": list(state.recent_lines),
+                "mentions": asdict(state.mentions),
+            },
+            "events": events,
+        }
+
+        cache_path = self._cache_path(log_path)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(marshal.dumps(cache))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write parse cache {cache_path}: {e}")
+
+
+_default_cache = LogEventCache()
+
+
+class LogFollower:
+    """Follows one growing log, parsing only bytes appended since the last poll.
+
+    The first poll starts from the cached parse of the file. A partial last
+    line is held back until its newline arrives, or until flush(). When the file is
+    truncated, replaced or removed, the follower starts over and poll()
+    reports a reset.
+    """
+
+    def __init__(self, log_path: Union[str, Path], cache: Optional[LogEventCache] = None):
+        self.path = Path(log_path)
+        self.cache = cache or _default_cache
+        self.identity: Optional[FileIdentity] = None
+        self.state: Optional[ParserState] = None
+
+    def poll(self) -> Tuple[List[Event], bool]:
+        """(new events, reset) since the previous poll.
+
+        With reset=True the events replace everything returned before.
+        """
+        try:
+            identity = file_identity(self.path)
+        except FileNotFoundError:
+            reset = self.state is not None
+            self.identity = self.state = None
+            return [], reset
+
+        if self.state is None or identity[:2] != self.identity[:2] or identity[2] < self.state.offset:
+            reset = self.state is not None
+            parsed = self.cache.parse(self.path, incremental=True)
+            self.identity = parsed.identity
+            self.state = parsed.resume_state.copy()
+            return parsed.events[:parsed.complete_events], reset
+
+        self.identity = identity
+        if identity[2] == self.state.offset:
+            return [], False
+
+        with open(self.path, "rb") as log_file:
+            log_file.seek(self.state.offset)
+            data = log_file.read()
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return [], False
+
+        parser = self.cache.parser_class()
+        parser.parse_block(data[:end], self.state)
+        self.state.offset += end
+        return parser.events, False
+
+    def flush(self) -> List[Event]:
+        """Events of everything after the last poll, including a partial last line.
+
+        For when the log is finished (e.g. the final report): the partial
+        line is parsed as if it were complete, like a one-shot parse does.
+        Call poll() first to pick up a replaced or truncated file.
+        """
+        if self.state is None:
+            return []
+        try:
+            identity = file_identity(self.path)
+        except FileNotFoundError:
+            return []
+        if identity[2] <= self.state.offset:
+            return []
+
+        with open(self.path, "rb") as log_file:
+            log_file.seek(self.state.offset)
+            data = log_file.read()
+        self.identity = identity
+        self.state.offset += len(data)
+        parser = self.cache.parser_class()
+        parser.parse_block(data if data.endswith(b"\n") else data + b"\n", self.state)
+        return parser.events
+
+
+def parse_log(log_path: Union[str, Path], use_cache: bool = True, incremental: bool = False) -> ParsedLog:
+    """Events of one log through the process-wide LogEventCache."""
+    return _default_cache.parse(log_path, use_cache=use_cache, incremental=incremental)
+
+
+def prune_cache(log_dir: Union[str, Path]) -> int:
+    """Delete stale parse cache files of log_dir through the process-wide LogEventCache."""
+    return _default_cache.prune(log_dir)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: log_events.py <log-file>")
+        return 1
+
+    parsed = parse_log(sys.argv[1])
+    counts = Counter(event[0] for event in parsed)
+    print(f"{parsed.path}: {len(parsed.events)} events")
+    for kind, count in sorted(counts.items()):
+        print(f"  {kind:<14} {count}")
+    mentions = parsed.mentions
+    print(f"Mentions: {mentions.failure_count} failures, {mentions.error_count} errors, "
+          f"{mentions.test_count} test cases")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
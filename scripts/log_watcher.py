@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Directory watchers for the Craig-O-Clean report daemon
+
+Reports which log files in one directory changed, so the report generator
+can follow growing logs without rescanning them:
+
+- InotifyWatcher: Linux inotify through ctypes, one watch on the directory
+- KqueueWatcher: BSD/macOS kqueue (select.kqueue), one vnode watch per file
+  plus one on the directory for files being created or removed
+- PollingWatcher: stat() comparison every poll interval, used when neither
+  is available
+
+Every watcher has the same interface: wait(timeout) returns the names of
+matching files that changed (possibly empty), and close() releases it.
+
+Usage:
+    python3 scripts/log_watcher.py <directory> [--pattern '*.log'] [--poll]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Set, Tuple, Union
+
+
+class PollingWatcher:
+    """Detects changes by comparing file identity and size every interval."""
+
+    def __init__(self, directory: Union[str, Path], pattern: str = "*.log", interval: float = 0.25):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int, int]]:
+        snapshot = {}
+        try:
+            entries = os.scandir(self.directory)
+        except OSError:
+            return snapshot
+        with entries:
+            for entry in entries:
+                if not fnmatch.fnmatch(entry.name, self.pattern):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.name] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                name for name in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(name) != self._snapshot.get(name)
+            }
+            self._snapshot = snapshot
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watch on one directory, through ctypes."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+    READ_SIZE = 1 << 16
+
+    def __init__(self, directory: Union[str, Path], pattern: str = "*.log"):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.directory = Path(directory)
+        self.pattern = pattern
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(self.directory), self.WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {self.directory}")
+
+    def wait(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, self.READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="surrogateescape")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    # Events were dropped: treat every matching file as changed
+                    changed.update(
+                        path.name for path in self.directory.iterdir() if fnmatch.fnmatch(path.name, self.pattern)
+                    )
+                elif name and fnmatch.fnmatch(name, self.pattern):
+                    changed.add(name)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class KqueueWatcher:
+    """kqueue vnode watches on a directory and each matching file in it."""
+
+    FILE_FLAGS = (
+        getattr(select, "KQ_NOTE_WRITE", 0) | getattr(select, "KQ_NOTE_EXTEND", 0)
+        | getattr(select, "KQ_NOTE_DELETE", 0) | getattr(select, "KQ_NOTE_RENAME", 0)
+    )
+    # Open for event notification only, so watched files can still be deleted
+    OPEN_FLAGS = getattr(os, "O_EVTONLY", os.O_RDONLY)
+
+    def __init__(self, directory: Union[str, Path], pattern: str = "*.log"):
+        if not hasattr(select, "kqueue"):
+            raise OSError("kqueue is not available")
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.kq = select.kqueue()
+        self.dir_fd = os.open(self.directory, self.OPEN_FLAGS)
+        self._register(self.dir_fd, select.KQ_NOTE_WRITE)
+        self.files: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._rescan()
+
+    def _register(self, fd: int, fflags: int) -> None:
+        event = select.kevent(
+            fd,
+            filter=select.KQ_FILTER_VNODE,
+            flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+            fflags=fflags,
+        )
+        self.kq.control([event], 0, 0)
+
+    def _rescan(self) -> Set[str]:
+        """Watch new matching files and drop removed ones; return both sets."""
+        present = {path.name for path in self.directory.iterdir() if fnmatch.fnmatch(path.name, self.pattern)}
+        changed = set()
+        for name in present - self.files.keys():
+            try:
+                fd = os.open(self.directory / name, self.OPEN_FLAGS)
+            except OSError:
+                continue
+            self._register(fd, self.FILE_FLAGS)
+            self.files[name] = fd
+            self._names[fd] = name
+            changed.add(name)
+        for name in self.files.keys() - present:
+            self._forget(name)
+            changed.add(name)
+        return changed
+
+    def _forget(self, name: str) -> None:
+        fd = self.files.pop(name)
+        del self._names[fd]
+        os.close(fd)  # Closing the descriptor also removes its kevent
+
+    def wait(self, timeout: float) -> Set[str]:
+        events = self.kq.control(None, 64, max(timeout, 0))
+        changed = set()
+        rescan = False
+        for event in events:
+            if event.ident == self.dir_fd:
+                rescan = True
+                continue
+            name = self._names.get(event.ident)
+            if name is None:
+                continue
+            changed.add(name)
+            if event.fflags & (select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME):
+                # Replaced or removed: watch whatever now has this name
+                self._forget(name)
+                rescan = True
+        if rescan:
+            changed |= self._rescan()
+        return changed
+
+    def close(self) -> None:
+        for name in list(self.files):
+            self._forget(name)
+        os.close(self.dir_fd)
+        self.kq.close()
+
+
+def open_watcher(directory: Union[str, Path], pattern: str = "*.log", poll_interval: float = 0.25,
+                 native: bool = True):
+    """The best available watcher for directory, falling back to polling."""
+    if native:
+        for watcher_class in (InotifyWatcher, KqueueWatcher):
+            try:
+                return watcher_class(directory, pattern)
+            except (OSError, AttributeError):
+                continue
+    return PollingWatcher(directory, pattern, poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print log files as they change")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--pattern", default="*.log")
+    parser.add_argument("--poll", action="store_true", help="Use the polling watcher")
+    args = parser.parse_args()
+
+    watcher = open_watcher(args.directory, args.pattern, native=not args.poll)
+    print(f"Watching {args.directory} with {type(watcher).__name__} (Ctrl-C to stop)")
+    try:
+        while True:
+            for name in sorted(watcher.wait(1.0)):
+                print(f"{time.strftime('%H:%M:%S')} {name}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,964 @@
+#!/usr/bin/env python3
+"""
+Lossless reader and writer for Xcode project files (project.pbxproj)
+
+project.pbxproj is an OpenStep ("old-style ASCII") property list. This
+module tokenizes it into a tree of PBXDict / PBXArray / str values that
+keeps every byte of whitespace and every comment, so:
+
+- an unmodified project serializes back byte-for-byte, and
+- after an edit only the changed containers are re-rendered (in Xcode's
+  layout, with Xcode's /* name */ comments); everything else is copied
+  from the original text.
+
+XcodeProject adds the object graph on top: objects indexed by UUID (the
+objects dictionary itself) and by isa, section-aware insertion and
+removal of objects, and the few operations the project sync scripts
+need (groups, file references, build files).
+
+Usage:
+    python3 scripts/pbxplist.py <project.xcodeproj|project.pbxproj> [--check]
+"""
+
+import argparse
+import bisect
+import os
+import re
+import sys
+import uuid
+from collections.abc import MutableMapping, MutableSequence
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Whitespace and comments (a comment cannot run past its first "*/")
+TRIVIA = r"\s*(?:(?:/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|//[^\n]*)\s*)*"
+QUOTED_STRING = r'"([^"\\]*(?:\\.[^"\\]*)*)"'
+# Unquoted strings may contain "/" but not start a comment; written so
+# that a failed match cannot backtrack exponentially
+BARE = r"(?:[\w$+:.\-]|/(?![/*]))[\w$+:.\-]*(?:/(?![/*])[\w$+:.\-]*)*"
+UNQUOTED_STRING_TOKEN = rf"({BARE})"
+
+# Trivia, then one token: punctuation, a quoted string, an unquoted string
+# or the end of the text
+TOKEN = re.compile(rf"({TRIVIA})(?:([{{}}()=;,])|{QUOTED_STRING}|{UNQUOTED_STRING_TOKEN}|(\Z))", re.S)
+PUNCTUATION, QUOTED, UNQUOTED, END = 2, 3, 4, 5
+
+# Whole "key = string;" dictionary entries and "string," array elements,
+# which are most of a project, in one match each
+STRING = rf'(?:"[^"\\]*(?:\\.[^"\\]*)*"|{BARE})'
+SIMPLE_ENTRY = re.compile(rf"({TRIVIA})({STRING})({TRIVIA}={TRIVIA})({STRING})({TRIVIA};)", re.S)
+SIMPLE_ELEMENT = re.compile(rf"({TRIVIA})({STRING})({TRIVIA},)", re.S)
+
+# "key = " before a container, and the ";" after it
+CONTAINER_ENTRY = re.compile(rf"({TRIVIA})({STRING})({TRIVIA}={TRIVIA})(?=[{{(])", re.S)
+SEMICOLON = re.compile(rf"{TRIVIA};", re.S)
+
+# Everything up to the next bracket outside strings and comments, used to
+# skip over lazily parsed containers
+SKIP = re.compile(rf'(?:[^{{}}()"/]+|"[^"\\]*(?:\\.[^"\\]*)*"|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|//[^\n]*|/(?![/*]))*')
+# "{ isa = X;" at the start of an object
+LEADING_ISA = re.compile(rf"\{{{TRIVIA}isa{TRIVIA}={TRIVIA}({STRING}){TRIVIA};")
+
+# Strings Xcode writes without quotes
+UNQUOTED_STRING = re.compile(r"[A-Za-z0-9_./]+")
+ESCAPE = re.compile(r'\\(U[0-9a-fA-F]{4}|[0-7]{1,3}|.)', re.S)
+ESCAPES = {"a": "\a", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+QUOTE_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\t": "\\t", "\r": "\\r"}
+SECTION_END = re.compile(r"\A(.*/\* End \S+ section \*/)", re.S)
+
+
+class PBXParseError(ValueError):
+    """The text is not a well-formed OpenStep property list."""
+
+
+def _unescape(match: "re.Match") -> str:
+    code = match.group(1)
+    if code[0] == "U" and len(code) == 5:
+        return chr(int(code[1:], 16))
+    if code[0] in "01234567":
+        return chr(int(code, 8))
+    return ESCAPES.get(code, code)
+
+
+def decode_string(body: str) -> str:
+    """Value of a quoted string, given the text between the quotes."""
+    return ESCAPE.sub(_unescape, body) if "\\" in body else body
+
+
+def quote(value: str) -> str:
+    """value as Xcode writes it: bare if it is a plain word or path, quoted otherwise."""
+    if UNQUOTED_STRING.fullmatch(value):
+        return value
+    return '"' + "".join(QUOTE_ESCAPES.get(char, char) for char in value) + '"'
+
+
+class _Entry:
+    """One member of a container with the original text around it.
+
+    A dictionary entry is prefix key middle value suffix trailer, where
+    middle runs from the key to the value (" /* comment */ = ") and
+    suffix from the value through the ";". Array elements have no key or
+    middle and a "," suffix. None means "generate in Xcode's layout";
+    raw is the original text of a string value.
+    """
+
+    __slots__ = ("prefix", "key", "key_raw", "middle", "value", "raw", "suffix", "trailer")
+
+    def __init__(self, value: Any, key: Optional[str] = None):
+        self.prefix: Optional[str] = None
+        self.key = key
+        self.key_raw: Optional[str] = None
+        self.middle: Optional[str] = None
+        self.value = value
+        self.raw: Optional[str] = None
+        self.suffix: Optional[str] = None
+        # "\n/* End X section */" after the ";" of the last object of a section
+        self.trailer = ""
+
+
+class _Lazy:
+    """A container not parsed yet: its text is source[start:end]."""
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+
+
+class _Container:
+    __slots__ = ("_doc", "_parent", "_span", "_dirty", "_close", "_inline", "_entries")
+
+    def __init__(self):
+        self._doc: Optional["PlistDocument"] = None
+        self._parent: Optional["_Container"] = None
+        self._span: Optional[Tuple[int, int]] = None  # Original text of an unmodified container
+        self._dirty = True
+        self._close: Optional[str] = None  # Trivia before the closing bracket
+        self._inline: Optional[bool] = None  # One line (True), multi-line (False) or by convention (None)
+
+    def _touch(self) -> None:
+        """Mark this container and its ancestors for re-rendering."""
+        node = self
+        while node is not None and not node._dirty:
+            node._dirty = True
+            node = node._parent
+        if self._doc is not None:
+            self._doc.modified = True
+
+    def _adopt(self, value: Any) -> Any:
+        """value as a plist value owned by this container."""
+        if isinstance(value, _Container):
+            value._parent = self
+            value._set_doc(self._doc)
+            return value
+        if isinstance(value, str):
+            return value
+        if isinstance(value, int):
+            return str(value)
+        if isinstance(value, dict) or isinstance(value, MutableMapping):
+            container = PBXDict()
+        elif isinstance(value, (list, tuple)):
+            container = PBXArray()
+        else:
+            raise TypeError(f"Unsupported plist value: {value!r}")
+        container._parent = self
+        container._set_doc(self._doc)
+        if isinstance(container, PBXDict):
+            for key, item in value.items():
+                container[key] = item
+        else:
+            container.extend(value)
+        return container
+
+    def _value(self, entry: _Entry) -> Any:
+        """entry's value, parsing it first if it was skipped."""
+        value = entry.value
+        if type(value) is _Lazy:
+            value = entry.value = _Parser(self._doc.source, self._doc).parse_lazy(value, self)
+        return value
+
+    def _set_doc(self, doc: Optional["PlistDocument"]) -> None:
+        if self._doc is doc:
+            return
+        self._doc = doc
+        for entry in self._entries:
+            self._value(entry)
+            if isinstance(entry.value, _Container):
+                entry.value._set_doc(doc)
+
+
+class PBXDict(_Container, MutableMapping):
+    """An ordered plist dictionary that remembers its original text."""
+
+    __slots__ = ("_index",)
+
+    def __init__(self, items: Optional[Dict[str, Any]] = None):
+        _Container.__init__(self)
+        self._entries: List[_Entry] = []
+        self._index: Dict[str, _Entry] = {}
+        if items:
+            for key, value in items.items():
+                self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        return self._value(self._index[key])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        entry = self._index.get(key)
+        value = self._adopt(value)
+        if entry is None:
+            self.insert_entry(len(self._entries), key, value)
+            return
+        if entry.value is value:
+            return
+        entry.value = value
+        entry.raw = None
+        if entry.suffix is not None and "/*" in entry.suffix:
+            entry.suffix = None  # The comment described the old value
+        self._touch()
+
+    def __delitem__(self, key: str) -> None:
+        entry = self._index.pop(key)
+        position = self._entries.index(entry)
+        del self._entries[position]
+        # Keep section comments: a removed first object hands its
+        # "Begin" comment to the next object, a removed last object its
+        # "End" comment to the previous one
+        if entry.prefix is not None and "/* Begin " in entry.prefix and not entry.trailer:
+            if position < len(self._entries):
+                self._entries[position].prefix = entry.prefix
+        if entry.trailer and (entry.prefix is None or "/* Begin " not in entry.prefix):
+            if position > 0:
+                self._entries[position - 1].trailer = entry.trailer
+        self._touch()
+
+    def __iter__(self) -> Iterator[str]:
+        return (entry.key for entry in self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __repr__(self) -> str:
+        return f"PBXDict({dict(self.items())!r})"
+
+    def insert_entry(self, position: int, key: str, value: Any) -> _Entry:
+        """Add key before the entry at position (all text generated)."""
+        if key in self._index:
+            raise KeyError(f"Duplicate key: {key}")
+        entry = _Entry(self._adopt(value), key)
+        self._entries.insert(position, entry)
+        self._index[key] = entry
+        self._touch()
+        return entry
+
+
+class PBXArray(_Container, MutableSequence):
+    """A plist array that remembers its original text."""
+
+    __slots__ = ()
+
+    def __init__(self, items: Iterable[Any] = ()):
+        _Container.__init__(self)
+        self._entries: List[_Entry] = []
+        self.extend(items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._value(entry) for entry in self._entries[index]]
+        return self._value(self._entries[index])
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            raise TypeError("PBXArray does not support slice assignment")
+        entry = self._entries[index]
+        entry.value = self._adopt(value)
+        entry.raw = None
+        if entry.suffix is not None and "/*" in entry.suffix:
+            entry.suffix = None
+        self._touch()
+
+    def __delitem__(self, index) -> None:
+        del self._entries[index]
+        self._touch()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"PBXArray({list(self)!r})"
+
+    def insert(self, index: int, value: Any) -> None:
+        self._entries.insert(index, _Entry(self._adopt(value)))
+        self._touch()
+
+    def remove_all(self, values: Iterable[str]) -> int:
+        """Remove every element in values; return how many were removed."""
+        values = set(values)
+        kept = [entry for entry in self._entries if not (isinstance(entry.value, str) and entry.value in values)]
+        removed = len(self._entries) - len(kept)
+        if removed:
+            self._entries = kept
+            self._touch()
+        return removed
+
+
+class PlistDocument:
+    """A parsed property list: header trivia, root value and footer trivia."""
+
+    def __init__(self, text: str, lazy_depth: Optional[int] = None):
+        self.source = text
+        self.modified = False
+        # Returns the /* comment */ written after a generated object id
+        self.comment_for: Optional[Callable[[str], Optional[str]]] = None
+        # Containers at lazy_depth (the root is depth 0) are only parsed when accessed
+        parser = _Parser(text, self, lazy_depth)
+        self.header, self.root, self.footer = parser.parse_document()
+
+    def to_text(self, full: bool = False) -> str:
+        """The document as text; full re-renders unmodified containers too."""
+        if not self.modified and not full:
+            return self.source
+        out = [self.header]
+        _Renderer(self, full).render(self.root, 0, out)
+        out.append(self.footer)
+        return "".join(out)
+
+
+class _Parser:
+    def __init__(self, text: str, doc: PlistDocument, lazy_depth: Optional[int] = None):
+        self.text = text
+        self.doc = doc
+        self.lazy_depth = lazy_depth
+        self.depth = 0
+        self.pos = 0
+
+    def next_token(self) -> "re.Match":
+        match = TOKEN.match(self.text, self.pos)
+        if match is None:
+            raise PBXParseError(f"Unexpected character at offset {self.pos}: {self.text[self.pos:self.pos + 20]!r}")
+        self.pos = match.end()
+        return match
+
+    def parse_document(self) -> Tuple[str, Any, str]:
+        match = self.next_token()
+        if match.lastindex == END:
+            raise PBXParseError("Empty property list")
+        header = match.group(1)
+        root, _ = self.parse_value(match, None)
+        self.depth = 0
+        footer = self.next_token()
+        if footer.lastindex != END:
+            raise PBXParseError(f"Unexpected {footer.group(0).strip()!r} after the root value at offset {footer.start()}")
+        return header, root, footer.group(1)
+
+    def parse_value(self, match: "re.Match", parent: Optional[_Container]) -> Tuple[Any, Optional[str]]:
+        """(value, raw text) for the value starting with the token in match."""
+        kind = match.lastindex
+        if kind == UNQUOTED:
+            raw = match.group(UNQUOTED)
+            return raw, raw
+        if kind == QUOTED:
+            return decode_string(match.group(QUOTED)), match.group(0)[len(match.group(1)):]
+        if kind == PUNCTUATION:
+            char = match.group(PUNCTUATION)
+            if char in "{(":
+                start = match.end() - 1
+                if self.depth == self.lazy_depth:
+                    return _Lazy(start, self.skip_container(start)), None
+                self.depth += 1
+                node = self.parse_dict(start, parent) if char == "{" else self.parse_array(start, parent)
+                self.depth -= 1
+                return node, None
+        raise PBXParseError(f"Expected a value at offset {match.start(kind or 1)}")
+
+    def skip_container(self, start: int) -> int:
+        """Offset just past the container starting at start."""
+        text = self.text
+        skip = SKIP.match
+        depth = 0
+        pos = start
+        while True:
+            char = text[pos:pos + 1]
+            if char in ("{", "("):
+                depth += 1
+            elif char in ("}", ")"):
+                depth -= 1
+                if not depth:
+                    self.pos = pos + 1
+                    return self.pos
+            else:
+                raise PBXParseError(f"Unterminated container starting at offset {start}")
+            pos = skip(text, pos + 1).end()
+
+    def parse_lazy(self, lazy: _Lazy, parent: _Container) -> _Container:
+        self.pos = lazy.start + 1
+        if self.text[lazy.start] == "{":
+            return self.parse_dict(lazy.start, parent)
+        return self.parse_array(lazy.start, parent)
+
+    def _container(self, container: _Container, start: int, parent: Optional[_Container]) -> None:
+        container._doc = self.doc
+        container._parent = parent
+        container._dirty = False
+
+    def expect(self, char: str, context: str) -> "re.Match":
+        match = self.next_token()
+        if match.lastindex != PUNCTUATION or match.group(PUNCTUATION) != char:
+            raise PBXParseError(f"Expected {char!r} {context} at offset {match.end(1)}")
+        return match
+
+    def parse_dict(self, start: int, parent: Optional[_Container]) -> PBXDict:
+        node = PBXDict()
+        self._container(node, start, parent)
+        entries = node._entries
+        index = node._index
+        text = self.text
+        simple_entry = SIMPLE_ENTRY.match
+        # Values of this dictionary are skipped rather than parsed
+        container_entry = CONTAINER_ENTRY.match if self.depth == self.lazy_depth else None
+        inline = True
+        while True:
+            # Fast paths: "key = string;" in one match, "key = {...};" with
+            # the container skipped when it is parsed lazily
+            lazy = container_entry(text, self.pos) if container_entry is not None else None
+            simple = simple_entry(text, self.pos) if lazy is None else None
+            if simple is not None:
+                self.pos = simple.end()
+                prefix, key_raw, middle, raw, suffix = simple.groups()
+                key = decode_string(key_raw[1:-1]) if key_raw[0] == '"' else key_raw
+                value = decode_string(raw[1:-1]) if raw[0] == '"' else raw
+            elif lazy is not None:
+                prefix, key_raw, middle = lazy.groups()
+                key = decode_string(key_raw[1:-1]) if key_raw[0] == '"' else key_raw
+                value, raw = _Lazy(lazy.end(), self.skip_container(lazy.end())), None
+                semicolon = SEMICOLON.match(text, self.pos)
+                if semicolon is None:
+                    raise PBXParseError(f"Expected ';' after the value of {key!r} at offset {self.pos}")
+                self.pos = semicolon.end()
+                suffix = semicolon.group(0)
+            else:
+                match = self.next_token()
+                prefix = match.group(1)
+                if match.lastindex == PUNCTUATION and match.group(PUNCTUATION) == "}":
+                    if "/* End " in prefix and entries:
+                        prefix = self._split_section_end(prefix, entries[-1])
+                    node._close = prefix
+                    break
+                if match.lastindex not in (UNQUOTED, QUOTED):
+                    raise PBXParseError(f"Expected a key at offset {match.end(1)}")
+                key, key_raw = self.parse_value(match, node)
+                equals = self.expect("=", f"after {key!r}")
+                value_match = self.next_token()
+                middle = equals.group(0) + value_match.group(1)
+                value, raw = self.parse_value(value_match, node)
+                suffix = self.expect(";", f"after the value of {key!r}").group(0)
+
+            if "/* End " in prefix and entries:
+                prefix = self._split_section_end(prefix, entries[-1])
+            if inline and "\n" in prefix:
+                inline = False
+            if key in index:
+                raise PBXParseError(f"Duplicate key {key!r} before offset {self.pos}")
+            entry = _Entry(value, key)
+            entry.prefix = prefix
+            entry.key_raw = key_raw
+            entry.middle = middle
+            entry.raw = raw
+            entry.suffix = suffix
+            entries.append(entry)
+            index[key] = entry
+        node._inline = inline and "\n" not in node._close
+        node._span = (start, self.pos)
+        return node
+
+    def parse_array(self, start: int, parent: Optional[_Container]) -> PBXArray:
+        node = PBXArray()
+        self._container(node, start, parent)
+        entries = node._entries
+        text = self.text
+        simple_element = SIMPLE_ELEMENT.match
+        inline = True
+        while True:
+            # Fast path: string, in one match
+            simple = simple_element(text, self.pos)
+            if simple is not None:
+                self.pos = simple.end()
+                prefix, raw, suffix = simple.groups()
+                value = decode_string(raw[1:-1]) if raw[0] == '"' else raw
+            else:
+                match = self.next_token()
+                prefix = match.group(1)
+                if match.lastindex == PUNCTUATION and match.group(PUNCTUATION) == ")":
+                    node._close = prefix
+                    break
+                value, raw = self.parse_value(match, node)
+                separator = self.next_token()
+                if separator.lastindex != PUNCTUATION or separator.group(PUNCTUATION) not in ",)":
+                    raise PBXParseError(f"Expected ',' or ')' at offset {separator.end(1)}")
+                if separator.group(PUNCTUATION) == ")":
+                    # Last element without a trailing comma
+                    entry = _Entry(value)
+                    entry.prefix = prefix
+                    entry.raw = raw
+                    entry.suffix = ""
+                    entries.append(entry)
+                    node._close = separator.group(1)
+                    break
+                suffix = separator.group(0)
+
+            if inline and "\n" in prefix:
+                inline = False
+            entry = _Entry(value)
+            entry.prefix = prefix
+            entry.raw = raw
+            entry.suffix = suffix
+            entries.append(entry)
+        node._inline = inline and "\n" not in node._close
+        node._span = (start, self.pos)
+        return node
+
+    @staticmethod
+    def _split_section_end(trivia: str, previous: _Entry) -> str:
+        """Move an "End X section" comment to the entry it closes."""
+        match = SECTION_END.match(trivia)
+        previous.trailer = match.group(1)
+        return trivia[match.end():]
+
+
+class _Renderer:
+    """Writes a tree back out, copying unmodified containers verbatim."""
+
+    def __init__(self, doc: PlistDocument, full: bool = False):
+        self.source = doc.source
+        self.comment_for = doc.comment_for
+        self.full = full
+
+    def comment(self, value: str) -> str:
+        if self.comment_for is None:
+            return ""
+        comment = self.comment_for(value)
+        return f" /* {comment} */" if comment else ""
+
+    def render(self, node: Any, depth: int, out: List[str]) -> None:
+        if isinstance(node, str):
+            out.append(quote(node))
+            return
+        if not node._dirty and node._span is not None and not self.full:
+            start, end = node._span
+            out.append(self.source[start:end])
+            return
+
+        is_dict = isinstance(node, PBXDict)
+        inline = node._inline if node._inline is not None else False
+        indent = "\n" + "\t" * (depth + 1)
+        out.append("{" if is_dict else "(")
+        for position, entry in enumerate(node._entries):
+            if entry.prefix is not None:
+                out.append(entry.prefix)
+            elif inline:
+                out.append(" " if position else "")
+            else:
+                out.append(indent)
+            if is_dict:
+                if entry.key_raw is not None:
+                    out.append(entry.key_raw)
+                else:
+                    out.append(quote(entry.key))
+                out.append(entry.middle if entry.middle is not None else self.comment(entry.key) + " = ")
+            value = entry.value
+            if type(value) is _Lazy:
+                if self.full:
+                    value = node._value(entry)
+                else:
+                    out.append(self.source[value.start:value.end])
+            if entry.raw is not None:
+                out.append(entry.raw)
+            elif isinstance(value, str):
+                out.append(quote(value))
+            elif type(value) is not _Lazy:
+                self.render(value, depth + 1, out)
+            if entry.suffix is not None:
+                out.append(entry.suffix)
+            else:
+                if isinstance(value, str):
+                    out.append(self.comment(value))
+                out.append(";" if is_dict else ",")
+            out.append(entry.trailer)
+        if node._close is not None:
+            out.append(node._close)
+        else:
+            out.append(" " if inline and is_dict else "\n" + "\t" * depth)
+        out.append("}" if is_dict else ")")
+
+
+def loads(text: str, lazy_depth: Optional[int] = None) -> PlistDocument:
+    return PlistDocument(text, lazy_depth)
+
+
+# Default display names of build phases, used in /* comments */
+BUILD_PHASE_NAMES = {
+    "PBXSourcesBuildPhase": "Sources",
+    "PBXFrameworksBuildPhase": "Frameworks",
+    "PBXResourcesBuildPhase": "Resources",
+    "PBXHeadersBuildPhase": "Headers",
+    "PBXCopyFilesBuildPhase": "CopyFiles",
+    "PBXShellScriptBuildPhase": "ShellScript",
+}
+
+# Objects Xcode writes on one line
+INLINE_ISAS = {"PBXBuildFile", "PBXFileReference"}
+
+# (lastKnownFileType, build phase isa or None) by file extension
+FILE_TYPES = {
+    ".swift": ("sourcecode.swift", "PBXSourcesBuildPhase"),
+    ".m": ("sourcecode.c.objc", "PBXSourcesBuildPhase"),
+    ".mm": ("sourcecode.cpp.objcpp", "PBXSourcesBuildPhase"),
+    ".c": ("sourcecode.c.c", "PBXSourcesBuildPhase"),
+    ".cpp": ("sourcecode.cpp.cpp", "PBXSourcesBuildPhase"),
+    ".h": ("sourcecode.c.h", None),
+    ".json": ("text.json", "PBXResourcesBuildPhase"),
+    ".plist": ("text.plist.xml", None),
+    ".entitlements": ("text.plist.entitlements", None),
+    ".xcassets": ("folder.assetcatalog", "PBXResourcesBuildPhase"),
+    ".storyboard": ("file.storyboard", "PBXResourcesBuildPhase"),
+    ".xib": ("file.xib", "PBXResourcesBuildPhase"),
+    ".strings": ("text.plist.strings", "PBXResourcesBuildPhase"),
+    ".png": ("image.png", "PBXResourcesBuildPhase"),
+    ".md": ("net.daringfireball.markdown", None),
+}
+
+
+class XcodeProject:
+    """The object graph of a project.pbxproj.
+
+    objects maps UUID -> object dictionary (in file order);
+    objects_of(isa) lists the UUIDs of one isa. Objects added with
+    add_object go into their isa section in UUID order, as Xcode writes
+    them, so saving after an edit produces a minimal diff.
+
+    Object bodies are only tokenized when first accessed; loading just
+    finds where each object ends and reads its isa.
+    """
+
+    # Depth of the object dictionaries (root -> objects -> object)
+    OBJECT_DEPTH = 2
+
+    def __init__(self, text: str, path: Optional[Path] = None):
+        self.path = path
+        self.document = loads(text, lazy_depth=self.OBJECT_DEPTH)
+        self.document.comment_for = self.comment_for
+        self.root: PBXDict = self.document.root
+        self.objects: PBXDict = self.root["objects"]
+        self._by_isa: Dict[str, List[str]] = {}
+        leading_isa = LEADING_ISA.match
+        for entry in self.objects._entries:
+            value = entry.value
+            isa_match = leading_isa(text, value.start) if type(value) is _Lazy else None
+            if isa_match is not None:
+                isa = isa_match.group(1)
+                isa = decode_string(isa[1:-1]) if isa[0] == '"' else isa
+            else:
+                isa = self.objects._value(entry).get("isa")
+            self._by_isa.setdefault(isa, []).append(entry.key)
+        self._has_sections = any(
+            entry.prefix and "/* Begin " in entry.prefix for entry in self.objects._entries
+        )
+        self._phase_names: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "XcodeProject":
+        """Load a project.pbxproj, or the one inside an .xcodeproj directory."""
+        path = Path(path)
+        if path.is_dir():
+            path = path / "project.pbxproj"
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8", errors="surrogateescape")
+        return cls(text, path)
+
+    def to_text(self, full: bool = False) -> str:
+        self._phase_names = None  # Build phases may have changed since the last render
+        return self.document.to_text(full)
+
+    def save(self, path: Union[str, Path, None] = None) -> None:
+        """Write the project atomically (to where it was loaded from by default)."""
+        path = Path(path) if path is not None else self.path
+        tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_text().encode("utf-8", errors="surrogateescape"))
+        os.replace(tmp_path, path)
+
+    @property
+    def modified(self) -> bool:
+        return self.document.modified
+
+    # Lookup
+
+    def get(self, object_id: str) -> Optional[PBXDict]:
+        return self.objects.get(object_id)
+
+    def objects_of(self, isa: str) -> List[str]:
+        """UUIDs of every object of one isa."""
+        return list(self._by_isa.get(isa, ()))
+
+    def items_of(self, isa: str) -> Iterator[Tuple[str, PBXDict]]:
+        objects = self.objects
+        for object_id in self._by_isa.get(isa, ()):
+            yield object_id, objects[object_id]
+
+    @property
+    def project_object(self) -> PBXDict:
+        return self.objects[self.root["rootObject"]]
+
+    @property
+    def main_group(self) -> str:
+        return self.project_object["mainGroup"]
+
+    def targets(self) -> List[str]:
+        return list(self.project_object.get("targets", ()))
+
+    def target_named(self, name: str) -> Optional[str]:
+        for target_id in self.targets():
+            if self.objects[target_id].get("name") == name:
+                return target_id
+        return None
+
+    def build_phase(self, target_id: str, isa: str = "PBXSourcesBuildPhase") -> Optional[str]:
+        """The target's first build phase of one isa."""
+        for phase_id in self.objects[target_id].get("buildPhases", ()):
+            if self.objects[phase_id].get("isa") == isa:
+                return phase_id
+        return None
+
+    def file_references(self, extension: Optional[str] = None) -> List[Tuple[str, PBXDict]]:
+        """(UUID, object) of file references, optionally only paths ending in extension."""
+        return [
+            (object_id, obj) for object_id, obj in self.items_of("PBXFileReference")
+            if extension is None or obj.get("path", "").endswith(extension)
+        ]
+
+    def _mentions(self, object_id: str, text: str) -> bool:
+        """Whether an object may refer to text; unparsed objects are searched as text."""
+        value = self.objects._index[object_id].value
+        if type(value) is _Lazy:
+            return self.document.source.find(text, value.start, value.end) >= 0
+        return True
+
+    def build_files_for(self, file_ref: str) -> List[str]:
+        return [
+            object_id for object_id in self._by_isa.get("PBXBuildFile", ())
+            if self._mentions(object_id, file_ref) and self.objects[object_id].get("fileRef") == file_ref
+        ]
+
+    def display_name(self, object_id: str) -> Optional[str]:
+        obj = self.objects.get(object_id)
+        if obj is None:
+            return None
+        name = obj.get("name") or obj.get("path")
+        if name is None:
+            name = BUILD_PHASE_NAMES.get(obj.get("isa"))
+        return name
+
+    def comment_for(self, object_id: str) -> Optional[str]:
+        """The /* comment */ Xcode writes after a reference to object_id."""
+        obj = self.objects.get(object_id)
+        if obj is None:
+            return None
+        isa = obj.get("isa")
+        if isa == "PBXBuildFile":
+            file_name = self.display_name(obj.get("fileRef") or obj.get("productRef") or "")
+            if self._phase_names is None:
+                self._phase_names = {
+                    build_file: phase.get("name", phase_name)
+                    for phase_isa, phase_name in BUILD_PHASE_NAMES.items()
+                    for _, phase in self.items_of(phase_isa)
+                    for build_file in phase.get("files", ())
+                }
+            phase_name = self._phase_names.get(object_id)
+            return f"{file_name} in {phase_name}" if phase_name else file_name
+        if isa == "PBXProject":
+            return "Project object"
+        return self.display_name(object_id)
+
+    def child_group(self, group_id: str, name: str) -> Optional[str]:
+        """The child group of group_id whose name or path is name."""
+        for child_id in self.objects[group_id].get("children", ()):
+            child = self.objects.get(child_id)
+            if child is not None and child.get("isa") == "PBXGroup" and name in (child.get("name"), child.get("path")):
+                return child_id
+        return None
+
+    def find_group(self, name: str) -> Optional[str]:
+        """The first group anywhere in the project whose name or path is name."""
+        for group_id, group in self.items_of("PBXGroup"):
+            if name in (group.get("name"), group.get("path")):
+                return group_id
+        return None
+
+    def source_paths(self, extension: Optional[str] = None) -> Dict[str, str]:
+        """UUID -> path relative to the project directory, of file references.
+
+        Paths are resolved through the enclosing groups. References outside
+        the source tree (products, SDK frameworks) are left out; absolute
+        paths are kept as they are.
+        """
+        parents: Dict[str, str] = {}
+        for isa in ("PBXGroup", "PBXVariantGroup"):
+            for group_id, group in self.items_of(isa):
+                for child_id in group.get("children", ()):
+                    parents[child_id] = group_id
+
+        paths = {}
+        for file_ref, reference in self.file_references(extension):
+            parts = []
+            object_id, obj = file_ref, reference
+            while obj is not None:
+                source_tree = obj.get("sourceTree")
+                if obj.get("path"):
+                    parts.append(obj["path"])
+                if source_tree != "<group>":
+                    break
+                object_id = parents.get(object_id)
+                obj = self.objects.get(object_id) if object_id is not None else None
+            if source_tree in ("<group>", "SOURCE_ROOT", "<absolute>") and parts:
+                paths[file_ref] = os.path.normpath(os.path.join(*reversed(parts)))
+        return paths
+
+    # Editing
+
+    def generate_id(self) -> str:
+        """A new 24-digit object id not used in this project."""
+        while True:
+            object_id = uuid.uuid4().hex.upper()[:24]
+            if object_id not in self.objects:
+                return object_id
+
+    def add_object(self, obj: Dict[str, Any], object_id: Optional[str] = None) -> str:
+        """Add an object to its isa section; return its UUID."""
+        object_id = object_id or self.generate_id()
+        isa = obj["isa"]
+        objects = self.objects
+        entries = objects._entries
+        section = self._by_isa.setdefault(isa, [])
+        rank = bisect.bisect(section, object_id)
+
+        if section:
+            if rank < len(section):
+                # Before the next object of the section, taking over its
+                # prefix (which may hold the "Begin" comment)
+                anchor = objects._index[section[rank]]
+                position = entries.index(anchor)
+                entry = objects.insert_entry(position, object_id, obj)
+                entry.prefix, anchor.prefix = anchor.prefix, None
+            else:
+                # After the last object, taking over the "End" comment
+                anchor = objects._index[section[-1]]
+                position = entries.index(anchor) + 1
+                entry = objects.insert_entry(position, object_id, obj)
+                entry.trailer, anchor.trailer = anchor.trailer, ""
+        else:
+            # A new section after the sections of isas sorting before it
+            earlier = [name for name, ids in self._by_isa.items() if ids and name < isa]
+            position = 0
+            if earlier:
+                position = entries.index(objects._index[self._by_isa[max(earlier)][-1]]) + 1
+            entry = objects.insert_entry(position, object_id, obj)
+            if self._has_sections:
+                entry.prefix = f"\n\n/* Begin {isa} section */\n\t\t"
+                entry.trailer = f"\n/* End {isa} section */"
+        section.insert(rank, object_id)
+
+        value = entry.value
+        if value._inline is None:
+            value._inline = isa in INLINE_ISAS
+        return object_id
+
+    def remove_objects(self, object_ids: Iterable[str]) -> None:
+        """Remove objects and every array element referring to them."""
+        object_ids = set(object_ids)
+        for object_id in object_ids:
+            obj = self.objects.get(object_id)
+            if obj is None:
+                continue
+            self._by_isa[obj.get("isa")].remove(object_id)
+            del self.objects[object_id]
+        for object_id in self.objects:
+            if not any(self._mentions(object_id, removed) for removed in object_ids):
+                continue
+            for value in self.objects[object_id].values():
+                if isinstance(value, PBXArray) and value:
+                    value.remove_all(object_ids)
+
+    def remove_object(self, object_id: str) -> None:
+        self.remove_objects([object_id])
+
+    def add_group(self, name: str, parent_id: Optional[str] = None) -> str:
+        """Add a group with path name under parent_id (default: the main group)."""
+        parent_id = parent_id or self.main_group
+        group_id = self.add_object({"isa": "PBXGroup", "children": [], "path": name, "sourceTree": "<group>"})
+        self.objects[parent_id]["children"].append(group_id)
+        return group_id
+
+    def get_or_create_group(self, path: str, parent_id: Optional[str] = None) -> str:
+        """The group at a "/"-separated path below parent_id, creating missing groups."""
+        group_id = parent_id or self.main_group
+        for part in path.split("/"):
+            if not part:
+                continue
+            group_id = self.child_group(group_id, part) or self.add_group(part, group_id)
+        return group_id
+
+    def add_file(self, path: str, group_id: Optional[str] = None, target_ids: Iterable[str] = (),
+                 name: Optional[str] = None, source_tree: str = "<group>") -> str:
+        """Add a file reference to a group and to the matching build phase of targets.
+
+        Returns the file reference UUID. The build phase is chosen from
+        the extension (Sources for code, Resources for assets and data).
+        """
+        file_type, phase_isa = FILE_TYPES.get(os.path.splitext(path)[1], ("text", None))
+        reference = {"isa": "PBXFileReference", "lastKnownFileType": file_type}
+        if name is not None and name != path:
+            reference["name"] = name
+        reference["path"] = path
+        reference["sourceTree"] = source_tree
+        file_ref = self.add_object(reference)
+        self.objects[group_id or self.main_group]["children"].append(file_ref)
+
+        if phase_isa is not None:
+            for target_id in target_ids:
+                phase_id = self.build_phase(target_id, phase_isa)
+                if phase_id is None:
+                    continue
+                build_file = self.add_object({"isa": "PBXBuildFile", "fileRef": file_ref})
+                self.objects[phase_id]["files"].append(build_file)
+        return file_ref
+
+    def remove_file(self, file_ref: str) -> None:
+        """Remove a file reference, its build files and its group memberships."""
+        self.remove_objects([file_ref] + self.build_files_for(file_ref))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize an Xcode project file")
+    parser.add_argument("project", type=Path, help="project.pbxproj or .xcodeproj directory")
+    parser.add_argument("--check", action="store_true", help="Exit 1 unless the file round-trips byte-for-byte")
+    args = parser.parse_args()
+
+    try:
+        project = XcodeProject.load(args.project)
+    except PBXParseError as e:
+        print(f"❌ {args.project}: {e}")
+        return 1
+
+    for isa in sorted(project._by_isa):
+        print(f"  {isa:<32} {len(project._by_isa[isa]):>6}")
+    identical = project.to_text(full=True) == project.document.source
+    print("✅ Round-trips byte-for-byte" if identical else "❌ Does not round-trip")
+    return 0 if identical or not args.check else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
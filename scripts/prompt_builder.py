@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Size-bounded Markdown prompt assembly for the Craig-O-Clean test tools
+
+A prompt is fixed text interleaved with sections of optional entries.
+Fixed text is always kept. Entries are admitted one section at a time in
+priority order (most important first) until the character budget is
+spent; after the first entry that does not fit, every lower-priority
+entry is dropped too, so a less important issue is never shown in place
+of a more important one. Each section that lost entries ends with a
+truncation marker, and entries are rendered only when they are admitted,
+so building costs time linear in the entries shown rather than in the
+entries available.
+
+Budgets are in characters; CHARS_PER_TOKEN converts a token budget.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Rough size of a token in English Markdown, for token budgets
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "\n_[truncated: {omitted} of {total} {noun} not shown]_\n"
+
+
+def clip(text: Any, limit: int) -> str:
+    """text, cut to at most limit characters (ending in "...")."""
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return text[:max(limit - 3, 0)] + "..."
+
+
+class PromptSection:
+    """Optional entries of one prompt section, rendered on demand."""
+
+    def __init__(self, noun: str, items: Sequence[Any], render: Callable[[int, Any], str],
+                 priority: int, limit: Optional[int] = None):
+        self.noun = noun
+        self.items = items
+        self.render = render
+        self.priority = priority
+        self.limit = len(items) if limit is None else min(limit, len(items))
+        self.entries: List[str] = []
+
+    @property
+    def omitted(self) -> int:
+        return len(self.items) - len(self.entries)
+
+    def marker(self, omitted: int) -> str:
+        return TRUNCATION_MARKER.format(omitted=omitted, total=len(self.items), noun=self.noun)
+
+
+class PromptBuilder:
+    """Collects prompt parts in document order and builds them within a budget.
+
+    With budget None only the per-section limits apply. A budget smaller
+    than the fixed text plus the truncation markers yields just those.
+    """
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self._parts: List[Any] = []  # str (fixed text) or PromptSection
+
+    def text(self, text: str) -> None:
+        self._parts.append(text)
+
+    def section(self, noun: str, items: Sequence[Any], render: Callable[[int, Any], str],
+                priority: int, limit: Optional[int] = None) -> PromptSection:
+        """Add entries rendered by render(number, item), numbered from 1."""
+        section = PromptSection(noun, items, render, priority, limit)
+        self._parts.append(section)
+        return section
+
+    def build(self) -> str:
+        sections = [part for part in self._parts if isinstance(part, PromptSection)]
+
+        # Room left once fixed text and the largest possible markers are reserved
+        remaining = None
+        if self.budget is not None:
+            reserved = sum(len(part) for part in self._parts if isinstance(part, str))
+            reserved += sum(len(section.marker(len(section.items))) for section in sections if section.items)
+            remaining = self.budget - reserved
+
+        exhausted = False
+        for section in sorted(sections, key=lambda section: section.priority):
+            section.entries = []
+            for number in range(1, section.limit + 1):
+                if exhausted:
+                    break
+                entry = section.render(number, section.items[number - 1])
+                if remaining is not None:
+                    if len(entry) > remaining:
+                        exhausted = True
+                        break
+                    remaining -= len(entry)
+                section.entries.append(entry)
+
+        pieces = []
+        for part in self._parts:
+            if isinstance(part, str):
+                pieces.append(part)
+                continue
+            pieces.extend(part.entries)
+            if part.omitted:
+                pieces.append(part.marker(part.omitted))
+        return "".join(pieces)
+
+    def omitted(self) -> Dict[str, int]:
+        """Entries left out of the last build, by section noun."""
+        counts: Dict[str, int] = {}
+        for part in self._parts:
+            if isinstance(part, PromptSection) and part.omitted:
+                counts[part.noun] = counts.get(part.noun, 0) + part.omitted
+        return counts
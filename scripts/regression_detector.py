@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Performance regression detection for Craig-O-Clean performance metrics
+
+Compares each operation's latency distribution in the current run with a
+rolling baseline built from previous runs. Both sides are LatencySketch
+histograms, so the comparison is a Mann-Whitney U test over the sketch
+buckets (values sharing a bucket count as ties), which needs no raw
+samples and is insensitive to the outliers that dominate means.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from latency_stats import LatencySketch
+
+
+def mann_whitney_u(current: LatencySketch, baseline: LatencySketch) -> Tuple[float, float, float]:
+    """One-sided Mann-Whitney U test that current tends to be slower.
+
+    Returns (U, z, p_value) where U counts (current, baseline) pairs with
+    current > baseline (ties count half). z uses the normal approximation
+    with tie correction and continuity correction.
+    """
+    n1, n2 = current.count, baseline.count
+    if not n1 or not n2:
+        return 0.0, 0.0, 1.0
+
+    current_bins = dict(current.buckets)
+    baseline_bins = dict(baseline.buckets)
+    # Zero-duration samples sort below every bucket
+    current_bins[-math.inf] = current.zero_count
+    baseline_bins[-math.inf] = baseline.zero_count
+
+    u = 0.0
+    baseline_below = 0
+    tie_term = 0.0
+    for index in sorted(set(current_bins) | set(baseline_bins)):
+        a = current_bins.get(index, 0)
+        b = baseline_bins.get(index, 0)
+        u += a * (baseline_below + b / 2)
+        baseline_below += b
+        ties = a + b
+        tie_term += ties ** 3 - ties
+
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 0.0, 1.0
+
+    mean = n1 * n2 / 2
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    p_value = 0.5 * math.erfc(z / math.sqrt(2))
+    return u, z, p_value
+
+
+class RegressionDetector:
+    """Flags operations whose latency rose significantly against a baseline.
+
+    An operation regresses when the one-sided Mann-Whitney p-value is below
+    alpha, its median rose by at least min_ratio, and both sides have at
+    least min_samples samples. Effect size is reported both as the ratio
+    of medians and as the rank-biserial correlation (-1..1, positive when
+    current samples tend to be slower).
+    """
+
+    ALPHA = 0.01
+    MIN_RATIO = 1.1
+    MIN_SAMPLES = 20
+
+    # Median ratio from which a regression is reported as high severity
+    HIGH_SEVERITY_RATIO = 1.5
+
+    def __init__(self, alpha: float = ALPHA, min_ratio: float = MIN_RATIO, min_samples: int = MIN_SAMPLES):
+        self.alpha = alpha
+        self.min_ratio = min_ratio
+        self.min_samples = min_samples
+
+    def compare(
+        self, operation: str, current: LatencySketch, baseline: LatencySketch, baseline_runs: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """Return a regression record for one operation, or None."""
+        if current.count < self.min_samples or baseline.count < self.min_samples:
+            return None
+
+        current_median = current.quantile(0.5)
+        baseline_median = baseline.quantile(0.5)
+        if baseline_median <= 0:
+            return None
+        median_ratio = current_median / baseline_median
+        if median_ratio < self.min_ratio:
+            return None
+
+        u, z, p_value = mann_whitney_u(current, baseline)
+        if p_value >= self.alpha:
+            return None
+
+        return {
+            "operation": operation,
+            "severity": "high" if median_ratio >= self.HIGH_SEVERITY_RATIO else "medium",
+            "median_ratio": median_ratio,
+            "rank_biserial": 2 * u / (current.count * baseline.count) - 1,
+            "z": z,
+            "p_value": p_value,
+            "baseline_runs": baseline_runs,
+            "current_count": current.count,
+            "baseline_count": baseline.count,
+            "current_p50": current_median,
+            "baseline_p50": baseline_median,
+            "current_p95": current.quantile(0.95),
+            "baseline_p95": baseline.quantile(0.95),
+        }
+
+    def detect(
+        self,
+        current_sketches: Dict[str, Dict[str, Any]],
+        baseline_runs: Iterable[Dict[str, Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Compare a run's serialized sketches against previous runs.
+
+        baseline_runs holds one {operation: sketch dict} mapping per earlier
+        run; they are merged per operation into the baseline. Regressions
+        are returned largest median ratio first.
+        """
+        baselines: Dict[str, LatencySketch] = {}
+        run_counts: Dict[str, int] = {}
+        for run in baseline_runs:
+            for operation, data in run.items():
+                if operation not in current_sketches:
+                    continue
+                sketch = LatencySketch.from_dict(data)
+                if operation not in baselines:
+                    baselines[operation] = sketch
+                elif sketch.relative_accuracy == baselines[operation].relative_accuracy:
+                    baselines[operation].merge(sketch)
+                else:
+                    continue
+                run_counts[operation] = run_counts.get(operation, 0) + 1
+
+        regressions = []
+        for operation, baseline in baselines.items():
+            current = LatencySketch.from_dict(current_sketches[operation])
+            if current.relative_accuracy != baseline.relative_accuracy:
+                continue
+            regression = self.compare(operation, current, baseline, run_counts[operation])
+            if regression:
+                regressions.append(regression)
+
+        regressions.sort(key=lambda regression: regression["median_ratio"], reverse=True)
+        return regressions
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Persistent results store for Craig-O-Clean test analysis
+
+A SQLite database that generate-test-report.py and
+analyze_test_results.py append to with --store. Both default to
+results.db in the test output directory (the one holding logs/, i.e. the
+analyzer's reports_dir and the report generator's --input), so every
+history query sees the runs of both tools; --store-path overrides it.
+It keeps runs, test cases, issues and per-operation performance metrics,
+indexed so history questions are answered with index lookups instead of
+re-parsing raw logs.
+
+Usage:
+    python3 scripts/results_store.py test-reports/results.db runs
+    python3 scripts/results_store.py test-reports/results.db slower-tests --last 200
+    python3 scripts/results_store.py test-reports/results.db operation memoryCleanup
+    python3 scripts/results_store.py test-reports/results.db issues --severity critical
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    run_key TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    summary TEXT,
+    UNIQUE (source, run_key)
+);
+
+CREATE TABLE IF NOT EXISTS test_cases (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    class_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS test_cases_run ON test_cases (run_id);
+CREATE INDEX IF NOT EXISTS test_cases_test ON test_cases (class_name, name);
+
+CREATE TABLE IF NOT EXISTS issues (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    issue_key TEXT,
+    type TEXT,
+    severity TEXT,
+    category TEXT,
+    title TEXT,
+    message TEXT,
+    file_path TEXT,
+    line_number INTEGER,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_run ON issues (run_id);
+CREATE INDEX IF NOT EXISTS issues_category ON issues (category);
+CREATE INDEX IF NOT EXISTS issues_severity ON issues (severity);
+
+CREATE TABLE IF NOT EXISTS performance_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    operation TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    max REAL NOT NULL,
+    p50 REAL NOT NULL,
+    p95 REAL NOT NULL,
+    p99 REAL NOT NULL,
+    sketch TEXT
+);
+CREATE INDEX IF NOT EXISTS performance_metrics_run ON performance_metrics (run_id);
+CREATE INDEX IF NOT EXISTS performance_metrics_operation ON performance_metrics (operation, run_id);
+"""
+
+
+class ResultsStore:
+    """SQLite-backed history of test runs.
+
+    Runs are identified by (source, run_key); recording a run that already
+    exists replaces it, so re-running a tool over the same data is
+    idempotent. Run ids increase in recording order, which is what the
+    "last N runs" queries use.
+    """
+
+    DEFAULT_FILENAME = "results.db"
+    SCHEMA_VERSION = 1
+
+    # Sources written by the two report tools: one test_log run per
+    # xcodebuild log (its test cases, keyed by log file name), one
+    # test_report run per generated report (its summary and issues) and one
+    # app_analysis run per analyzed app log export
+    SOURCE_TEST_LOG = "test_log"
+    SOURCE_TEST_REPORT = "test_report"
+    SOURCE_APP_ANALYSIS = "app_analysis"
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        try:
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > self.SCHEMA_VERSION:
+                raise RuntimeError(f"{self.path} was written by a newer schema (version {version})")
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        except BaseException:
+            self.conn.close()
+            raise
+
+    @classmethod
+    def default_path(cls, directory: Union[str, Path]) -> Path:
+        """The store file of a test output directory (the one holding logs/)."""
+        return Path(directory) / cls.DEFAULT_FILENAME
+
+    @classmethod
+    def in_directory(cls, directory: Union[str, Path]) -> "ResultsStore":
+        """Open the default store file of a test output directory."""
+        return cls(cls.default_path(directory))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # Writing
+
+    def record_run(
+        self,
+        source: str,
+        run_key: str,
+        summary: Optional[Dict[str, Any]] = None,
+        test_cases: Iterable[Tuple[str, str, str, float, Optional[str]]] = (),
+        issues: Iterable[Dict[str, Any]] = (),
+        operation_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+        operation_sketches: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> int:
+        """Store one run in a single transaction and return its id.
+
+        test_cases are (class_name, name, status, duration, error_message)
+        tuples; issues are dicts in either tool's issue format;
+        operation_stats/operation_sketches are as produced by
+        TestResultAnalyzer.analyze_app_logs.
+        """
+        operation_sketches = operation_sketches or {}
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE source = ? AND run_key = ?", (source, run_key))
+            run_id = self.conn.execute(
+                "INSERT INTO runs (source, run_key, recorded_at, summary) VALUES (?, ?, ?, ?)",
+                (source, run_key, datetime.now().isoformat(), json.dumps(summary) if summary else None),
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO test_cases (run_id, class_name, name, status, duration, error_message) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id,) + tuple(row) for row in test_cases),
+            )
+            self.conn.executemany(
+                "INSERT INTO issues (run_id, issue_key, type, severity, category, title, message, "
+                "file_path, line_number, occurrences, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._issue_row(run_id, issue) for issue in issues),
+            )
+            self.conn.executemany(
+                "INSERT INTO performance_metrics (run_id, operation, count, mean, max, p50, p95, p99, sketch) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        run_id, operation, stats["count"], stats["mean"], stats["max"],
+                        stats["p50"], stats["p95"], stats["p99"],
+                        json.dumps(operation_sketches[operation]) if operation in operation_sketches else None,
+                    )
+                    for operation, stats in (operation_stats or {}).items()
+                ),
+            )
+        return run_id
+
+    @staticmethod
+    def _issue_row(run_id: int, issue: Dict[str, Any]) -> tuple:
+        return (
+            run_id,
+            issue.get("id"),
+            issue.get("type"),
+            issue.get("severity"),
+            issue.get("category") or issue.get("operation"),
+            issue.get("title"),
+            issue.get("message") or issue.get("description"),
+            issue.get("file_path"),
+            issue.get("line_number"),
+            issue.get("occurrences", 1),
+            json.dumps(issue, default=str),
+        )
+
+    # Queries
+
+    def recorded_logs(self) -> Dict[str, Optional[List[int]]]:
+        """Log file name -> log identity it was recorded at, of every test_log run."""
+        rows = self.conn.execute("SELECT run_key, summary FROM runs WHERE source = ?", (self.SOURCE_TEST_LOG,))
+        return {
+            run_key: json.loads(summary).get("log_identity") if summary else None
+            for run_key, summary in rows
+        }
+
+    def recent_runs(self, limit: int = 20, source: Optional[str] = None) -> List[sqlite3.Row]:
+        """Most recent runs, newest first."""
+        if source is None:
+            return self.conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return self.conn.execute(
+            "SELECT * FROM runs WHERE source = ? ORDER BY id DESC LIMIT ?", (source, limit)
+        ).fetchall()
+
+    def test_history(self, class_name: str, name: str, last_n: int = 200) -> List[sqlite3.Row]:
+        """Duration and status of one test over its last_n test log runs, oldest first."""
+        return self.conn.execute(
+            """
+            SELECT runs.run_key, test_cases.status, test_cases.duration, test_cases.run_id
+            FROM test_cases JOIN runs ON runs.id = test_cases.run_id
+            WHERE test_cases.class_name = :class_name AND test_cases.name = :name
+              AND test_cases.run_id IN (
+                  SELECT DISTINCT test_cases.run_id FROM test_cases JOIN runs ON runs.id = test_cases.run_id
+                  WHERE class_name = :class_name AND name = :name AND runs.source = :source
+                  ORDER BY test_cases.run_id DESC LIMIT :last_n
+              )
+            ORDER BY test_cases.run_id, test_cases.rowid
+            """,
+            {"class_name": class_name, "name": name, "last_n": last_n, "source": self.SOURCE_TEST_LOG},
+        ).fetchall()
+
+    def recent_test_durations(self, last_n: int = 20, log_pattern: str = "*") -> List[sqlite3.Row]:
+        """(run_id, class_name, name, duration) rows of the last_n test log runs
+        whose log file name matches the glob log_pattern."""
+        return self.conn.execute(
+            """
+            SELECT test_cases.run_id, test_cases.class_name, test_cases.name, test_cases.duration
+            FROM test_cases
+            WHERE test_cases.run_id IN (
+                SELECT id FROM runs WHERE source = ? AND run_key GLOB ? ORDER BY id DESC LIMIT ?
+            )
+            ORDER BY test_cases.run_id
+            """,
+            (self.SOURCE_TEST_LOG, log_pattern, last_n),
+        ).fetchall()
+
+    def recent_test_statuses(self, last_n: int = 50) -> List[sqlite3.Row]:
+        """(run_id, class_name, name, status) rows of the last_n test log runs,
+        in execution order."""
+        return self.conn.execute(
+            """
+            SELECT test_cases.run_id, test_cases.class_name, test_cases.name, test_cases.status
+            FROM test_cases
+            WHERE test_cases.run_id IN (
+                SELECT id FROM runs WHERE source = ? ORDER BY id DESC LIMIT ?
+            )
+            ORDER BY test_cases.run_id, test_cases.rowid
+            """,
+            (self.SOURCE_TEST_LOG, last_n),
+        ).fetchall()
+
+    def slower_tests(
+        self, last_n: int = 200, min_ratio: float = 1.2, min_samples: int = 2
+    ) -> List[sqlite3.Row]:
+        """Tests whose mean duration rose across the last_n test log runs.
+
+        The runs are split into an older and a newer half; a test is
+        returned when its newer-half mean is at least min_ratio times its
+        older-half mean and it ran at least min_samples times in each half.
+        Rows are ordered by slowdown ratio, largest first.
+        """
+        return self.conn.execute(
+            """
+            WITH recent AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY id DESC) AS age
+                FROM runs WHERE source = :source ORDER BY id DESC LIMIT :last_n
+            ),
+            halves AS (
+                SELECT test_cases.class_name, test_cases.name, test_cases.duration,
+                       recent.age <= (SELECT (COUNT(*) + 1) / 2 FROM recent) AS is_newer
+                FROM recent JOIN test_cases ON test_cases.run_id = recent.id
+            )
+            SELECT class_name, name,
+                   AVG(CASE WHEN is_newer THEN NULL ELSE duration END) AS baseline_mean,
+                   AVG(CASE WHEN is_newer THEN duration END) AS recent_mean,
+                   SUM(NOT is_newer) AS baseline_samples,
+                   SUM(is_newer) AS recent_samples,
+                   AVG(CASE WHEN is_newer THEN duration END)
+                       / AVG(CASE WHEN is_newer THEN NULL ELSE duration END) AS ratio
+            FROM halves
+            GROUP BY class_name, name
+            HAVING baseline_samples >= :min_samples AND recent_samples >= :min_samples
+               AND baseline_mean > 0 AND recent_mean >= baseline_mean * :min_ratio
+            ORDER BY ratio DESC
+            """,
+            {
+                "source": self.SOURCE_TEST_LOG,
+                "last_n": last_n,
+                "min_ratio": min_ratio,
+                "min_samples": min_samples,
+            },
+        ).fetchall()
+
+    def operation_history(self, operation: str, last_n: int = 200) -> List[sqlite3.Row]:
+        """Per-run statistics of one operation over its last_n runs, oldest first."""
+        return self.conn.execute(
+            """
+            SELECT * FROM (
+                SELECT runs.run_key, performance_metrics.*
+                FROM performance_metrics JOIN runs ON runs.id = performance_metrics.run_id
+                WHERE performance_metrics.operation = ?
+                ORDER BY performance_metrics.run_id DESC LIMIT ?
+            ) ORDER BY run_id
+            """,
+            (operation, last_n),
+        ).fetchall()
+
+    def recent_operation_sketches(
+        self, last_n: int = 20, exclude_run_key: Optional[str] = None, source: str = SOURCE_APP_ANALYSIS
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """{operation: sketch dict} for each of the last_n runs, oldest first."""
+        rows = self.conn.execute(
+            """
+            SELECT performance_metrics.run_id, performance_metrics.operation, performance_metrics.sketch
+            FROM performance_metrics
+            WHERE performance_metrics.sketch IS NOT NULL AND performance_metrics.run_id IN (
+                SELECT id FROM runs WHERE source = ? AND run_key IS NOT ?
+                ORDER BY id DESC LIMIT ?
+            )
+            ORDER BY performance_metrics.run_id
+            """,
+            (source, exclude_run_key, last_n),
+        )
+        runs: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for run_id, operation, sketch in rows:
+            runs.setdefault(run_id, {})[operation] = json.loads(sketch)
+        return list(runs.values())
+
+    def operations(self) -> List[str]:
+        """All operation names with stored metrics."""
+        return [
+            row[0] for row in self.conn.execute("SELECT DISTINCT operation FROM performance_metrics ORDER BY operation")
+        ]
+
+    def find_issues(
+        self,
+        category: Optional[str] = None,
+        severity: Optional[str] = None,
+        last_n: int = 200,
+        limit: int = 100,
+    ) -> List[sqlite3.Row]:
+        """Issues from the last_n runs, optionally filtered by category/severity."""
+        clauses = ["issues.run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)"]
+        params: List[Any] = [last_n]
+        if category is not None:
+            clauses.append("issues.category = ?")
+            params.append(category)
+        if severity is not None:
+            clauses.append("issues.severity = ?")
+            params.append(severity)
+        params.append(limit)
+        return self.conn.execute(
+            f"""
+            SELECT runs.run_key, issues.*
+            FROM issues JOIN runs ON runs.id = issues.run_id
+            WHERE {' AND '.join(clauses)}
+            ORDER BY issues.run_id DESC LIMIT ?
+            """,
+            params,
+        ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the Craig-O-Clean results store")
+    parser.add_argument("database", type=Path, help="Path to results.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs_parser = commands.add_parser("runs", help="List recent runs")
+    runs_parser.add_argument("--limit", type=int, default=20)
+
+    slower_parser = commands.add_parser("slower-tests", help="Tests that got slower over recent runs")
+    slower_parser.add_argument("--last", type=int, default=200, help="Number of runs to compare")
+    slower_parser.add_argument("--min-ratio", type=float, default=1.2, help="Minimum slowdown ratio")
+
+    operation_parser = commands.add_parser("operation", help="Latency history of one operation")
+    operation_parser.add_argument("operation")
+    operation_parser.add_argument("--last", type=int, default=200)
+
+    issues_parser = commands.add_parser("issues", help="Recent issues")
+    issues_parser.add_argument("--category")
+    issues_parser.add_argument("--severity")
+    issues_parser.add_argument("--last", type=int, default=200)
+    issues_parser.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args()
+
+    if not args.database.exists():
+        print(f"No results store at {args.database}")
+        return 1
+
+    with ResultsStore(args.database) as store:
+        if args.command == "runs":
+            for row in store.recent_runs(args.limit):
+                print(f"{row['id']:>6}  {row['source']:<14} {row['run_key']:<20} {row['recorded_at']}")
+
+        elif args.command == "slower-tests":
+            rows = store.slower_tests(args.last, args.min_ratio)
+            for row in rows:
+                print(
+                    f"{row['ratio']:>6.2f}x  {row['class_name']}.{row['name']}  "
+                    f"{row['baseline_mean']:.3f}s -> {row['recent_mean']:.3f}s"
+                )
+            if not rows:
+                print("No tests got slower")
+
+        elif args.command == "operation":
+            for row in store.operation_history(args.operation, args.last):
+                print(
+                    f"{row['run_key']:<20} n={row['count']:<7} mean={row['mean']:.3f}s "
+                    f"p50={row['p50']:.3f}s p95={row['p95']:.3f}s p99={row['p99']:.3f}s max={row['max']:.3f}s"
+                )
+
+        elif args.command == "issues":
+            for row in store.find_issues(args.category, args.severity, args.last, args.limit):
+                print(f"{row['run_key']:<20} [{row['severity']}] {row['category']}: {row['title'] or row['message']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
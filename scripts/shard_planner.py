@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Test shard planner for Craig-O-Clean UI tests
+
+Splits the UI test suite across machines using historical test durations
+so every shard finishes at about the same time. Each test's expected
+duration is the median of its per-run durations over the last N runs
+(from the results store, or from xcodebuild logs), and tests are packed
+with the LPT rule: longest first, each onto the currently lightest shard.
+LPT's makespan is at most 4/3 of the optimum.
+
+Plans are written as one argument file per shard for
+automated-ux-testing.sh --shard I/N --shard-plan <dir>. Plan once and give
+every shard the same directory: the last shard runs the whole target
+minus the other shards' tests, so tests without history still run
+somewhere, and that only holds when all shards read one plan.
+
+Usage:
+    python3 scripts/shard_planner.py plan --shards 4 --store test-output/results.db --output test-output/reports/shards
+    python3 scripts/shard_planner.py plan --shards 4 --logs test-output/logs --output test-output/reports/shards
+    python3 scripts/shard_planner.py record --plan-dir <dir> --shard 2/4 --log <ui-tests.log> --wall-clock 812
+    python3 scripts/shard_planner.py report --plan-dir <dir>
+"""
+
+import argparse
+import heapq
+import importlib.util
+import json
+import statistics
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from results_store import ResultsStore
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+TestKey = Tuple[str, str]
+
+# Log names of UI test runs, as written by automated-ux-testing.sh
+UI_LOG_PATTERN = "*-ui-tests.log"
+
+
+def load_report_module():
+    """Import generate-test-report.py (its file name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location(
+        "generate_test_report", SCRIPT_DIR / "generate-test-report.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_log_timings(log_path: Path) -> List[Tuple[str, str, float]]:
+    """(class_name, name, duration) of every test case in one xcodebuild log."""
+    report = sys.modules.get("generate_test_report") or load_report_module()
+    parser = report.TestLogParser(log_path.parent)
+    parser.parse_log_file(log_path)
+    return list(parser.test_cases.iter_timings())
+
+
+def durations_from_store(
+    store: ResultsStore, last_n: int, log_pattern: str = UI_LOG_PATTERN
+) -> Dict[TestKey, List[float]]:
+    """Per-test durations, one value per run, over the last_n stored runs.
+
+    Only runs of logs matching log_pattern count: the store also holds the
+    unit test and build logs of every run.
+    """
+    per_run: Dict[Tuple[int, str, str], float] = {}
+    for row in store.recent_test_durations(last_n, log_pattern):
+        key = (row["run_id"], row["class_name"], row["name"])
+        per_run[key] = per_run.get(key, 0.0) + row["duration"]
+    durations: Dict[TestKey, List[float]] = {}
+    for (_, class_name, name), duration in per_run.items():
+        durations.setdefault((class_name, name), []).append(duration)
+    return durations
+
+
+def durations_from_logs(log_paths: Iterable[Path]) -> Dict[TestKey, List[float]]:
+    """Per-test durations, one value per log, treating each log as a run."""
+    durations: Dict[TestKey, List[float]] = {}
+    for log_path in log_paths:
+        per_run: Dict[TestKey, float] = {}
+        for class_name, name, duration in parse_log_timings(log_path):
+            per_run[(class_name, name)] = per_run.get((class_name, name), 0.0) + duration
+        for key, duration in per_run.items():
+            durations.setdefault(key, []).append(duration)
+    return durations
+
+
+@dataclass
+class Shard:
+    index: int
+    predicted: float = 0.0
+    tests: List[TestKey] = field(default_factory=list)
+
+
+def plan_shards(estimates: Dict[TestKey, float], shard_count: int) -> List[Shard]:
+    """Assign tests to shard_count shards with the LPT rule.
+
+    Ties are broken by test name and shard index so plans are
+    deterministic for the same history.
+    """
+    shards = [Shard(index) for index in range(1, shard_count + 1)]
+    heap = [(0.0, index) for index in range(shard_count)]
+    for key, duration in sorted(estimates.items(), key=lambda item: (-item[1], item[0])):
+        load, index = heapq.heappop(heap)
+        shard = shards[index]
+        shard.tests.append(key)
+        shard.predicted = load + duration
+        heapq.heappush(heap, (shard.predicted, index))
+    for shard in shards:
+        shard.tests.sort()
+    return shards
+
+
+def shard_arguments(shards: List[Shard], shard: Shard, target: str) -> List[str]:
+    """xcodebuild arguments selecting one shard's tests."""
+    if shard.index < len(shards):
+        return [f"-only-testing:{target}/{class_name}/{name}" for class_name, name in shard.tests]
+    # Catch-all shard: everything not assigned elsewhere, including new tests
+    arguments = [f"-only-testing:{target}"]
+    for other in shards[:-1]:
+        arguments.extend(f"-skip-testing:{target}/{class_name}/{name}" for class_name, name in other.tests)
+    return arguments
+
+
+def shard_name(index: int, count: int) -> str:
+    return f"shard-{index}-of-{count}"
+
+
+def write_plan(shards: List[Shard], estimates: Dict[TestKey, float], target: str, output_dir: Path) -> Path:
+    """Write per-shard argument files and shard-plan.json; return the plan path."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    count = len(shards)
+    for shard in shards:
+        with open(output_dir / f"{shard_name(shard.index, count)}.args", "w") as f:
+            for argument in shard_arguments(shards, shard, target):
+                f.write(argument + "\n")
+
+    plan = {
+        "target": target,
+        "shards": count,
+        "serial_duration": sum(estimates.values()),
+        "predicted_makespan": max((shard.predicted for shard in shards), default=0.0),
+        "lower_bound": max(sum(estimates.values()) / max(count, 1), max(estimates.values(), default=0.0)),
+        "assignments": [
+            {
+                "shard": shard.index,
+                "predicted": shard.predicted,
+                "tests": [f"{class_name}/{name}" for class_name, name in shard.tests],
+            }
+            for shard in shards
+        ],
+    }
+    plan_path = output_dir / "shard-plan.json"
+    with open(plan_path, "w") as f:
+        json.dump(plan, f, indent=2)
+    return plan_path
+
+
+@dataclass
+class ShardResult:
+    """Measured outcome of one shard, written by the record command."""
+    shard: int
+    shards: int
+    test_time: float
+    test_count: int
+    wall_clock: Optional[float] = None
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """'2/4' -> (2, 4)"""
+    index, _, count = spec.partition("/")
+    try:
+        index_value, count_value = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected I/N, got {spec!r}")
+    if not 1 <= index_value <= count_value:
+        raise argparse.ArgumentTypeError(f"Shard index must be between 1 and N, got {spec!r}")
+    return index_value, count_value
+
+
+def command_plan(args) -> int:
+    if args.store:
+        if not args.store.exists():
+            print(f"No results store at {args.store}")
+            return 1
+        with ResultsStore(args.store) as store:
+            durations = durations_from_store(store, args.runs, args.log_pattern)
+    else:
+        log_paths = sorted(args.logs.glob(args.log_pattern), key=lambda path: path.stat().st_mtime)[-args.runs:]
+        durations = durations_from_logs(log_paths)
+
+    if not durations:
+        print("No test durations found; run the suite unsharded first")
+        return 1
+
+    estimates = {key: statistics.median(values) for key, values in durations.items()}
+    shards = plan_shards(estimates, args.shards)
+    plan_path = write_plan(shards, estimates, args.target, args.output)
+
+    with open(plan_path) as f:
+        plan = json.load(f)
+    print(f"Planned {len(estimates)} tests into {args.shards} shards ({plan_path})")
+    for shard in shards:
+        print(f"  {shard_name(shard.index, args.shards)}: {len(shard.tests):>5} tests, {shard.predicted:>9.1f}s predicted")
+    print(f"  Serial: {plan['serial_duration']:.1f}s, predicted makespan: {plan['predicted_makespan']:.1f}s "
+          f"(lower bound {plan['lower_bound']:.1f}s)")
+    return 0
+
+
+def command_record(args) -> int:
+    index, count = args.shard
+    timings = parse_log_timings(args.log) if args.log.exists() else []
+    result = ShardResult(
+        shard=index,
+        shards=count,
+        test_time=sum(duration for _, _, duration in timings),
+        test_count=len(timings),
+        wall_clock=args.wall_clock,
+    )
+    args.plan_dir.mkdir(parents=True, exist_ok=True)
+    result_path = args.plan_dir / f"{shard_name(index, count)}.result.json"
+    with open(result_path, "w") as f:
+        json.dump(asdict(result), f, indent=2)
+    print(f"Recorded {shard_name(index, count)}: {result.test_count} tests, {result.test_time:.1f}s test time")
+    return 0
+
+
+def command_report(args) -> int:
+    plan_path = args.plan_dir / "shard-plan.json"
+    if not plan_path.exists():
+        print(f"No shard plan at {plan_path}")
+        return 1
+    with open(plan_path) as f:
+        plan = json.load(f)
+
+    results: Dict[int, ShardResult] = {}
+    for result_path in args.plan_dir.glob(f"shard-*-of-{plan['shards']}.result.json"):
+        with open(result_path) as f:
+            result = ShardResult(**json.load(f))
+        results[result.shard] = result
+
+    print(f"{'Shard':<16} {'Predicted':>10} {'Test time':>10} {'Wall clock':>11}")
+    for assignment in plan["assignments"]:
+        result = results.get(assignment["shard"])
+        test_time = f"{result.test_time:.1f}s" if result else "-"
+        wall_clock = f"{result.wall_clock:.1f}s" if result and result.wall_clock is not None else "-"
+        print(f"{shard_name(assignment['shard'], plan['shards']):<16} "
+              f"{assignment['predicted']:>9.1f}s {test_time:>10} {wall_clock:>11}")
+
+    print(f"\nSerial (predicted):   {plan['serial_duration']:.1f}s")
+    print(f"Makespan (predicted): {plan['predicted_makespan']:.1f}s")
+    if len(results) == plan["shards"]:
+        actual = max(result.test_time for result in results.values())
+        print(f"Makespan (actual):    {actual:.1f}s test time")
+        wall_clocks = [result.wall_clock for result in results.values() if result.wall_clock is not None]
+        if len(wall_clocks) == plan["shards"]:
+            print(f"Makespan (actual):    {max(wall_clocks):.1f}s wall clock")
+    else:
+        print(f"Actual makespan pending: {len(results)}/{plan['shards']} shards recorded")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan and evaluate UI test shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="Plan shards from historical durations")
+    plan_parser.add_argument("--shards", "-n", type=int, required=True, help="Number of shards")
+    source = plan_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--store", type=Path, help="Results store (results.db) written with --store")
+    source.add_argument("--logs", type=Path, help="Directory of xcodebuild test logs")
+    plan_parser.add_argument("--log-pattern", default=UI_LOG_PATTERN,
+                             help="Glob of the UI test log names to plan from (stored runs or files in --logs)")
+    plan_parser.add_argument("--runs", type=int, default=20, help="Number of recent runs to use")
+    plan_parser.add_argument("--target", default="CraigOCleanUITests", help="Test target for -only-testing")
+    plan_parser.add_argument("--output", "-o", type=Path, default=Path("test-output/reports/shards"),
+                             help="Directory for shard argument files and the plan")
+
+    record_parser = commands.add_parser("record", help="Record the measured result of one shard")
+    record_parser.add_argument("--plan-dir", type=Path, required=True)
+    record_parser.add_argument("--shard", type=parse_shard_spec, required=True, help="Shard as I/N")
+    record_parser.add_argument("--log", type=Path, required=True, help="xcodebuild log of the shard")
+    record_parser.add_argument("--wall-clock", type=float, help="Measured wall-clock seconds")
+
+    report_parser = commands.add_parser("report", help="Compare predicted and actual makespan")
+    report_parser.add_argument("--plan-dir", type=Path, required=True)
+
+    args = parser.parse_args()
+    if args.command == "plan" and args.shards < 1:
+        parser.error("--shards must be at least 1")
+
+    return {"plan": command_plan, "record": command_record, "report": command_report}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
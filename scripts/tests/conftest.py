@@ -0,0 +1,24 @@
+"""Shared pytest setup for the test tooling scripts."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+# The scripts import their siblings directly
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@pytest.fixture(scope="session")
+def report_module():
+    """generate-test-report.py (its file name is not a valid module name)."""
+    module = sys.modules.get("generate_test_report")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("generate_test_report", SCRIPTS_DIR / "generate-test-report.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,46 @@
+"""Duration trends over stored runs plus the logs of the current report."""
+
+from results_store import ResultsStore
+
+
+def write_log(logs_dir, name, duration):
+    (logs_dir / name).write_text(f"Test Case '-[CleanupTests testPurge]' passed ({duration:.3f} seconds).\n")
+
+
+def test_trend_counts_each_log_once(report_module, tmp_path):
+    logs_dir = tmp_path / "logs"
+    logs_dir.mkdir()
+    store_path = tmp_path / ResultsStore.DEFAULT_FILENAME
+    for run, duration in enumerate((1.0, 2.0, 3.0), start=1):
+        write_log(logs_dir, f"test_run{run}.log", duration)
+    with ResultsStore(store_path) as store:
+        report_module.record_log_runs(store, report_module.parse_new_logs(logs_dir, {}))
+
+    write_log(logs_dir, "test_run4.log", 4.0)
+    results = report_module.TestLogParser(logs_dir)
+    results.parse_all_logs()
+    new_logs = report_module.parse_new_logs(logs_dir, report_module.recorded_logs(store_path))
+    report = report_module.build_report(
+        "r", results, report_module.IssueAnalyzer(), {}, store_path, new_logs=new_logs
+    )
+
+    trend = report.duration_profile["slowest_tests"][0]["trend"]
+    assert (trend["runs"], trend["first_mean"], trend["last_mean"]) == (4, 1.0, 4.0)
+    assert trend["slope"] == 1.0
+
+
+def test_no_new_logs_adds_no_point(report_module, tmp_path):
+    logs_dir = tmp_path / "logs"
+    logs_dir.mkdir()
+    store_path = tmp_path / ResultsStore.DEFAULT_FILENAME
+    for run, duration in enumerate((1.0, 3.0), start=1):
+        write_log(logs_dir, f"test_run{run}.log", duration)
+    with ResultsStore(store_path) as store:
+        report_module.record_log_runs(store, report_module.parse_new_logs(logs_dir, {}))
+
+    results = report_module.TestLogParser(logs_dir)
+    results.parse_all_logs()
+    report = report_module.build_report("r", results, report_module.IssueAnalyzer(), {}, store_path)
+
+    trend = report.duration_profile["slowest_tests"][0]["trend"]
+    assert (trend["runs"], trend["last_mean"]) == (2, 3.0)
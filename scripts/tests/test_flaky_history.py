@@ -0,0 +1,46 @@
+"""Flaky detection over runs recorded by generate-test-report.py."""
+
+from results_store import ResultsStore
+
+PASSED = "Test Case '-[CleanupTests testPurge]' passed (0.100 seconds).\n"
+FAILED = "Test Case '-[CleanupTests testPurge]' failed (0.100 seconds).\n"
+
+
+def report_cycle(report, logs_dir, store_path):
+    """What one generate-test-report.py --store run does with the history."""
+    new_logs = report.parse_new_logs(logs_dir, report.recorded_logs(store_path))
+    detector = report.add_log_runs(report.load_flaky_history(store_path, 50), new_logs)
+    with ResultsStore(store_path) as store:
+        report.record_log_runs(store, new_logs)
+    return detector.flakiness("CleanupTests", "testPurge")
+
+
+def test_single_historical_failure_is_not_flaky(report_module, tmp_path):
+    logs_dir = tmp_path / "logs"
+    logs_dir.mkdir()
+    store_path = tmp_path / ResultsStore.DEFAULT_FILENAME
+
+    (logs_dir / "test_run01.log").write_text(FAILED)
+    report_cycle(report_module, logs_dir, store_path)
+    for run in range(2, 11):
+        # Every earlier log stays in logs/ and is part of every report
+        (logs_dir / f"test_run{run:02d}.log").write_text(PASSED)
+        flakiness = report_cycle(report_module, logs_dir, store_path)
+        assert not flakiness.flaky
+
+    assert (flakiness.runs, flakiness.failures, flakiness.flips) == (10, 1, 1)
+    with ResultsStore(store_path) as store:
+        assert len(store.recent_test_statuses(50)) == 10
+
+
+def test_alternating_outcomes_are_flaky(report_module, tmp_path):
+    logs_dir = tmp_path / "logs"
+    logs_dir.mkdir()
+    store_path = tmp_path / ResultsStore.DEFAULT_FILENAME
+
+    for run in range(1, 9):
+        (logs_dir / f"test_run{run:02d}.log").write_text(FAILED if run % 2 else PASSED)
+        flakiness = report_cycle(report_module, logs_dir, store_path)
+
+    assert flakiness.flaky
+    assert (flakiness.runs, flakiness.failures, flakiness.flips) == (8, 4, 7)
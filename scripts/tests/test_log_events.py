@@ -0,0 +1,53 @@
+"""LogFollower against a log that is still being written."""
+
+import log_events
+from log_events import LogEventCache, LogFollower
+
+PASSED = b"Test Case '-[CleanupTests testScan]' passed (0.100 seconds).\n"
+FAILED = b"Test Case '-[CleanupTests testPurge]' failed (0.200 seconds)."
+
+
+def test_flush_parses_unterminated_last_line(tmp_path):
+    log_path = tmp_path / "test_run.log"
+    log_path.write_bytes(PASSED + FAILED)
+    follower = LogFollower(log_path, LogEventCache())
+
+    events, reset = follower.poll()
+    assert not reset
+    assert [event for event in events if event[0] == log_events.TEST_PASSED] == [
+        (log_events.TEST_PASSED, "CleanupTests", "testScan", 0.1),
+    ]
+    assert follower.poll() == ([], False)
+
+    flushed = follower.flush()
+    assert (log_events.TEST_FAILED, "CleanupTests", "testPurge", 0.2, None) in flushed
+    assert follower.flush() == []
+    assert follower.identity == log_events.file_identity(log_path)
+
+
+def test_flush_picks_up_unpolled_lines(tmp_path):
+    log_path = tmp_path / "test_run.log"
+    log_path.write_bytes(PASSED)
+    follower = LogFollower(log_path, LogEventCache())
+    follower.poll()
+
+    with open(log_path, "ab") as f:
+        f.write(PASSED.replace(b"testScan", b"testSize") + FAILED + b"\n")
+    kinds = [event[0] for event in follower.flush()]
+    assert kinds.count(log_events.TEST_PASSED) == 1
+    assert kinds.count(log_events.TEST_FAILED) == 1
+
+
+def test_loose_mentions_are_counted_with_capped_examples(tmp_path):
+    log_path = tmp_path / "test_run.log"
+    lines = [f"Foo.swift:{line}: error: cannot find 'x{line}' in scope\n" for line in range(100)]
+    log_path.write_text("".join(lines))
+
+    parsed = LogEventCache().parse(log_path)
+    assert parsed.mentions.error_count == 100
+    assert len(parsed.mentions.error_examples) == log_events.MAX_MENTION_EXAMPLES
+    assert parsed.mentions.error_examples[0] == "error: cannot find 'x0' in scope"
+    assert [event[0] for event in parsed.events] == [log_events.ERROR] * 100
+
+    # The cached parse restores the same summary
+    assert LogEventCache().parse(log_path).mentions == parsed.mentions
@@ -0,0 +1,40 @@
+"""Shard planning from the shared results store."""
+
+from results_store import ResultsStore
+from shard_planner import durations_from_store, plan_shards, shard_arguments
+
+TARGET = "CraigOCleanUITests"
+
+
+def record_log(store, log_name, test_cases):
+    store.record_run(
+        ResultsStore.SOURCE_TEST_LOG,
+        log_name,
+        summary={"total_tests": len(test_cases)},
+        test_cases=[(class_name, name, "passed", duration, None) for class_name, name, duration in test_cases],
+    )
+
+
+def test_plans_only_ui_test_runs(tmp_path):
+    with ResultsStore(tmp_path / ResultsStore.DEFAULT_FILENAME) as store:
+        record_log(store, "r1-unit-tests.log", [("UnitA", "testX", 0.5)])
+        record_log(store, "r1-build.log", [])
+        record_log(store, "r1-ui-tests.log", [("MenuBarTests", "testOpensMenu", 4.0)])
+        record_log(store, "r2-unit-tests.log", [("UnitA", "testX", 0.7)])
+        record_log(store, "r2-ui-tests.log", [("MenuBarTests", "testOpensMenu", 6.0),
+                                              ("MenuBarTests", "testQuits", 1.0)])
+
+        durations = durations_from_store(store, 20)
+        assert durations == {
+            ("MenuBarTests", "testOpensMenu"): [4.0, 6.0],
+            ("MenuBarTests", "testQuits"): [1.0],
+        }
+        # --runs counts UI runs, not every stored log
+        assert durations_from_store(store, 1) == {
+            ("MenuBarTests", "testOpensMenu"): [6.0],
+            ("MenuBarTests", "testQuits"): [1.0],
+        }
+
+    shards = plan_shards({key: max(values) for key, values in durations.items()}, 2)
+    arguments = [argument for shard in shards for argument in shard_arguments(shards, shard, TARGET)]
+    assert not any("UnitA" in argument for argument in arguments)
@@ -0,0 +1,67 @@
+"""XCResultBundle over a committed legacy JSON export (no Xcode needed)."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from xcresult import XCResultBundle, XCResultError
+
+EXPORT_DIR = Path(__file__).resolve().parent / "fixtures" / "xcresult-export"
+
+
+def test_walks_export_directory():
+    bundle = XCResultBundle.open(EXPORT_DIR)
+    tests = list(bundle.iter_tests())
+
+    assert [(test.class_name, test.name, test.status) for test in tests] == [
+        ("MenuBarTests", "testOpensMenu", XCResultBundle.STATUS_PASSED),
+        ("MenuBarTests", "testShowsMemoryUsage", XCResultBundle.STATUS_FAILED),
+        ("MenuBarTests", "testQuitsFromMenu", XCResultBundle.STATUS_SKIPPED),
+    ]
+    assert {test.target for test in tests} == {"CraigOCleanUITests"}
+    assert [test.duration for test in tests] == [2.5, 4.25, 0.0]
+    assert [test.summary_ref for test in tests if test.failed] == ["0~summary-testShowsMemoryUsage"]
+
+
+def test_failed_test_details():
+    bundle = XCResultBundle.open(EXPORT_DIR)
+    failed = next(test for test in bundle.iter_tests() if test.failed)
+
+    failure = bundle.test_summary(failed)["failureSummaries"][0]
+    assert failure["message"] == "XCTAssertTrue failed - memory label not shown"
+    assert failure["lineNumber"] == 42
+
+    attachments = bundle.attachments(failed)
+    assert [attachment["uniformTypeIdentifier"] for attachment in attachments] == [
+        "public.png", "public.plain-text",
+    ]
+    path, is_temporary = bundle.payload_path(attachments[0]["payloadRef"]["id"], EXPORT_DIR)
+    assert path == EXPORT_DIR / "payloads" / "0~payload-popover-png"
+    assert not is_temporary
+    assert bundle.failure_summaries()[0]["testCaseName"] == "MenuBarTests.testShowsMemoryUsage()"
+
+
+def test_root_json_needs_export_dir(tmp_path):
+    root_json = tmp_path / "test_results.json"
+    shutil.copyfile(EXPORT_DIR / XCResultBundle.ROOT_EXPORT_NAME, root_json)
+    # A loose JSON file must not turn its own directory into the export dir
+    shutil.copytree(EXPORT_DIR, tmp_path, dirs_exist_ok=True)
+
+    with pytest.raises(XCResultError):
+        XCResultBundle.open(root_json)
+
+    bundle = XCResultBundle.open(root_json, export_dir=EXPORT_DIR)
+    assert bundle.export_dir == EXPORT_DIR
+    assert len(list(bundle.iter_tests())) == 3
+
+
+def test_export_round_trip(tmp_path):
+    count = XCResultBundle.open(EXPORT_DIR).export(tmp_path)
+
+    assert count == 5
+    exported = XCResultBundle.open(tmp_path)
+    assert [test.name for test in exported.iter_tests() if test.failed] == ["testShowsMemoryUsage"]
+    assert (tmp_path / "payloads" / "0~payload-tree-txt").read_bytes() == (
+        EXPORT_DIR / "payloads" / "0~payload-tree-txt"
+    ).read_bytes()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+xcresult bundle reader for Craig-O-Clean test analysis
+
+Reads the bundle's Info.plist and walks the legacy JSON object graph that
+`xcrun xcresulttool get --legacy --format json` exposes. Objects are only
+fetched when a reference is followed, and each is fetched once: a bundle
+with thousands of tests costs one request for the test plan summaries,
+plus one per test whose details are actually needed (e.g. failures).
+
+Objects come from, in order of preference:
+- an export directory holding root.json and <id>.json files, plus
+  attachment payloads under payloads/ (fixtures written by `--export`,
+  usable on any platform)
+- xcresulttool, when running on macOS with Xcode installed
+
+Usage:
+    python3 scripts/xcresult.py test-reports/test_results_<ts>.xcresult
+    python3 scripts/xcresult.py <bundle>.xcresult --export <fixtures-dir>
+    python3 scripts/xcresult.py <fixtures-dir>
+    python3 scripts/xcresult.py <root>.json --export-dir <fixtures-dir>
+"""
+
+import argparse
+import json
+import plistlib
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class XCResultError(Exception):
+    """Raised when an object cannot be read from a bundle."""
+
+
+# Legacy JSON wraps scalars as {"_type": {"_name": ...}, "_value": "..."}
+SCALAR_TYPES = {
+    "Int": int,
+    "Int16": int,
+    "Int32": int,
+    "Int64": int,
+    "UInt8": int,
+    "Double": float,
+    "Bool": lambda value: value == "true",
+}
+
+
+def unwrap(value: Any) -> Any:
+    """Convert legacy xcresult JSON into plain Python values.
+
+    Arrays become lists, scalars are converted by type, and objects become
+    dicts whose "_type" is the type name (e.g. "ActionTestMetadata").
+    """
+    if isinstance(value, list):
+        return [unwrap(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    type_name = value.get("_type", {}).get("_name")
+    if "_values" in value:
+        return [unwrap(item) for item in value["_values"]]
+    if "_value" in value:
+        convert = SCALAR_TYPES.get(type_name)
+        return convert(value["_value"]) if convert else value["_value"]
+
+    result = {key: unwrap(item) for key, item in value.items() if key != "_type"}
+    if type_name:
+        result["_type"] = type_name
+    return result
+
+
+def reference_id(reference: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Id of an (unwrapped) Reference object, or None."""
+    if not reference:
+        return None
+    return reference.get("id")
+
+
+@dataclass
+class XCTestRecord:
+    """One test from the test plan summaries (without its details)."""
+    identifier: str
+    name: str
+    class_name: str
+    target: str
+    status: str
+    duration: float
+    summary_ref: Optional[str]
+
+    @property
+    def failed(self) -> bool:
+        return self.status == "Failure"
+
+
+class XCResultBundle:
+    """Lazy reader for an .xcresult bundle or an export of one.
+
+    resolve() fetches an object by id (None for the root) and caches it, so
+    following the same reference twice never re-reads the bundle.
+    """
+
+    ROOT_EXPORT_NAME = "root.json"
+    PAYLOAD_EXPORT_DIR = "payloads"
+
+    # Test statuses as reported by xcresulttool
+    STATUS_PASSED = "Success"
+    STATUS_FAILED = "Failure"
+    STATUS_SKIPPED = "Skipped"
+    STATUS_EXPECTED_FAILURE = "Expected Failure"
+
+    def __init__(
+        self,
+        bundle_path: Optional[Union[str, Path]] = None,
+        export_dir: Optional[Union[str, Path]] = None,
+    ):
+        if bundle_path is None and export_dir is None:
+            raise ValueError("Need a bundle path or an export directory")
+        self.bundle_path = Path(bundle_path) if bundle_path else None
+        self.export_dir = Path(export_dir) if export_dir else None
+        self._cache: Dict[Optional[str], Dict[str, Any]] = {}
+        self._info: Optional[Dict[str, Any]] = None
+        self._legacy_flag = True
+
+    @classmethod
+    def open(
+        cls, path: Union[str, Path], export_dir: Optional[Union[str, Path]] = None
+    ) -> "XCResultBundle":
+        """Open a bundle, an export directory, or a root JSON export.
+
+        A root export (`xcresulttool get --format json > x.json`) has no
+        references of its own. They are resolved through export_dir and
+        the sibling x.xcresult bundle; one of the two is required.
+        """
+        path = Path(path)
+        if path.is_dir():
+            if (path / "Info.plist").exists():
+                return cls(bundle_path=path, export_dir=export_dir)
+            return cls(export_dir=path)
+
+        bundle_path = path.with_suffix(".xcresult")
+        if not bundle_path.is_dir() and export_dir is None:
+            raise XCResultError(f"{path} has no sibling {bundle_path.name}; pass its export directory")
+        bundle = cls(bundle_path=bundle_path if bundle_path.is_dir() else None, export_dir=export_dir)
+        with open(path, "r") as f:
+            bundle._cache[None] = unwrap(json.load(f))
+        return bundle
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """The bundle's Info.plist (empty for export-only bundles)."""
+        if self._info is None:
+            self._info = {}
+            if self.bundle_path and (self.bundle_path / "Info.plist").exists():
+                with open(self.bundle_path / "Info.plist", "rb") as f:
+                    self._info = plistlib.load(f)
+        return self._info
+
+    @property
+    def root_id(self) -> Optional[str]:
+        return self.info.get("rootId", {}).get("hash")
+
+    def resolve(self, object_id: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch and unwrap an object by id; None fetches the root record."""
+        if object_id in self._cache:
+            return self._cache[object_id]
+
+        raw = self._read_export(object_id)
+        if raw is None:
+            raw = self._read_xcresulttool(object_id)
+        value = unwrap(raw)
+        self._cache[object_id] = value
+        return value
+
+    def _read_export(self, object_id: Optional[str]) -> Optional[Any]:
+        if self.export_dir is None:
+            return None
+        path = self.export_dir / (f"{object_id}.json" if object_id else self.ROOT_EXPORT_NAME)
+        if not path.exists():
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _read_xcresulttool(self, object_id: Optional[str]) -> Any:
+        if self.bundle_path is None or shutil.which("xcrun") is None:
+            raise XCResultError(f"Object {object_id or 'root'} is not exported and xcresulttool is unavailable")
+
+        command = ["xcrun", "xcresulttool", "get", "--format", "json", "--path", str(self.bundle_path)]
+        if object_id:
+            command += ["--id", object_id]
+
+        # Xcode 16 requires --legacy for this object model; older releases reject it
+        if self._legacy_flag:
+            result = subprocess.run(command[:3] + ["--legacy"] + command[3:], capture_output=True)
+            if result.returncode == 0:
+                return json.loads(result.stdout)
+            self._legacy_flag = False
+
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            raise XCResultError(result.stderr.decode(errors="replace").strip() or "xcresulttool failed")
+        return json.loads(result.stdout)
+
+    # Walking the object graph
+
+    def actions(self) -> List[Dict[str, Any]]:
+        return self.resolve().get("actions", [])
+
+    def iter_tests(self) -> Iterator[XCTestRecord]:
+        """Every test in the bundle, in test plan order.
+
+        Only the test plan summaries are fetched; per-test details stay
+        behind summary_ref until test_summary() is called.
+        """
+        for action in self.actions():
+            tests_ref = reference_id(action.get("actionResult", {}).get("testsRef"))
+            if not tests_ref:
+                continue
+            plan_runs = self.resolve(tests_ref)
+            for plan_run in plan_runs.get("summaries", []):
+                for testable in plan_run.get("testableSummaries", []):
+                    target = testable.get("targetName") or testable.get("name", "")
+                    for group in testable.get("tests", []):
+                        yield from self._walk_tests(group, target, group.get("name", ""))
+
+    def _walk_tests(self, node: Dict[str, Any], target: str, class_name: str) -> Iterator[XCTestRecord]:
+        if node.get("_type") == "ActionTestMetadata":
+            identifier = node.get("identifier", "")
+            if "/" in identifier:
+                class_name = identifier.split("/", 1)[0]
+            yield XCTestRecord(
+                identifier=identifier,
+                name=node.get("name", "").rstrip("()"),
+                class_name=class_name,
+                target=target,
+                status=node.get("testStatus", ""),
+                duration=node.get("duration", 0.0),
+                summary_ref=reference_id(node.get("summaryRef")),
+            )
+            return
+
+        for subtest in node.get("subtests", []):
+            yield from self._walk_tests(subtest, target, node.get("name", class_name))
+
+    def test_summary(self, test: XCTestRecord) -> Dict[str, Any]:
+        """Full ActionTestSummary of one test (fetched on first use)."""
+        if not test.summary_ref:
+            return {}
+        return self.resolve(test.summary_ref)
+
+    def attachments(self, test: XCTestRecord) -> List[Dict[str, Any]]:
+        """ActionTestAttachment objects of one test, from its activities and failures."""
+        summary = self.test_summary(test)
+        found: List[Dict[str, Any]] = []
+        pending = list(summary.get("activitySummaries", [])) + list(summary.get("failureSummaries", []))
+        while pending:
+            node = pending.pop(0)
+            found.extend(node.get("attachments", []))
+            pending[:0] = node.get("subactivities", [])
+        return found
+
+    def payload_path(self, payload_id: str, scratch_dir: Union[str, Path]) -> Tuple[Path, bool]:
+        """Locate an attachment payload as a file.
+
+        Exported payloads (payloads/<id> in the export directory) are used
+        in place. Otherwise xcresulttool exports the payload into
+        scratch_dir. Returns (path, is_temporary).
+        """
+        if self.export_dir is not None:
+            exported = self.export_dir / self.PAYLOAD_EXPORT_DIR / payload_id
+            if exported.exists():
+                return exported, False
+
+        if self.bundle_path is None or shutil.which("xcrun") is None:
+            raise XCResultError(f"Payload {payload_id} is not exported and xcresulttool is unavailable")
+
+        output_path = Path(scratch_dir) / payload_id
+        command = ["xcrun", "xcresulttool", "export", "--type", "file", "--path", str(self.bundle_path),
+                   "--id", payload_id, "--output-path", str(output_path)]
+        result = subprocess.run(command[:3] + ["--legacy"] + command[3:] if self._legacy_flag else command,
+                                capture_output=True)
+        if result.returncode != 0 and self._legacy_flag:
+            result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            raise XCResultError(result.stderr.decode(errors="replace").strip() or "xcresulttool export failed")
+        return output_path, True
+
+    def failure_summaries(self) -> List[Dict[str, Any]]:
+        """Test failure summaries recorded on the actions' issues."""
+        failures = []
+        for action in self.actions():
+            failures.extend(action.get("actionResult", {}).get("issues", {}).get("testFailureSummaries", []))
+        return failures
+
+    def export(self, out_dir: Union[str, Path], failed_only: bool = True) -> int:
+        """Write the objects needed to walk this bundle as an export directory.
+
+        Writes the root, the test plan summaries and (for failed tests only,
+        unless failed_only is False) the per-test summaries and attachment
+        payloads. Returns the number of objects written.
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        ids: List[Optional[str]] = [None]
+        for action in self.actions():
+            tests_ref = reference_id(action.get("actionResult", {}).get("testsRef"))
+            if tests_ref:
+                ids.append(tests_ref)
+        exported_tests = [
+            test for test in self.iter_tests() if test.summary_ref and (test.failed or not failed_only)
+        ]
+        ids.extend(test.summary_ref for test in exported_tests)
+
+        for object_id in ids:
+            raw = self._read_export(object_id)
+            if raw is None:
+                raw = self._read_xcresulttool(object_id)
+            name = f"{object_id}.json" if object_id else self.ROOT_EXPORT_NAME
+            with open(out_dir / name, "w") as f:
+                json.dump(raw, f)
+
+        payload_dir = out_dir / self.PAYLOAD_EXPORT_DIR
+        payload_count = 0
+        for test in exported_tests:
+            for attachment in self.attachments(test):
+                payload_id = reference_id(attachment.get("payloadRef"))
+                if not payload_id or (payload_dir / payload_id).exists():
+                    continue
+                payload_dir.mkdir(exist_ok=True)
+                path, is_temporary = self.payload_path(payload_id, payload_dir)
+                if not is_temporary:
+                    shutil.copyfile(path, payload_dir / payload_id)
+                payload_count += 1
+        return len(ids) + payload_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or export an xcresult bundle")
+    parser.add_argument("bundle", type=Path, help="Path to an .xcresult bundle, export directory or root JSON")
+    parser.add_argument("--export", type=Path, help="Write a JSON export directory (fixtures) here")
+    parser.add_argument("--export-dir", type=Path,
+                        help="Export directory resolving the references of a root JSON export")
+    parser.add_argument("--all-summaries", action="store_true",
+                        help="Export per-test summaries for every test, not just failures")
+    args = parser.parse_args()
+
+    try:
+        bundle = XCResultBundle.open(args.bundle, args.export_dir)
+        if args.export:
+            count = bundle.export(args.export, failed_only=not args.all_summaries)
+            print(f"Exported {count} objects to {args.export}")
+            return 0
+
+        counts: Dict[str, int] = {}
+        failed = []
+        for test in bundle.iter_tests():
+            counts[test.status] = counts.get(test.status, 0) + 1
+            if test.failed:
+                failed.append(test)
+    except XCResultError as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"Tests: {sum(counts.values())}")
+    for status, count in sorted(counts.items()):
+        print(f"  {status}: {count}")
+    for test in failed:
+        print(f"  ❌ {test.class_name}.{test.name} ({test.duration:.3f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
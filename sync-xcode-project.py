@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Xcode Project Sync Script (Python)
-Automatically syncs Swift files with Xcode project using pbxproj library
+Automatically syncs Swift files with Xcode project using scripts/pbxplist.py
 """
 
 import os
@@ -10,19 +10,13 @@ import glob
 from pathlib import Path
 from datetime import datetime
 
-try:
-    from pbxproj import XcodeProject
-except ImportError:
-    print("❌ Error: pbxproj library not installed")
-    print("")
-    print("Install it with:")
-    print("  pip3 install pbxproj")
-    print("")
-    sys.exit(1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from pbxplist import PBXParseError, XcodeProject
 
 # Configuration
 PROJECT_NAME = "Craig-O-Clean"
 PROJECT_FILE = f"{PROJECT_NAME}.xcodeproj/project.pbxproj"
+PROJECT_DIR = os.path.dirname(os.path.dirname(PROJECT_FILE))
 SOURCE_DIR = PROJECT_NAME
 EXCLUDE_PATTERNS = [
     "*.backup",
@@ -73,51 +67,35 @@ def get_disk_files(source_dir):
     return files
 
 def get_project_files(project):
-    """Get all Swift files currently in project"""
-    files = set()
+    """Get all Swift files currently in project, as {path: file reference UUID}"""
+    files = {}
 
-    for item in project.objects.get_objects_in_section('PBXFileReference'):
-        if item.get('path', '').endswith('.swift'):
-            # Try to reconstruct full path
-            path = item.get('path')
-            if path:
-                full_path = os.path.join(SOURCE_DIR, os.path.basename(path))
-                if os.path.exists(full_path):
-                    files.add(full_path)
+    for file_ref, path in project.source_paths('.swift').items():
+        files[os.path.join(PROJECT_DIR, path)] = file_ref
 
     return files
 
 def add_file_to_project(project, file_path):
-    """Add a file to the Xcode project"""
-    try:
-        # Get the target
-        targets = project.objects.get_targets()
-        if not targets:
-            print_error("No targets found in project")
-            return False
-
-        target = targets[0]
+    """Add a file to the Xcode project, in the group matching its folder"""
+    # Get the target
+    targets = project.targets()
+    if not targets:
+        print_error("No targets found in project")
+        return False
 
-        # Add file
-        project.add_file(file_path, parent=project.get_or_create_group(SOURCE_DIR))
+    target = targets[0]
 
-        # Add to build phase
-        if file_path.endswith('.swift'):
-            project.add_file_to_build_phase(file_path, target)
+    # Add file to its group and to the target's Sources build phase
+    folder = os.path.relpath(os.path.dirname(file_path), PROJECT_DIR or ".")
+    group = project.get_or_create_group(folder.replace(os.sep, "/"))
+    project.add_file(os.path.basename(file_path), group, [target])
 
-        return True
-    except Exception as e:
-        print_warning(f"Could not add {file_path}: {str(e)}")
-        return False
+    return True
 
-def remove_file_from_project(project, file_path):
-    """Remove a file from the Xcode project"""
-    try:
-        project.remove_file(file_path)
-        return True
-    except Exception as e:
-        print_warning(f"Could not remove {file_path}: {str(e)}")
-        return False
+def remove_file_from_project(project, file_ref):
+    """Remove a file reference, its build files and group entries from the Xcode project"""
+    project.remove_file(file_ref)
+    return True
 
 def backup_project():
     """Create a backup of the project file"""
@@ -168,7 +146,7 @@ def main():
     print_info("Loading Xcode project...")
     try:
         project = XcodeProject.load(PROJECT_FILE)
-    except Exception as e:
+    except (OSError, PBXParseError) as e:
         print_error(f"Failed to load project: {str(e)}")
         sys.exit(1)
 
@@ -181,8 +159,8 @@ def main():
     print("")
 
     # Find differences
-    files_to_add = disk_files - project_files
-    files_to_remove = project_files - disk_files
+    files_to_add = disk_files - set(project_files)
+    files_to_remove = set(project_files) - disk_files
 
     added_count = 0
     removed_count = 0
@@ -199,7 +177,7 @@ def main():
     if files_to_remove:
         print_info(f"Removing {len(files_to_remove)} deleted files...")
         for file_path in sorted(files_to_remove):
-            if remove_file_from_project(project, file_path):
+            if remove_file_from_project(project, project_files[file_path]):
                 print_colored(Colors.RED, "🗑️ ", f"Removed: {os.path.basename(file_path)}")
                 removed_count += 1
 